@@ -0,0 +1,53 @@
+"""Store API keys as SHA-256 hashes with an indexed prefix
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+import hashlib
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+# Must match app.utils.security.API_KEY_PREFIX_LENGTH
+PREFIX_LENGTH = 12
+
+def upgrade():
+    op.add_column('api_keys', sa.Column('key_prefix', sa.String(), nullable=True))
+    op.add_column('api_keys', sa.Column('key_hash', sa.String(), nullable=True))
+    
+    # Hash existing keys in place; their owners keep using the same key
+    conn = op.get_bind()
+    for key_id, key in conn.execute(sa.text("SELECT id, key FROM api_keys")).fetchall():
+        conn.execute(
+            sa.text("UPDATE api_keys SET key_prefix = :prefix, key_hash = :hash WHERE id = :id"),
+            {"prefix": key[:PREFIX_LENGTH], "hash": hashlib.sha256(key.encode()).hexdigest(), "id": key_id}
+        )
+    
+    op.alter_column('api_keys', 'key_prefix', nullable=False)
+    op.alter_column('api_keys', 'key_hash', nullable=False)
+    op.create_index(op.f('ix_api_keys_key_prefix'), 'api_keys', ['key_prefix'])
+    op.create_index(op.f('ix_api_keys_key_hash'), 'api_keys', ['key_hash'], unique=True)
+    
+    # Drop the plaintext keys
+    op.drop_index(op.f('ix_api_keys_key'), 'api_keys')
+    op.drop_column('api_keys', 'key')
+
+def downgrade():
+    # Plaintext keys cannot be recovered; restored rows hold the hash and must be reissued
+    op.add_column('api_keys', sa.Column('key', sa.String(), nullable=True))
+    op.execute("UPDATE api_keys SET key = key_hash")
+    op.alter_column('api_keys', 'key', nullable=False)
+    op.create_index(op.f('ix_api_keys_key'), 'api_keys', ['key'], unique=True)
+    
+    op.drop_index(op.f('ix_api_keys_key_hash'), 'api_keys')
+    op.drop_index(op.f('ix_api_keys_key_prefix'), 'api_keys')
+    op.drop_column('api_keys', 'key_hash')
+    op.drop_column('api_keys', 'key_prefix')
@@ -0,0 +1,24 @@
+"""Add idempotency key to transactions
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-16 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Ledger operations record their key here; the unique index makes replays detectable
+    op.add_column('transactions', sa.Column('idempotency_key', sa.String(), nullable=True))
+    op.create_index(op.f('ix_transactions_idempotency_key'), 'transactions', ['idempotency_key'], unique=True)
+
+def downgrade():
+    op.drop_index(op.f('ix_transactions_idempotency_key'), 'transactions')
+    op.drop_column('transactions', 'idempotency_key')
@@ -0,0 +1,22 @@
+"""Add composite index for keyset-paginated verification history
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-16 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Serves WHERE user_id = ? ORDER BY created_at DESC, id DESC with a cursor seek
+    op.create_index('ix_verifications_user_created_id', 'verifications', ['user_id', 'created_at', 'id'])
+
+def downgrade():
+    op.drop_index('ix_verifications_user_created_id', 'verifications')
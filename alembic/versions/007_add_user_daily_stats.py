@@ -0,0 +1,38 @@
+"""Add user_daily_stats rollup table
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-16 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('user_daily_stats',
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('service_name', sa.String(), nullable=False),
+        sa.Column('verifications', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('completed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('failed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('timed_out', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('cancelled', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('verification_cost', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('spent', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('refunded', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('funded', sa.Float(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('user_id', 'day', 'service_name')
+    )
+    op.create_index('ix_user_daily_stats_day', 'user_daily_stats', ['day'])
+    # Populate with: python scripts/backfill_user_daily_stats.py
+
+def downgrade():
+    op.drop_index('ix_user_daily_stats_day', 'user_daily_stats')
+    op.drop_table('user_daily_stats')
@@ -1,18 +1,26 @@
 """Admin API router for user management and system monitoring."""
 from typing import List, Optional
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
 from fastapi import APIRouter, Depends, HTTPException, Query, Body
 from fastapi.responses import HTMLResponse
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
 from app.core.dependencies import get_admin_user_id
+from app.core.principal_cache import principal_invalidator
 from app.models.user import User
 from app.models.verification import Verification
 from app.models.transaction import Transaction
 from app.models.system import SupportTicket
+from app.models.stats import UserDailyStats
+from app.services.auth_service import AuthService
+from app.services.daily_stats import ACCOUNT_ROW
+from app.services.export_jobs import export_jobs
+from app.api.analytics import export_job_response
 from app.schemas import (
-    UserResponse, SuccessResponse, SupportTicketResponse
+    UserResponse, SuccessResponse, SupportTicketResponse,
+    ExportRequest, ExportJobResponse
 )
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
@@ -128,6 +136,10 @@ def suspend_user(
     user.is_active = False
     db.commit()
     
+    # Revoke cached sessions on every worker immediately rather than at cache expiry
+    principal_invalidator.invalidate_user(user.id)
+    AuthService(db).revoke_cached_api_keys(user.id)
+    
     return SuccessResponse(message=f"User {user.email} suspended")
 
 
@@ -144,10 +156,29 @@ def activate_user(
     
     user.is_active = True
     db.commit()
+    principal_invalidator.invalidate_user(user.id)
+    AuthService(db).revoke_cached_api_keys(user.id)
     
     return SuccessResponse(message=f"User {user.email} activated")
 
 
+@router.post("/pricing/reload", response_model=SuccessResponse)
+def reload_pricing(admin_id: str = Depends(get_admin_user_id)):
+    """Rebuild the price table from the pricing config (admin only)."""
+    from app.api.countries import reload_country_catalog
+    from app.services.pricing_engine import pricing_engine
+    
+    try:
+        table = pricing_engine.reload()
+    except (OSError, ValueError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid pricing config: {e}")
+    reload_country_catalog()
+    
+    return SuccessResponse(
+        message=f"Pricing reloaded: {len(table.service_index)} services, {len(table.country_index)} countries"
+    )
+
+
 @router.get("/stats")
 def get_platform_stats(
     admin_id: str = Depends(get_admin_user_id),
@@ -156,36 +187,43 @@ def get_platform_stats(
     """Get platform-wide statistics (admin only)."""
     
     try:
-        from sqlalchemy import text
+        total_users = db.query(func.count(User.id)).scalar() or 0
         
-        # Get basic stats with raw SQL for reliability
-        result = db.execute(text("SELECT COUNT(*) FROM users")).scalar()
-        total_users = result or 0
+        # Totals come from the daily rollup rather than the raw history tables
+        totals = db.query(
+            func.coalesce(func.sum(UserDailyStats.verifications), 0),
+            func.coalesce(func.sum(UserDailyStats.completed), 0),
+            func.coalesce(func.sum(UserDailyStats.spent), 0.0)
+        ).one()
+        total_verifications, completed_verifications, total_spent = totals
         
-        # Try to get verifications count
-        try:
-            result = db.execute(text("SELECT COUNT(*) FROM verifications")).scalar()
-            total_verifications = result or 0
-        except Exception:
-            total_verifications = 0
+        verifications = func.sum(UserDailyStats.verifications)
+        popular_services = db.query(UserDailyStats.service_name, verifications).filter(
+            UserDailyStats.service_name != ACCOUNT_ROW
+        ).group_by(UserDailyStats.service_name).having(
+            verifications > 0
+        ).order_by(verifications.desc()).limit(10).all()
         
-        # Try to get transactions sum
-        try:
-            result = db.execute(text("SELECT COALESCE(SUM(ABS(amount)), 0) FROM transactions WHERE type = 'debit'")).scalar()
-            total_spent = float(result or 0)
-        except Exception:
-            total_spent = 0.0
+        today = datetime.now(timezone.utc).date()
+        by_day = dict(db.query(UserDailyStats.day, verifications).filter(
+            UserDailyStats.day > today - timedelta(days=30)
+        ).group_by(UserDailyStats.day).all())
+        
+        success_rate = (completed_verifications / total_verifications * 100) if total_verifications > 0 else 0.0
         
         return {
             "total_users": total_users,
             "new_users": 0,
-            "total_verifications": total_verifications,
-            "success_rate": 95.0,
-            "total_spent": total_spent,
-            "popular_services": [],
-            "daily_usage": []
+            "total_verifications": int(total_verifications),
+            "success_rate": round(success_rate, 1),
+            "total_spent": round(float(total_spent), 2),
+            "popular_services": [{"service": service, "count": int(count)} for service, count in popular_services],
+            "daily_usage": [
+                {"date": day.strftime("%Y-%m-%d"), "count": int(by_day.get(day) or 0)}
+                for day in (today - timedelta(days=i) for i in reversed(range(30)))
+            ]
         }
-        
+    
     except Exception as e:
         # Ultimate fallback
         return {
@@ -406,6 +444,23 @@ def get_all_transactions(
     }
 
 
+@router.post("/transactions/export/jobs", response_model=ExportJobResponse, status_code=202)
+async def export_all_transactions(
+    export_request: ExportRequest,
+    admin_id: str = Depends(get_admin_user_id),
+    user_id: Optional[str] = Query(None, description="Filter by user ID"),
+    transaction_type: Optional[str] = Query(None, description="Filter by type")
+):
+    """Queue a background export of transactions across users (admin only)."""
+    job = await export_jobs.submit(
+        admin_id, "transactions", export_request.format, user_id,
+        export_request.date_from, export_request.date_to, transaction_type
+    )
+    if job is None:
+        raise HTTPException(status_code=503, detail="Export queue is full, try again later")
+    return export_job_response(job)
+
+
 @router.post("/broadcast", response_model=SuccessResponse)
 async def broadcast_notification(
     title: str = Body(..., description="Notification title"),
@@ -1,204 +1,226 @@
 """Analytics API router for user analytics and reporting."""
+from collections import Counter
 from typing import List, Optional
 from datetime import datetime, timezone, timedelta
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
 
-from app.core.database import get_db
+from app.core.caching import get_cached_usage_analytics, set_cached_usage_analytics
+from app.core.database import get_async_db
 from app.core.dependencies import get_current_user_id
-from app.models.verification import Verification
-from app.models.transaction import Transaction
-from app.schemas import AnalyticsResponse
+from app.models.stats import UserDailyStats
+from app.services.daily_stats import ACCOUNT_ROW
+from app.services.export_service import EXPORT_COLUMNS, EXPORT_FORMATS, export_service
+from app.services.export_jobs import COMPLETED, ExportJob, export_jobs
+from app.schemas import AnalyticsResponse, ExportRequest, ExportJobResponse
 
 router = APIRouter(prefix="/analytics", tags=["Analytics"])
 
 
 @router.get("/usage", response_model=AnalyticsResponse)
-def get_user_analytics(
+async def get_user_analytics(
     user_id: str = Depends(get_current_user_id),
-    period: int = Query(30, description="Period in days"),
-    db: Session = Depends(get_db)
+    period: int = Query(30, ge=1, le=365, description="Period in days"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get user's usage analytics."""
-    start_date = datetime.now(timezone.utc) - timedelta(days=period)
+    cached = await get_cached_usage_analytics(user_id, period)
+    if cached is not None:
+        return cached
     
-    # User verifications
-    total_verifications = db.query(Verification).filter(
-        Verification.user_id == user_id,
-        Verification.created_at >= start_date
-    ).count()
+    # The period is the last `period` UTC calendar days, today included
+    today = datetime.now(timezone.utc).date()
+    start_day = today - timedelta(days=period - 1)
     
-    completed_verifications = db.query(Verification).filter(
-        Verification.user_id == user_id,
-        Verification.created_at >= start_date,
-        Verification.status == "completed"
-    ).count()
+    rows = (await db.execute(
+        select(
+            UserDailyStats.day,
+            UserDailyStats.service_name,
+            UserDailyStats.verifications,
+            UserDailyStats.completed,
+            UserDailyStats.spent
+        ).where(
+            UserDailyStats.user_id == user_id,
+            UserDailyStats.day >= start_day
+        )
+    )).all()
+    
+    total_verifications = 0
+    completed_verifications = 0
+    total_spent = 0.0
+    by_service = Counter()
+    by_day = Counter()
+    for row in rows:
+        total_spent += row.spent
+        if row.service_name == ACCOUNT_ROW:
+            continue
+        total_verifications += row.verifications
+        completed_verifications += row.completed
+        if row.verifications:
+            by_service[row.service_name] += row.verifications
+        by_day[row.day] += row.verifications
     
     success_rate = (completed_verifications / total_verifications * 100) if total_verifications > 0 else 0
     
-    # Total spent
-    total_spent = db.query(func.sum(Transaction.amount)).filter(
-        Transaction.user_id == user_id,
-        Transaction.type == "debit",
-        Transaction.created_at >= start_date
-    ).scalar() or 0
-    
-    # Popular services
-    popular_services = db.query(
-        Verification.service_name,
-        func.count(Verification.id).label('count')
-    ).filter(
-        Verification.user_id == user_id,
-        Verification.created_at >= start_date
-    ).group_by(Verification.service_name).order_by(
-        func.count(Verification.id).desc()
-    ).limit(10).all()
-    
-    # Daily usage
+    # Zero-fill the last `period` days, oldest first
     daily_usage = []
-    for i in range(period):
-        day = datetime.now(timezone.utc) - timedelta(days=i)
-        day_start = day.replace(hour=0, minute=0, second=0, microsecond=0)
-        day_end = day_start + timedelta(days=1)
-        
-        day_verifications = db.query(Verification).filter(
-            Verification.user_id == user_id,
-            Verification.created_at >= day_start,
-            Verification.created_at < day_end
-        ).count()
-        
-        daily_usage.append({
-            "date": day_start.strftime("%Y-%m-%d"),
-            "count": day_verifications
-        })
-    
-    return AnalyticsResponse(
+    for i in reversed(range(period)):
+        day = today - timedelta(days=i)
+        daily_usage.append({"date": day.strftime("%Y-%m-%d"), "count": by_day.get(day, 0)})
+    
+    analytics = AnalyticsResponse(
         total_verifications=total_verifications,
         success_rate=round(success_rate, 1),
-        total_spent=abs(total_spent),
-        popular_services=[{"service": s[0], "count": s[1]} for s in popular_services],
-        daily_usage=list(reversed(daily_usage))
-    )
+        total_spent=round(total_spent, 2),
+        popular_services=[{"service": service, "count": count} for service, count in by_service.most_common(10)],
+        daily_usage=daily_usage
+    ).model_dump()
+    
+    await set_cached_usage_analytics(user_id, period, analytics)
+    return analytics
 
 
 @router.get("/costs")
-def get_cost_analysis(
+async def get_cost_analysis(
     user_id: str = Depends(get_current_user_id),
-    period: int = Query(30, description="Period in days"),
-    db: Session = Depends(get_db)
+    period: int = Query(30, ge=1, le=365, description="Period in days"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get detailed cost analysis."""
-    start_date = datetime.now(timezone.utc) - timedelta(days=period)
+    today = datetime.now(timezone.utc).date()
+    start_day = today - timedelta(days=period - 1)
     
     # Cost by service
-    service_costs = db.query(
-        Verification.service_name,
-        func.sum(Verification.cost).label('total_cost'),
-        func.count(Verification.id).label('count'),
-        func.avg(Verification.cost).label('avg_cost')
-    ).filter(
-        Verification.user_id == user_id,
-        Verification.created_at >= start_date
-    ).group_by(Verification.service_name).all()
-    
-    # Monthly spending trend
-    monthly_spending = []
-    for i in range(6):  # Last 6 months
-        month_start = datetime.now(timezone.utc).replace(day=1) - timedelta(days=30*i)
-        month_end = month_start + timedelta(days=32)
-        month_end = month_end.replace(day=1) - timedelta(days=1)
-        
-        month_spent = db.query(func.sum(Transaction.amount)).filter(
-            Transaction.user_id == user_id,
-            Transaction.type == "debit",
-            Transaction.created_at >= month_start,
-            Transaction.created_at <= month_end
-        ).scalar() or 0
-        
-        monthly_spending.append({
-            "month": month_start.strftime("%Y-%m"),
-            "amount": abs(month_spent)
-        })
+    verifications = func.sum(UserDailyStats.verifications)
+    total_cost = func.sum(UserDailyStats.verification_cost)
+    service_costs = (await db.execute(
+        select(UserDailyStats.service_name, total_cost, verifications).where(
+            UserDailyStats.user_id == user_id,
+            UserDailyStats.day >= start_day,
+            UserDailyStats.service_name != ACCOUNT_ROW
+        ).group_by(UserDailyStats.service_name).having(verifications > 0)
+    )).all()
+    
+    # Monthly spending trend over the current and previous five calendar months
+    month_starts = [today.replace(day=1)]
+    for _ in range(5):
+        month_starts.append((month_starts[-1] - timedelta(days=1)).replace(day=1))
+    
+    spent_rows = (await db.execute(
+        select(UserDailyStats.day, UserDailyStats.spent).where(
+            UserDailyStats.user_id == user_id,
+            UserDailyStats.day >= month_starts[-1],
+            UserDailyStats.service_name == ACCOUNT_ROW
+        )
+    )).all()
+    
+    by_month = Counter()
+    for row in spent_rows:
+        by_month[row.day.strftime("%Y-%m")] += row.spent
+    months = [month_start.strftime("%Y-%m") for month_start in reversed(month_starts)]
     
     return {
         "service_costs": [
             {
-                "service": cost[0],
-                "total_cost": float(cost[1] or 0),
-                "count": cost[2],
-                "avg_cost": float(cost[3] or 0)
+                "service": service_name,
+                "total_cost": float(cost or 0),
+                "count": count,
+                "avg_cost": float(cost or 0) / count
             }
-            for cost in service_costs
+            for service_name, cost, count in service_costs
+        ],
+        "monthly_spending": [
+            {"month": month, "amount": round(by_month.get(month, 0.0), 2)}
+            for month in months
         ],
-        "monthly_spending": list(reversed(monthly_spending)),
         "period_days": period
     }
 
 
 @router.get("/export")
-def export_data(
+async def export_data(
     user_id: str = Depends(get_current_user_id),
     data_type: str = Query("verifications", description="Data type: verifications or transactions"),
-    output_format: str = Query("json", description="Format: json or csv"),
+    output_format: str = Query("json", description="Format: json, ndjson or csv"),
+    compress: bool = Query(False, description="Gzip the download"),
     date_from: Optional[datetime] = Query(None, description="Start date"),
-    date_to: Optional[datetime] = Query(None, description="End date"),
-    db: Session = Depends(get_db)
+    date_to: Optional[datetime] = Query(None, description="End date")
 ):
     """Export user data."""
+    if data_type not in EXPORT_COLUMNS:
+        return {"error": "Invalid data_type. Use 'verifications' or 'transactions'"}
+    if output_format not in EXPORT_FORMATS:
+        return {"error": "Invalid output_format. Use 'json', 'ndjson' or 'csv'"}
+    
     # Set default date range if not provided
     if not date_from:
         date_from = datetime.now(timezone.utc) - timedelta(days=30)
     if not date_to:
         date_to = datetime.now(timezone.utc)
     
-    if data_type == "verifications":
-        verifications = db.query(Verification).filter(
-            Verification.user_id == user_id,
-            Verification.created_at >= date_from,
-            Verification.created_at <= date_to
-        ).order_by(Verification.created_at.desc()).all()
-        
-        data = [
-            {
-                "id": v.id,
-                "service_name": v.service_name,
-                "phone_number": v.phone_number,
-                "status": v.status,
-                "cost": v.cost,
-                "created_at": v.created_at.isoformat(),
-                "completed_at": v.completed_at.isoformat() if v.completed_at else None
-            }
-            for v in verifications
-        ]
-    
-    elif data_type == "transactions":
-        transactions = db.query(Transaction).filter(
-            Transaction.user_id == user_id,
-            Transaction.created_at >= date_from,
-            Transaction.created_at <= date_to
-        ).order_by(Transaction.created_at.desc()).all()
-        
-        data = [
-            {
-                "id": t.id,
-                "amount": t.amount,
-                "type": t.type,
-                "description": t.description,
-                "created_at": t.created_at.isoformat()
-            }
-            for t in transactions
-        ]
+    filename = export_service.filename(data_type, output_format, compress)
+    return StreamingResponse(
+        export_service.stream(data_type, user_id, date_from, date_to, output_format, compress),
+        media_type=export_service.media_type(output_format, compress),
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+
+def export_job_response(job: ExportJob) -> ExportJobResponse:
+    """Status of an export job, with its download link once finished."""
+    data = job.to_dict()
+    if job.status == COMPLETED:
+        data["download_url"] = f"/analytics/export/jobs/{job.id}/download"
+    return ExportJobResponse(**data)
+
+
+def _owned_export_job(job_id: str, user_id: str) -> ExportJob:
+    """Look up a job the user created, or 404."""
+    job = export_jobs.get(job_id)
+    if job is None or job.owner_id != user_id:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    return job
+
+
+@router.post("/export/jobs", response_model=ExportJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_export_job(
+    export_request: ExportRequest,
+    user_id: str = Depends(get_current_user_id)
+):
+    """Queue a background export of the user's data."""
+    date_from = export_request.date_from or datetime.now(timezone.utc) - timedelta(days=30)
+    date_to = export_request.date_to or datetime.now(timezone.utc)
     
-    else:
-        return {"error": "Invalid data_type. Use 'verifications' or 'transactions'"}
+    job = await export_jobs.submit(
+        user_id, export_request.data_type, export_request.format, user_id, date_from, date_to
+    )
+    if job is None:
+        raise HTTPException(status_code=503, detail="Export queue is full, try again later")
+    return export_job_response(job)
+
+
+@router.get("/export/jobs/{job_id}", response_model=ExportJobResponse)
+def get_export_job(
+    job_id: str,
+    user_id: str = Depends(get_current_user_id)
+):
+    """Get progress and timing of an export job."""
+    return export_job_response(_owned_export_job(job_id, user_id))
+
+
+@router.get("/export/jobs/{job_id}/download")
+def download_export_job(
+    job_id: str,
+    user_id: str = Depends(get_current_user_id)
+):
+    """Download a finished export; supports Range requests for resuming."""
+    job = _owned_export_job(job_id, user_id)
+    if job.status != COMPLETED:
+        raise HTTPException(status_code=409, detail=f"Export is {job.status}")
     
-    return {
-        "data": data,
-        "format": output_format,
-        "count": len(data),
-        "date_range": {
-            "from": date_from.isoformat(),
-            "to": date_to.isoformat()
-        }
-    }
\ No newline at end of file
+    path = export_jobs.file_path(job)
+    if not path.is_file():
+        raise HTTPException(status_code=410, detail="Export has expired")
+    return FileResponse(path, media_type="application/gzip", filename=job.filename)
@@ -437,7 +437,7 @@ def list_api_keys(
         APIKeyListResponse(
             id=key.id,
             name=key.name,
-            key_preview=f"{key.key[:12]}...{key.key[-6:]}",
+            key_preview=f"{key.key_prefix}...",
             is_active=key.is_active,
             created_at=key.created_at,
             last_used=key.last_used
@@ -453,17 +453,9 @@ def delete_api_key(
     db: Session = Depends(get_db)
 ):
     """Delete API key."""
-    from app.models.user import APIKey
-    
-    api_key = db.query(APIKey).filter(
-        APIKey.id == key_id,
-        APIKey.user_id == user_id
-    ).first()
+    auth_service = get_auth_service(db)
     
-    if not api_key:
+    if not auth_service.deactivate_api_key(key_id, user_id):
         raise HTTPException(status_code=404, detail="API key not found")
     
-    db.delete(api_key)
-    db.commit()
-    
     return SuccessResponse(message="API key deleted successfully")
\ No newline at end of file
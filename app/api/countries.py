@@ -1,220 +1,274 @@
 """Countries API router for TextVerified country information."""
-from fastapi import APIRouter
-from typing import List, Dict, Any
+from dataclasses import dataclass
+from types import MappingProxyType
+from fastapi import APIRouter, Header, Response
+from typing import List, Dict, Any, Mapping, Optional, Tuple
+
+from app.core.caching import SerializedPayload, serialize_payload, etag_matches
+from app.services.pricing_engine import PriceTable, get_pricing_tier, pricing_engine
 
 
 router = APIRouter(prefix="/countries", tags=["Countries"])
 
-@router.get("/")
-async def get_available_countries() -> Dict[str, Any]:
-    """Get all available countries with pricing and capabilities."""
-    try:
-        # Use comprehensive TextVerified country data from assessment
-        countries = get_textverified_countries()
-        
-        return {
-            "countries": countries,
-            "total_count": len(countries),
-            "regions": get_regions_summary(countries)
-        }
-        
-    except Exception as e:
-        return {"error": f"Failed to fetch countries: {str(e)}", "countries": []}
+# Phase 1 priority markets
+POPULAR_COUNTRY_CODES = (
+    "US", "GB", "DE", "FR", "CA", "AU", "NL", "SE", "JP", "SG",
+    "AE", "SA", "IN", "BR", "RU", "PL", "IT", "ES", "KR", "CH"
+)
 
-@router.get("/popular")
-async def get_popular_countries() -> Dict[str, Any]:
-    """Get most popular countries for verification (Phase 1 priority)."""
-    popular_codes = [
-        "US", "GB", "DE", "FR", "CA", "AU", "NL", "SE", "JP", "SG", 
-        "AE", "SA", "IN", "BR", "RU", "PL", "IT", "ES", "KR", "CH"
-    ]
+# The catalog only changes on deploy or reload, so clients may cache briefly
+COUNTRIES_CACHE_CONTROL = "public, max-age=3600"
+
+
+@dataclass(frozen=True)
+class CountryCatalog:
+    """Country data indexed once, with every response pre-serialized."""
+    price_table: PriceTable
+    countries: Tuple[Mapping[str, Any], ...]
+    by_code: Mapping[str, Mapping[str, Any]]
+    by_region: Mapping[str, Tuple[Mapping[str, Any], ...]]
+    by_tier: Mapping[str, Tuple[Mapping[str, Any], ...]]
+    all_response: SerializedPayload
+    popular_response: SerializedPayload
+    regions_response: SerializedPayload
+    detail_responses: Mapping[str, SerializedPayload]
+
+
+def build_country_catalog(raw_countries: Optional[List[Dict[str, Any]]] = None) -> CountryCatalog:
+    """Build frozen indexes and serialized responses from the country list."""
+    # Pricing and voice support come from the price table quotes are served from
+    price_table = pricing_engine.table
+    countries = tuple(
+        MappingProxyType(_priced_country(country, price_table))
+        for country in (raw_countries if raw_countries is not None else get_textverified_countries())
+    )
+    by_code = {country["code"]: country for country in countries}
     
-    all_countries = await get_available_countries()
-    popular_countries = [
-        country for country in all_countries["countries"]
-        if country["code"] in popular_codes
-    ]
+    by_region: Dict[str, List] = {}
+    by_tier: Dict[str, List] = {}
+    for country in countries:
+        by_region.setdefault(country["region"], []).append(country)
+        by_tier.setdefault(country["tier"], []).append(country)
+    
+    # Sort countries within each region by tier then name
+    regions = {
+        region: sorted(members, key=lambda x: (x["tier"] != "Premium", x["name"]))
+        for region, members in by_region.items()
+    }
     
     # Sort by tier and multiplier
-    popular_countries.sort(key=lambda x: (x["tier"] == "Premium", x["price_multiplier"]), reverse=True)
+    popular = sorted(
+        (by_code[code] for code in POPULAR_COUNTRY_CODES if code in by_code),
+        key=lambda x: (x["tier"] == "Premium", x["price_multiplier"]),
+        reverse=True
+    )
     
+    detail_responses = {
+        code: serialize_payload({
+            **country,
+            "services_available": get_country_services(code),
+            "estimated_delivery_time": get_delivery_time(code),
+            "success_rate": get_success_rate(code)
+        })
+        for code, country in by_code.items()
+    }
+    
+    return CountryCatalog(
+        price_table=price_table,
+        countries=countries,
+        by_code=MappingProxyType(by_code),
+        by_region=MappingProxyType({region: tuple(members) for region, members in regions.items()}),
+        by_tier=MappingProxyType({tier: tuple(members) for tier, members in by_tier.items()}),
+        all_response=serialize_payload({
+            "countries": countries,
+            "total_count": len(countries),
+            "regions": get_regions_summary(countries)
+        }),
+        popular_response=serialize_payload({
+            "countries": popular,
+            "total_count": len(popular)
+        }),
+        regions_response=serialize_payload({
+            "regions": regions,
+            "region_count": len(regions),
+            "total_countries": len(countries)
+        }),
+        detail_responses=MappingProxyType(detail_responses)
+    )
+
+
+def _priced_country(country: Mapping[str, Any], price_table: PriceTable) -> Dict[str, Any]:
+    """Country entry with multiplier, tier and voice support from the price table."""
+    column = price_table.country_index.get(country["code"], len(price_table.multipliers) - 1)
+    multiplier = price_table.multipliers[column]
     return {
-        "countries": popular_countries,
-        "total_count": len(popular_countries)
+        "code": country["code"],
+        "name": country["name"],
+        "price_multiplier": multiplier,
+        "voice_supported": country["code"] in price_table.voice_supported,
+        "region": country["region"],
+        "tier": get_pricing_tier(multiplier)
     }
 
+
+def reload_country_catalog(raw_countries: Optional[List[Dict[str, Any]]] = None) -> CountryCatalog:
+    """Rebuild the catalog, e.g. after a configuration change."""
+    global country_catalog
+    country_catalog = build_country_catalog(raw_countries)
+    return country_catalog
+
+
+def get_country_catalog() -> CountryCatalog:
+    """Current catalog, rebuilt when the pricing table has been reloaded."""
+    pricing_engine.reload_if_changed()
+    if country_catalog.price_table is not pricing_engine.table:
+        return reload_country_catalog()
+    return country_catalog
+
+
+def _payload_response(payload: SerializedPayload, if_none_match: Optional[str]) -> Response:
+    """Serve pre-serialized bytes, or 304 when the client copy is current."""
+    headers = {"ETag": payload.etag, "Cache-Control": COUNTRIES_CACHE_CONTROL}
+    if etag_matches(if_none_match, payload.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
+
+@router.get("/")
+async def get_available_countries(if_none_match: Optional[str] = Header(None)):
+    """Get all available countries with pricing and capabilities."""
+    return _payload_response(get_country_catalog().all_response, if_none_match)
+
+@router.get("/popular")
+async def get_popular_countries(if_none_match: Optional[str] = Header(None)):
+    """Get most popular countries for verification (Phase 1 priority)."""
+    return _payload_response(get_country_catalog().popular_response, if_none_match)
+
 @router.get("/regions")
-async def get_countries_by_region() -> Dict[str, Any]:
+async def get_countries_by_region(if_none_match: Optional[str] = Header(None)):
     """Get countries organized by regions with continent structure."""
-    all_countries = await get_available_countries()
-    
-    regions = {}
-    for country in all_countries["countries"]:
-        region = country["region"]
-        if region not in regions:
-            regions[region] = []
-        regions[region].append(country)
-    
-    # Sort countries within each region by tier then name
-    for region in regions:
-        regions[region].sort(key=lambda x: (x["tier"] != "Premium", x["name"]))
-    
-    return {
-        "regions": regions,
-        "region_count": len(regions),
-        "total_countries": sum(len(countries) for countries in regions.values())
-    }
+    return _payload_response(get_country_catalog().regions_response, if_none_match)
 
 @router.get("/{country_code}")
-async def get_country_details(country_code: str) -> Dict[str, Any]:
+async def get_country_details(country_code: str, if_none_match: Optional[str] = Header(None)):
     """Get detailed information for a specific country."""
-    all_countries = await get_available_countries()
-    
-    country = next(
-        (c for c in all_countries["countries"] if c["code"] == country_code.upper()),
-        None
-    )
+    payload = get_country_catalog().detail_responses.get(country_code.upper())
     
-    if not country:
+    if payload is None:
         return {"error": f"Country {country_code} not found"}
     
-    # Add additional details
-    country_details = {
-        **country,
-        "services_available": get_country_services(country_code),
-        "estimated_delivery_time": get_delivery_time(country_code),
-        "success_rate": get_success_rate(country_code)
-    }
-    
-    return country_details
+    return _payload_response(payload, if_none_match)
 
 def is_voice_supported(country_code: str) -> bool:
     """Check if voice verification is supported in country."""
-    voice_supported_countries = {
-        "US", "CA", "GB", "DE", "FR", "AU", "NL", "SE", "NO", "DK", "FI",
-        "CH", "AT", "BE", "IT", "ES", "IE", "JP", "KR", "SG", "HK", "AE",
-        "SA", "IL", "BR", "RU", "PL", "CZ", "HU"
-    }
-    return country_code in voice_supported_countries
+    country = get_country_catalog().by_code.get(country_code.upper())
+    return bool(country and country["voice_supported"])
 
 def get_textverified_countries() -> List[Dict[str, Any]]:
     """Get comprehensive TextVerified country data from assessment."""
     countries = [
         # North America (3 countries)
-        {"code": "US", "name": "United States", "price_multiplier": 1.0, "voice_supported": True, "region": "North America", "tier": "Standard"},
-        {"code": "CA", "name": "Canada", "price_multiplier": 1.1, "voice_supported": True, "region": "North America", "tier": "Standard"},
-        {"code": "MX", "name": "Mexico", "price_multiplier": 0.4, "voice_supported": False, "region": "North America", "tier": "Economy"},
+        {"code": "US", "name": "United States", "region": "North America"},
+        {"code": "CA", "name": "Canada", "region": "North America"},
+        {"code": "MX", "name": "Mexico", "region": "North America"},
         
         # Europe (29 countries)
-        {"code": "GB", "name": "United Kingdom", "price_multiplier": 1.0, "voice_supported": True, "region": "Europe", "tier": "Standard"},
-        {"code": "DE", "name": "Germany", "price_multiplier": 1.0, "voice_supported": True, "region": "Europe", "tier": "Standard"},
-        {"code": "FR", "name": "France", "price_multiplier": 1.0, "voice_supported": True, "region": "Europe", "tier": "Standard"},
-        {"code": "NL", "name": "Netherlands", "price_multiplier": 1.0, "voice_supported": True, "region": "Europe", "tier": "Standard"},
-        {"code": "CH", "name": "Switzerland", "price_multiplier": 1.8, "voice_supported": True, "region": "Europe", "tier": "Premium"},
-        {"code": "AT", "name": "Austria", "price_multiplier": 1.0, "voice_supported": True, "region": "Europe", "tier": "Standard"},
-        {"code": "BE", "name": "Belgium", "price_multiplier": 1.0, "voice_supported": True, "region": "Europe", "tier": "Standard"},
-        {"code": "IE", "name": "Ireland", "price_multiplier": 1.0, "voice_supported": True, "region": "Europe", "tier": "Standard"},
-        {"code": "LU", "name": "Luxembourg", "price_multiplier": 1.2, "voice_supported": True, "region": "Europe", "tier": "Premium"},
-        {"code": "SE", "name": "Sweden", "price_multiplier": 1.5, "voice_supported": True, "region": "Europe", "tier": "Premium"},
-        {"code": "NO", "name": "Norway", "price_multiplier": 1.6, "voice_supported": True, "region": "Europe", "tier": "Premium"},
-        {"code": "FI", "name": "Finland", "price_multiplier": 1.3, "voice_supported": True, "region": "Europe", "tier": "Premium"},
-        {"code": "DK", "name": "Denmark", "price_multiplier": 1.4, "voice_supported": True, "region": "Europe", "tier": "Premium"},
-        {"code": "IS", "name": "Iceland", "price_multiplier": 1.7, "voice_supported": True, "region": "Europe", "tier": "Premium"},
-        {"code": "IT", "name": "Italy", "price_multiplier": 0.9, "voice_supported": True, "region": "Europe", "tier": "Standard"},
-        {"code": "ES", "name": "Spain", "price_multiplier": 0.9, "voice_supported": True, "region": "Europe", "tier": "Standard"},
-        {"code": "PT", "name": "Portugal", "price_multiplier": 0.8, "voice_supported": True, "region": "Europe", "tier": "Standard"},
-        {"code": "MT", "name": "Malta", "price_multiplier": 0.9, "voice_supported": False, "region": "Europe", "tier": "Standard"},
-        {"code": "CY", "name": "Cyprus", "price_multiplier": 0.8, "voice_supported": False, "region": "Europe", "tier": "Standard"},
-        {"code": "PL", "name": "Poland", "price_multiplier": 0.6, "voice_supported": True, "region": "Europe", "tier": "Economy"},
-        {"code": "CZ", "name": "Czech Republic", "price_multiplier": 0.6, "voice_supported": True, "region": "Europe", "tier": "Economy"},
-        {"code": "HU", "name": "Hungary", "price_multiplier": 0.6, "voice_supported": True, "region": "Europe", "tier": "Economy"},
-        {"code": "RO", "name": "Romania", "price_multiplier": 0.5, "voice_supported": False, "region": "Europe", "tier": "Economy"},
-        {"code": "BG", "name": "Bulgaria", "price_multiplier": 0.5, "voice_supported": False, "region": "Europe", "tier": "Economy"},
-        {"code": "HR", "name": "Croatia", "price_multiplier": 0.6, "voice_supported": False, "region": "Europe", "tier": "Economy"},
-        {"code": "SI", "name": "Slovenia", "price_multiplier": 0.7, "voice_supported": False, "region": "Europe", "tier": "Economy"},
-        {"code": "SK", "name": "Slovakia", "price_multiplier": 0.6, "voice_supported": False, "region": "Europe", "tier": "Economy"},
-        {"code": "LT", "name": "Lithuania", "price_multiplier": 0.5, "voice_supported": False, "region": "Europe", "tier": "Economy"},
-        {"code": "LV", "name": "Latvia", "price_multiplier": 0.5, "voice_supported": False, "region": "Europe", "tier": "Economy"},
-        {"code": "EE", "name": "Estonia", "price_multiplier": 0.5, "voice_supported": False, "region": "Europe", "tier": "Economy"},
+        {"code": "GB", "name": "United Kingdom", "region": "Europe"},
+        {"code": "DE", "name": "Germany", "region": "Europe"},
+        {"code": "FR", "name": "France", "region": "Europe"},
+        {"code": "NL", "name": "Netherlands", "region": "Europe"},
+        {"code": "CH", "name": "Switzerland", "region": "Europe"},
+        {"code": "AT", "name": "Austria", "region": "Europe"},
+        {"code": "BE", "name": "Belgium", "region": "Europe"},
+        {"code": "IE", "name": "Ireland", "region": "Europe"},
+        {"code": "LU", "name": "Luxembourg", "region": "Europe"},
+        {"code": "SE", "name": "Sweden", "region": "Europe"},
+        {"code": "NO", "name": "Norway", "region": "Europe"},
+        {"code": "FI", "name": "Finland", "region": "Europe"},
+        {"code": "DK", "name": "Denmark", "region": "Europe"},
+        {"code": "IS", "name": "Iceland", "region": "Europe"},
+        {"code": "IT", "name": "Italy", "region": "Europe"},
+        {"code": "ES", "name": "Spain", "region": "Europe"},
+        {"code": "PT", "name": "Portugal", "region": "Europe"},
+        {"code": "MT", "name": "Malta", "region": "Europe"},
+        {"code": "CY", "name": "Cyprus", "region": "Europe"},
+        {"code": "PL", "name": "Poland", "region": "Europe"},
+        {"code": "CZ", "name": "Czech Republic", "region": "Europe"},
+        {"code": "HU", "name": "Hungary", "region": "Europe"},
+        {"code": "RO", "name": "Romania", "region": "Europe"},
+        {"code": "BG", "name": "Bulgaria", "region": "Europe"},
+        {"code": "HR", "name": "Croatia", "region": "Europe"},
+        {"code": "SI", "name": "Slovenia", "region": "Europe"},
+        {"code": "SK", "name": "Slovakia", "region": "Europe"},
+        {"code": "LT", "name": "Lithuania", "region": "Europe"},
+        {"code": "LV", "name": "Latvia", "region": "Europe"},
+        {"code": "EE", "name": "Estonia", "region": "Europe"},
         
         # Asia-Pacific (16 countries)
-        {"code": "JP", "name": "Japan", "price_multiplier": 1.5, "voice_supported": True, "region": "Asia-Pacific", "tier": "Premium"},
-        {"code": "KR", "name": "South Korea", "price_multiplier": 1.2, "voice_supported": True, "region": "Asia-Pacific", "tier": "Premium"},
-        {"code": "SG", "name": "Singapore", "price_multiplier": 1.3, "voice_supported": True, "region": "Asia-Pacific", "tier": "Premium"},
-        {"code": "AU", "name": "Australia", "price_multiplier": 1.4, "voice_supported": True, "region": "Asia-Pacific", "tier": "Premium"},
-        {"code": "HK", "name": "Hong Kong", "price_multiplier": 1.0, "voice_supported": True, "region": "Asia-Pacific", "tier": "Standard"},
-        {"code": "TW", "name": "Taiwan", "price_multiplier": 0.8, "voice_supported": False, "region": "Asia-Pacific", "tier": "Standard"},
-        {"code": "MY", "name": "Malaysia", "price_multiplier": 0.5, "voice_supported": False, "region": "Asia-Pacific", "tier": "Economy"},
-        {"code": "TH", "name": "Thailand", "price_multiplier": 0.4, "voice_supported": False, "region": "Asia-Pacific", "tier": "Economy"},
-        {"code": "PH", "name": "Philippines", "price_multiplier": 0.3, "voice_supported": False, "region": "Asia-Pacific", "tier": "Economy"},
-        {"code": "ID", "name": "Indonesia", "price_multiplier": 0.3, "voice_supported": False, "region": "Asia-Pacific", "tier": "Economy"},
-        {"code": "VN", "name": "Vietnam", "price_multiplier": 0.3, "voice_supported": False, "region": "Asia-Pacific", "tier": "Economy"},
-        {"code": "IN", "name": "India", "price_multiplier": 0.2, "voice_supported": False, "region": "Asia-Pacific", "tier": "Economy"},
-        {"code": "BD", "name": "Bangladesh", "price_multiplier": 0.2, "voice_supported": False, "region": "Asia-Pacific", "tier": "Economy"},
-        {"code": "PK", "name": "Pakistan", "price_multiplier": 0.2, "voice_supported": False, "region": "Asia-Pacific", "tier": "Economy"},
-        {"code": "LK", "name": "Sri Lanka", "price_multiplier": 0.2, "voice_supported": False, "region": "Asia-Pacific", "tier": "Economy"},
-        {"code": "NP", "name": "Nepal", "price_multiplier": 0.2, "voice_supported": False, "region": "Asia-Pacific", "tier": "Economy"},
-        {"code": "CN", "name": "China", "price_multiplier": 0.8, "voice_supported": False, "region": "Asia-Pacific", "tier": "Standard"},
+        {"code": "JP", "name": "Japan", "region": "Asia-Pacific"},
+        {"code": "KR", "name": "South Korea", "region": "Asia-Pacific"},
+        {"code": "SG", "name": "Singapore", "region": "Asia-Pacific"},
+        {"code": "AU", "name": "Australia", "region": "Asia-Pacific"},
+        {"code": "HK", "name": "Hong Kong", "region": "Asia-Pacific"},
+        {"code": "TW", "name": "Taiwan", "region": "Asia-Pacific"},
+        {"code": "MY", "name": "Malaysia", "region": "Asia-Pacific"},
+        {"code": "TH", "name": "Thailand", "region": "Asia-Pacific"},
+        {"code": "PH", "name": "Philippines", "region": "Asia-Pacific"},
+        {"code": "ID", "name": "Indonesia", "region": "Asia-Pacific"},
+        {"code": "VN", "name": "Vietnam", "region": "Asia-Pacific"},
+        {"code": "IN", "name": "India", "region": "Asia-Pacific"},
+        {"code": "BD", "name": "Bangladesh", "region": "Asia-Pacific"},
+        {"code": "PK", "name": "Pakistan", "region": "Asia-Pacific"},
+        {"code": "LK", "name": "Sri Lanka", "region": "Asia-Pacific"},
+        {"code": "NP", "name": "Nepal", "region": "Asia-Pacific"},
+        {"code": "CN", "name": "China", "region": "Asia-Pacific"},
         
         # Latin America (11 countries)
-        {"code": "BR", "name": "Brazil", "price_multiplier": 0.4, "voice_supported": True, "region": "Latin America", "tier": "Economy"},
-        {"code": "AR", "name": "Argentina", "price_multiplier": 0.3, "voice_supported": False, "region": "Latin America", "tier": "Economy"},
-        {"code": "CO", "name": "Colombia", "price_multiplier": 0.3, "voice_supported": False, "region": "Latin America", "tier": "Economy"},
-        {"code": "PE", "name": "Peru", "price_multiplier": 0.3, "voice_supported": False, "region": "Latin America", "tier": "Economy"},
-        {"code": "CL", "name": "Chile", "price_multiplier": 0.4, "voice_supported": False, "region": "Latin America", "tier": "Economy"},
-        {"code": "UY", "name": "Uruguay", "price_multiplier": 0.4, "voice_supported": False, "region": "Latin America", "tier": "Economy"},
-        {"code": "PY", "name": "Paraguay", "price_multiplier": 0.3, "voice_supported": False, "region": "Latin America", "tier": "Economy"},
-        {"code": "BO", "name": "Bolivia", "price_multiplier": 0.3, "voice_supported": False, "region": "Latin America", "tier": "Economy"},
-        {"code": "EC", "name": "Ecuador", "price_multiplier": 0.3, "voice_supported": False, "region": "Latin America", "tier": "Economy"},
-        {"code": "VE", "name": "Venezuela", "price_multiplier": 0.3, "voice_supported": False, "region": "Latin America", "tier": "Economy"},
+        {"code": "BR", "name": "Brazil", "region": "Latin America"},
+        {"code": "AR", "name": "Argentina", "region": "Latin America"},
+        {"code": "CO", "name": "Colombia", "region": "Latin America"},
+        {"code": "PE", "name": "Peru", "region": "Latin America"},
+        {"code": "CL", "name": "Chile", "region": "Latin America"},
+        {"code": "UY", "name": "Uruguay", "region": "Latin America"},
+        {"code": "PY", "name": "Paraguay", "region": "Latin America"},
+        {"code": "BO", "name": "Bolivia", "region": "Latin America"},
+        {"code": "EC", "name": "Ecuador", "region": "Latin America"},
+        {"code": "VE", "name": "Venezuela", "region": "Latin America"},
         
         # Middle East & Africa (11 countries)
-        {"code": "ZA", "name": "South Africa", "price_multiplier": 0.5, "voice_supported": True, "region": "Middle East & Africa", "tier": "Economy"},
-        {"code": "NG", "name": "Nigeria", "price_multiplier": 0.3, "voice_supported": False, "region": "Middle East & Africa", "tier": "Economy"},
-        {"code": "KE", "name": "Kenya", "price_multiplier": 0.3, "voice_supported": False, "region": "Middle East & Africa", "tier": "Economy"},
-        {"code": "GH", "name": "Ghana", "price_multiplier": 0.3, "voice_supported": False, "region": "Middle East & Africa", "tier": "Economy"},
-        {"code": "EG", "name": "Egypt", "price_multiplier": 0.4, "voice_supported": False, "region": "Middle East & Africa", "tier": "Economy"},
-        {"code": "MA", "name": "Morocco", "price_multiplier": 0.4, "voice_supported": False, "region": "Middle East & Africa", "tier": "Economy"},
-        {"code": "TN", "name": "Tunisia", "price_multiplier": 0.4, "voice_supported": False, "region": "Middle East & Africa", "tier": "Economy"},
-        {"code": "DZ", "name": "Algeria", "price_multiplier": 0.4, "voice_supported": False, "region": "Middle East & Africa", "tier": "Economy"},
-        {"code": "AE", "name": "United Arab Emirates", "price_multiplier": 0.8, "voice_supported": True, "region": "Middle East & Africa", "tier": "Standard"},
-        {"code": "SA", "name": "Saudi Arabia", "price_multiplier": 0.6, "voice_supported": True, "region": "Middle East & Africa", "tier": "Economy"},
-        {"code": "IL", "name": "Israel", "price_multiplier": 1.0, "voice_supported": True, "region": "Middle East & Africa", "tier": "Standard"},
-        {"code": "QA", "name": "Qatar", "price_multiplier": 0.8, "voice_supported": False, "region": "Middle East & Africa", "tier": "Standard"},
-        {"code": "KW", "name": "Kuwait", "price_multiplier": 0.7, "voice_supported": False, "region": "Middle East & Africa", "tier": "Economy"},
-        {"code": "BH", "name": "Bahrain", "price_multiplier": 0.7, "voice_supported": False, "region": "Middle East & Africa", "tier": "Economy"},
-        {"code": "OM", "name": "Oman", "price_multiplier": 0.6, "voice_supported": False, "region": "Middle East & Africa", "tier": "Economy"},
-        {"code": "JO", "name": "Jordan", "price_multiplier": 0.5, "voice_supported": False, "region": "Middle East & Africa", "tier": "Economy"},
-        {"code": "LB", "name": "Lebanon", "price_multiplier": 0.5, "voice_supported": False, "region": "Middle East & Africa", "tier": "Economy"},
-        {"code": "IQ", "name": "Iraq", "price_multiplier": 0.4, "voice_supported": False, "region": "Middle East & Africa", "tier": "Economy"},
+        {"code": "ZA", "name": "South Africa", "region": "Middle East & Africa"},
+        {"code": "NG", "name": "Nigeria", "region": "Middle East & Africa"},
+        {"code": "KE", "name": "Kenya", "region": "Middle East & Africa"},
+        {"code": "GH", "name": "Ghana", "region": "Middle East & Africa"},
+        {"code": "EG", "name": "Egypt", "region": "Middle East & Africa"},
+        {"code": "MA", "name": "Morocco", "region": "Middle East & Africa"},
+        {"code": "TN", "name": "Tunisia", "region": "Middle East & Africa"},
+        {"code": "DZ", "name": "Algeria", "region": "Middle East & Africa"},
+        {"code": "AE", "name": "United Arab Emirates", "region": "Middle East & Africa"},
+        {"code": "SA", "name": "Saudi Arabia", "region": "Middle East & Africa"},
+        {"code": "IL", "name": "Israel", "region": "Middle East & Africa"},
+        {"code": "QA", "name": "Qatar", "region": "Middle East & Africa"},
+        {"code": "KW", "name": "Kuwait", "region": "Middle East & Africa"},
+        {"code": "BH", "name": "Bahrain", "region": "Middle East & Africa"},
+        {"code": "OM", "name": "Oman", "region": "Middle East & Africa"},
+        {"code": "JO", "name": "Jordan", "region": "Middle East & Africa"},
+        {"code": "LB", "name": "Lebanon", "region": "Middle East & Africa"},
+        {"code": "IQ", "name": "Iraq", "region": "Middle East & Africa"},
         
         # CIS (5 countries)
-        {"code": "RU", "name": "Russia", "price_multiplier": 0.5, "voice_supported": True, "region": "CIS", "tier": "Economy"},
-        {"code": "UA", "name": "Ukraine", "price_multiplier": 0.4, "voice_supported": False, "region": "CIS", "tier": "Economy"},
-        {"code": "BY", "name": "Belarus", "price_multiplier": 0.4, "voice_supported": False, "region": "CIS", "tier": "Economy"},
-        {"code": "KZ", "name": "Kazakhstan", "price_multiplier": 0.4, "voice_supported": False, "region": "CIS", "tier": "Economy"},
-        {"code": "UZ", "name": "Uzbekistan", "price_multiplier": 0.3, "voice_supported": False, "region": "CIS", "tier": "Economy"},
-        {"code": "TR", "name": "Turkey", "price_multiplier": 0.5, "voice_supported": True, "region": "CIS", "tier": "Economy"},
+        {"code": "RU", "name": "Russia", "region": "CIS"},
+        {"code": "UA", "name": "Ukraine", "region": "CIS"},
+        {"code": "BY", "name": "Belarus", "region": "CIS"},
+        {"code": "KZ", "name": "Kazakhstan", "region": "CIS"},
+        {"code": "UZ", "name": "Uzbekistan", "region": "CIS"},
+        {"code": "TR", "name": "Turkey", "region": "CIS"},
     ]
     
     return countries
 
 def get_country_region(country_code: str) -> str:
     """Get region for country code."""
-    countries = get_textverified_countries()
-    for country in countries:
-        if country["code"] == country_code:
-            return country["region"]
-    return "Other"
-
-def get_pricing_tier(multiplier: float) -> str:
-    """Get pricing tier based on multiplier."""
-    if multiplier >= 1.2:
-        return "Premium"
-    elif multiplier >= 0.8:
-        return "Standard"
-    else:
-        return "Economy"
+    country = get_country_catalog().by_code.get(country_code)
+    return country["region"] if country else "Other"
 
 def get_regions_summary(countries: List[Dict]) -> Dict[str, int]:
     """Get summary of countries per region."""
@@ -252,3 +306,8 @@ def get_success_rate(country_code: str) -> float:
     else:
         return 95.0
 
+
+
+
+# Built once at import; rebuilt via reload_country_catalog() when pricing reloads
+country_catalog = build_country_catalog()
@@ -1,30 +1,26 @@
 """Services API router for TextVerified integration."""
-from fastapi import APIRouter, HTTPException
-from app.services.textverified_service import TextVerifiedService
+from typing import Optional
+from fastapi import APIRouter, Header, Response
+from app.core.caching import etag_matches
+from app.services.service_catalog import service_catalog
 
 router = APIRouter(prefix="/verify", tags=["Services"])
 
-@router.get("/services")
-async def get_available_services():
-    """Get available services from TextVerified."""
-    textverified = TextVerifiedService()
-    result = await textverified.get_services()
-    
-    if "error" in result:
-        raise HTTPException(status_code=503, detail=result["error"])
-    
-    # Format services for frontend
-    services = result.get("services", [])
-    formatted_services = []
+# Browsers and proxies may reuse the catalog briefly, then must revalidate
+CATALOG_CACHE_CONTROL = "public, max-age=60, must-revalidate"
+
+
+async def catalog_response(if_none_match: Optional[str] = None) -> Response:
+    """Serve the cached catalog bytes, or 304 when the client copy is current."""
+    snapshot = await service_catalog.get()
+    headers = {"ETag": snapshot.etag, "Cache-Control": CATALOG_CACHE_CONTROL}
     
-    for service in services:
-        if isinstance(service, dict):
-            formatted_services.append({
-                "id": service.get("id"),
-                "name": service.get("name", "").lower(),
-                "display_name": service.get("name", ""),
-                "price": service.get("price", 0.50),
-                "available": True
-            })
+    if etag_matches(if_none_match, snapshot.etag):
+        return Response(status_code=304, headers=headers)
     
-    return {"services": formatted_services}
\ No newline at end of file
+    return Response(content=snapshot.body, media_type="application/json", headers=headers)
+
+@router.get("/services")
+async def get_available_services(if_none_match: Optional[str] = Header(None)):
+    """Get available services from TextVerified."""
+    return await catalog_response(if_none_match)
@@ -1,14 +1,16 @@
 """System API router for health checks and service status."""
 from datetime import datetime, timezone
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, Query, Request
 from fastapi.templating import Jinja2Templates
 from fastapi.responses import HTMLResponse
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
 from app.core.config import settings
-from app.core.health_checks import check_system_health, check_database_health
+from app.core.dependencies import get_admin_user_id
+from app.core.loop_profiler import loop_profiler
 from app.core.monitoring import dashboard_metrics
+from app.core.system_sampler import system_sampler
 from app.schemas import ServiceStatusSummary, ServiceStatus
 
 router = APIRouter(prefix="/system", tags=["System"])
@@ -18,20 +20,20 @@ root_router = APIRouter()
 
 
 @router.get("/health")
-async def health_check(db: Session = Depends(get_db)):
+async def health_check():
     """Comprehensive health check with external service monitoring."""
     from app.core.health_monitor import health_monitor
     
     try:
         system_health = await health_monitor.get_system_health()
-        health_data = check_system_health(db)
+        snapshot = system_sampler.snapshot
         
         return {
             "status": system_health["status"],
             "timestamp": datetime.now(timezone.utc).isoformat(),
             "version": "2.4.0",
             "environment": settings.environment,
-            "database": health_data.get("database", "connected"),
+            "database": snapshot.database["status"] if snapshot else "unknown",
             "services": system_health["services"],
             "summary": system_health["summary"]
         }
@@ -44,15 +46,17 @@ async def health_check(db: Session = Depends(get_db)):
 
 
 @router.get("/health/readiness")
-async def readiness_check(db: Session = Depends(get_db)):
-    """Kubernetes readiness probe."""
+async def readiness_check():
+    """Kubernetes readiness probe, answered from the latest system sample."""
     from fastapi.responses import JSONResponse
     
-    try:
-        db_health = check_database_health(db)
-        is_ready = db_health["status"] == "healthy"
-    except Exception:
-        is_ready = False
+    # A sample older than a few intervals means the sampler has stalled
+    snapshot = system_sampler.snapshot
+    is_ready = (
+        snapshot is not None
+        and snapshot.database["status"] == "healthy"
+        and snapshot.age < 3 * system_sampler.interval
+    )
     
     status_code = 200 if is_ready else 503
     return JSONResponse(
@@ -223,13 +227,32 @@ async def get_prometheus_metrics():
 async def get_application_metrics():
     """Get application-specific metrics."""
     from app.core.metrics import metrics_collector
+    from app.services.textverified_client import textverified_client
     
     app_metrics = metrics_collector.get_application_metrics()
     health_score = metrics_collector.get_health_score()
     
+    snapshot = system_sampler.snapshot
+    
     return {
         "application": app_metrics,
         "health": health_score,
+        "system": snapshot.to_dict() if snapshot else None,
+        "upstream_coalescing": textverified_client.get_coalescing_stats(),
+        "timestamp": datetime.now(timezone.utc).isoformat()
+    }
+
+
+@router.get("/debug/slow-callbacks")
+async def get_slow_callbacks(
+    limit: int = Query(50, ge=1, le=100),
+    admin_id: str = Depends(get_admin_user_id)
+):
+    """Recent event-loop stalls with the blocking stack and route (admin only)."""
+    return {
+        "enabled": loop_profiler.running,
+        "threshold_seconds": loop_profiler.threshold,
+        "events": [event.to_dict() for event in loop_profiler.recent(limit)],
         "timestamp": datetime.now(timezone.utc).isoformat()
     }
 
@@ -1,60 +1,80 @@
 """Verification API router for SMS/voice verification and number rentals."""
+import asyncio
+import json
 from typing import List, Optional
 from datetime import datetime, timezone, timedelta
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.database import get_db
+from app.core.database import get_db, get_async_db
 from app.core.dependencies import get_current_user_id
 from app.services.textverified_service import TextVerifiedService
-from app.models.user import User
+from app.services.sms_polling_service import polling_service
+from app.services.pricing_engine import pricing_engine
+from app.services.credit_ledger import CreditLedger, verification_refund_key
+from app.services.daily_stats import record_status_changes
+from app.services.verification_reservations import ACTIVE_STATUSES, verification_reservations
+from app.api.websocket import manager as update_manager, StreamSubscriber
+from app.api.services import catalog_response
 from app.models.verification import Verification, NumberRental
 from app.schemas import (
     VerificationCreate, VerificationResponse,
     NumberRentalRequest, NumberRentalResponse, ExtendRentalRequest,
     RetryVerificationRequest, VerificationHistoryResponse,
-    SuccessResponse
+    QuoteRequest, QuoteListResponse, SuccessResponse
 )
 from app.core.security_hardening import validate_and_sanitize_service_data
-from app.core.exceptions import InsufficientCreditsError, ExternalServiceError
+from app.utils.pagination import capped_count, encode_cursor, keyset_page
+from app.core.exceptions import InsufficientCreditsError, ExternalServiceError, ValidationError
 
 router = APIRouter(prefix="/verify", tags=["Verification"])
 
+# Server-Sent Events settings
+SSE_HEARTBEAT_INTERVAL = 15  # seconds
+SSE_RETRY_MS = 3000
+TERMINAL_STATUSES = {"completed", "timeout", "cancelled", "failed"}
+
+
+def _sse_frame(event: str, data: dict, event_id: Optional[int] = None) -> str:
+    """Encode one Server-Sent Events frame."""
+    frame = f"id: {event_id}\n" if event_id is not None else ""
+    return frame + f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _state_version(verification: Verification) -> int:
+    """Millisecond timestamp of the last state change, used as the SSE event id."""
+    changed_at = verification.updated_at or verification.created_at
+    if changed_at.tzinfo is None:
+        changed_at = changed_at.replace(tzinfo=timezone.utc)
+    return int(changed_at.timestamp() * 1000)
+
 
 @router.get("/services")
-async def get_available_services():
+async def get_available_services(if_none_match: Optional[str] = Header(None)):
     """Get available SMS verification services."""
-    try:
-        textverified = TextVerifiedService()
-        result = await textverified.get_services()
-        return result
-    except ValueError as e:
-        # Return fallback services if API key issues
-        return {
-            "services": [
-                {"name": "telegram", "price": 0.75, "voice_supported": True},
-                {"name": "whatsapp", "price": 0.75, "voice_supported": True},
-                {"name": "discord", "price": 0.75, "voice_supported": True},
-                {"name": "google", "price": 0.75, "voice_supported": True},
-                {"name": "instagram", "price": 1.00, "voice_supported": True},
-                {"name": "twitter", "price": 1.00, "voice_supported": True}
-            ]
-        }
-    except Exception as e:
-        return {
-            "error": f"Failed to fetch services: {str(e)}",
-            "services": [
-                {"name": "telegram", "price": 0.75, "voice_supported": True},
-                {"name": "whatsapp", "price": 0.75, "voice_supported": True}
-            ]
-        }
+    return await catalog_response(if_none_match)
+
+
+@router.post("/quote", response_model=QuoteListResponse)
+async def quote_prices(quote_request: QuoteRequest):
+    """Price many service/country/capability combinations in one call."""
+    quotes = pricing_engine.quote_many([
+        (item.service_name, item.country, item.capability) for item in quote_request.items
+    ])
+    
+    return QuoteListResponse(
+        quotes=[quote.to_dict() for quote in quotes],
+        total_price=sum(quote.price for quote in quotes if quote.price is not None)
+    )
 
 
 @router.post("/create", response_model=VerificationResponse, status_code=status.HTTP_201_CREATED)
 async def create_verification(
     verification_data: VerificationCreate,
-    user_id: str = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
+    user_id: str = Depends(get_current_user_id)
 ):
     """Create new SMS or voice verification."""
     # Get capability from request data
@@ -68,12 +88,28 @@ async def create_verification(
         'country': country
     })
     
-    # Get user and check credits
-    current_user = db.query(User).filter(User.id == user_id).first()
-    if not current_user:
+    quote = pricing_engine.quote(verification_data.service_name, country, capability)
+    if not quote.available:
+        raise HTTPException(status_code=400, detail=f"Voice verification not supported in {country}")
+    
+    # Phase 1: charge and record the reservation in one short transaction
+    try:
+        verification = await verification_reservations.reserve(
+            user_id,
+            verification_data.service_name,
+            capability,
+            country,
+            quote.price,
+            requested_carrier=getattr(verification_data, 'carrier', None) if capability == "voice" else None,
+            requested_area_code=getattr(verification_data, 'area_code', None) if capability == "voice" else None
+        )
+    except InsufficientCreditsError as e:
+        raise HTTPException(status_code=402, detail=e.message)
+    except ValidationError:
         raise HTTPException(status_code=404, detail="User not found")
     
-    # Get service pricing with error handling
+    # Phase 2: buy the number with no database session held; a missing API key
+    # fails here too, so every failure releases the reservation
     try:
         textverified = TextVerifiedService()
         verification_result = await textverified.create_verification(
@@ -81,59 +117,31 @@ async def create_verification(
             country,
             capability
         )
-        
-        if "error" in verification_result:
-            raise HTTPException(status_code=400, detail=verification_result["error"])
-            
     except ValueError as e:
+        await verification_reservations.release(verification.id)
         # Handle API key issues
         if "API key" in str(e):
             raise HTTPException(status_code=503, detail="Service temporarily unavailable. Please try again later.")
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
+        await verification_reservations.release(verification.id)
         raise HTTPException(status_code=503, detail=f"External service error: {str(e)}")
     
-    cost = verification_result["cost"]
+    if "error" in verification_result:
+        await verification_reservations.release(verification.id)
+        raise HTTPException(status_code=400, detail=verification_result["error"])
     
-    # Check if user has sufficient credits or free verifications
-    if current_user.free_verifications > 0:
-        current_user.free_verifications -= 1
-        cost = 0  # Free verification
-    elif current_user.credits >= cost:
-        current_user.credits -= cost
-    else:
-        raise HTTPException(status_code=402, detail=f"Insufficient credits. Need ${cost:.2f}, have ${current_user.credits:.2f}")
-    
-    # Phone number and service details already obtained from create_verification
-    phone_number = verification_result["phone_number"]
+    # Phase 3: attach the number, unless the reaper already released the reservation
     number_id = verification_result["number_id"]
+    if not await verification_reservations.confirm(verification, verification_result["phone_number"], number_id):
+        try:
+            await textverified.cancel_number(number_id)
+        except Exception:
+            pass
+        raise HTTPException(status_code=503, detail="Verification reservation expired. Please try again.")
     
-    # Create verification record
-    verification = Verification(
-        user_id=user_id,
-        service_name=verification_data.service_name,
-        capability=capability,
-        status="pending",
-        cost=cost,
-        phone_number=phone_number
-    )
-    
-    # Store TextVerified number_id for polling
-    verification.verification_code = number_id
-    
-    # Store country information
-    verification.country = country
-    
-    # Store additional metadata for voice verifications
-    if capability == "voice":
-        verification.requested_carrier = getattr(verification_data, 'carrier', None)
-        verification.requested_area_code = getattr(verification_data, 'area_code', None)
-    
-    db.add(verification)
-    db.commit()
-    db.refresh(verification)
-    
-    # Frontend will handle polling
+    # Hand the number to the shared polling scheduler
+    await polling_service.start_polling(verification.id, number_id, capability)
     
     return {
         "id": verification.id,
@@ -142,18 +150,65 @@ async def create_verification(
         "capability": verification.capability,
         "status": verification.status,
         "cost": verification.cost,
-        "remaining_credits": current_user.credits,
-        "created_at": verification.created_at.isoformat()
+        "requested_carrier": verification.requested_carrier,
+        "requested_area_code": verification.requested_area_code,
+        "created_at": verification.created_at.isoformat(),
+        "completed_at": None
     }
 
 
+# Declared before /{verification_id}, which would otherwise capture "history"
+@router.get("/history", response_model=VerificationHistoryResponse)
+def get_verification_history(
+    user_id: str = Depends(get_current_user_id),
+    service: Optional[str] = Query(None, description="Filter by service name"),
+    verification_status: Optional[str] = Query(None, description="Filter by status"),
+    limit: int = Query(50, ge=1, le=100, description="Number of results"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    skip: int = Query(0, ge=0, description="Deprecated offset; ignored when cursor is given"),
+    include_total: bool = Query(True, description="Count matching rows (capped)"),
+    db: Session = Depends(get_db)
+):
+    """Get user's verification history with filtering, newest first."""
+    query = db.query(Verification).filter(Verification.user_id == user_id)
+    
+    if service:
+        query = query.filter(Verification.service_name == service)
+    if verification_status:
+        query = query.filter(Verification.status == verification_status)
+    
+    total, total_is_estimate = capped_count(query, Verification.id) if include_total else (None, False)
+    
+    if skip and not cursor:
+        # Legacy offset paging still scans every skipped row
+        verifications = query.order_by(
+            Verification.created_at.desc(), Verification.id.desc()
+        ).offset(skip).limit(limit).all()
+        next_cursor = None
+        if len(verifications) == limit:
+            last = verifications[-1]
+            next_cursor = encode_cursor(last.created_at, last.id)
+    else:
+        try:
+            verifications, next_cursor = keyset_page(query, Verification.created_at, Verification.id, cursor, limit)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    return VerificationHistoryResponse(
+        verifications=[VerificationResponse.from_orm(v) for v in verifications],
+        total_count=total,
+        total_count_is_estimate=total_is_estimate,
+        next_cursor=next_cursor
+    )
+
+
 @router.get("/{verification_id}", response_model=VerificationResponse)
 async def get_verification_status(
     verification_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get verification status (no auth required for public access)."""
-    verification = db.query(Verification).filter(Verification.id == verification_id).first()
+    verification = await db.get(Verification, verification_id)
     
     if not verification:
         raise HTTPException(status_code=404, detail="Verification not found")
@@ -168,7 +223,7 @@ async def get_verification_status(
         if verification.status == "pending" and new_status == "completed":
             verification.status = "completed"
             verification.completed_at = datetime.now(timezone.utc)
-            db.commit()
+            await db.commit()
             
             # Send success notification
             return VerificationResponse.from_orm(verification)
@@ -181,10 +236,10 @@ async def get_verification_status(
 @router.get("/{verification_id}/messages")
 async def get_verification_messages(
     verification_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get SMS messages for verification (no auth required)."""
-    verification = db.query(Verification).filter(Verification.id == verification_id).first()
+    verification = await db.get(Verification, verification_id)
     
     if not verification:
         raise HTTPException(status_code=404, detail="Verification not found")
@@ -201,12 +256,12 @@ async def get_verification_messages(
             # Update verification status
             verification.status = "completed"
             verification.completed_at = datetime.now(timezone.utc)
-            db.commit()
+            await db.commit()
             
             return {"messages": [messages_result["sms"]], "status": "completed"}
         else:
             return {"messages": [], "status": verification.status}
-            
+    
     except Exception as e:
         return {"messages": [], "status": verification.status, "error": str(e)}
 
@@ -251,11 +306,78 @@ async def get_verification_voice(
             }
         else:
             return {"messages": [], "status": verification.status}
-            
+    
     except Exception as e:
         return {"messages": [], "status": verification.status, "error": str(e)}
 
 
+@router.get("/{verification_id}/stream")
+async def stream_verification(
+    verification_id: str,
+    last_event_id: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Stream verification status and messages as Server-Sent Events."""
+    # Subscribe before reading state so no update falls in between
+    subscriber = StreamSubscriber()
+    update_manager.subscribe(verification_id, subscriber)
+    
+    verification = await db.get(Verification, verification_id)
+    if not verification:
+        update_manager.disconnect(subscriber, verification_id)
+        raise HTTPException(status_code=404, detail="Verification not found")
+    
+    # Snapshot from the shared poll results; no per-client upstream calls
+    recent = polling_service.get_recent_result(verification_id) or {}
+    snapshot = {
+        "verification_id": verification.id,
+        "status": verification.status,
+        "capability": verification.capability,
+        "phone_number": verification.phone_number,
+        "messages": recent.get("messages", []) if recent.get("status") == verification.status else []
+    }
+    version = _state_version(verification)
+    resume_from = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+    
+    # The client already saw the final state; 204 stops EventSource reconnecting
+    if snapshot["status"] in TERMINAL_STATUSES and resume_from is not None and version <= resume_from:
+        update_manager.disconnect(subscriber, verification_id)
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+    
+    async def event_stream():
+        try:
+            yield f"retry: {SSE_RETRY_MS}\n\n"
+            
+            # Resumed clients only get the snapshot if the state moved on
+            if resume_from is None or version > resume_from:
+                yield _sse_frame("status", snapshot, version)
+            if snapshot["status"] in TERMINAL_STATUSES:
+                return
+            
+            while True:
+                try:
+                    payload = await asyncio.wait_for(subscriber.queue.get(), timeout=SSE_HEARTBEAT_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+                
+                if payload is None:
+                    return  # fell behind; the client resumes with Last-Event-ID
+                
+                update = json.loads(payload)
+                yield _sse_frame("status", update, update.get("event_id"))
+                if update.get("status") in TERMINAL_STATUSES:
+                    return
+        finally:
+            update_manager.disconnect(subscriber, verification_id)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.post("/{verification_id}/retry", response_model=VerificationResponse)
 async def retry_verification(
     verification_id: str,
@@ -282,14 +404,14 @@ async def retry_verification(
             db.commit()
             db.refresh(verification)
             return VerificationResponse.from_orm(verification)
-            
+        
         elif retry_data.retry_type == "same":
             # Retry with same number
             verification.status = "pending"
             db.commit()
             db.refresh(verification)
             return VerificationResponse.from_orm(verification)
-            
+        
         elif retry_data.retry_type == "new":
             # Cancel current and create new
             await textverified_service.cancel_verification(verification_id)
@@ -321,7 +443,7 @@ async def retry_verification(
         
         db.refresh(verification)
         return VerificationResponse.from_orm(verification)
-        
+    
     except Exception as e:
         raise HTTPException(status_code=503, detail=f"TextVerified service error: {str(e)}")
 
@@ -330,13 +452,13 @@ async def retry_verification(
 async def cancel_verification(
     verification_id: str,
     user_id: str = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Cancel verification and refund credits."""
-    verification = db.query(Verification).filter(
+    verification = await db.scalar(select(Verification).where(
         Verification.id == verification_id,
         Verification.user_id == user_id
-    ).first()
+    ))
     
     if not verification:
         raise HTTPException(status_code=404, detail="Verification not found")
@@ -344,6 +466,9 @@ async def cancel_verification(
     if verification.status == "cancelled":
         raise HTTPException(status_code=400, detail="Already cancelled")
     
+    # Release the connection while the upstream call runs
+    await db.commit()
+    
     # Cancel with TextVerified
     try:
         textverified_service = TextVerifiedService()
@@ -351,42 +476,37 @@ async def cancel_verification(
     except Exception:
         pass  # Continue with local cancellation even if API call fails
     
-    # Refund credits
-    current_user = db.query(User).filter(User.id == user_id).first()
-    current_user.credits += verification.cost
-    
-    verification.status = "cancelled"
-    db.commit()
+    # Only the request that flips the status refunds; the key also covers timeout refunds.
+    # The flip is conditional on the status last read, so the daily rollup knows what it left.
+    cancelled = None
+    while cancelled is None:
+        previous_status = await db.scalar(select(Verification.status).where(Verification.id == verification_id))
+        if previous_status in (None, "cancelled"):
+            raise HTTPException(status_code=400, detail="Already cancelled")
+        
+        cancelled = (await db.execute(
+            update(Verification)
+            .where(Verification.id == verification_id, Verification.status == previous_status)
+            .values(status="cancelled")
+            .returning(Verification.user_id, Verification.service_name, Verification.created_at, Verification.cost)
+        )).first()
+    await record_status_changes(db, [cancelled], previous_status, "cancelled")
+    
+    # A free verification that already ended got its free use back (or used it) then
+    entry = None
+    if cancelled.cost or previous_status in ACTIVE_STATUSES:
+        entry = await CreditLedger(db).return_verification(
+            user_id, verification_id, cancelled.cost,
+            f"Refund: cancelled verification {verification_id}"
+        )
+    await db.commit()
     
     return SuccessResponse(
         message="Verification cancelled and refunded",
-        data={"refunded": verification.cost, "new_balance": current_user.credits}
-    )
-
-
-@router.get("/history", response_model=VerificationHistoryResponse)
-def get_verification_history(
-    user_id: str = Depends(get_current_user_id),
-    service: Optional[str] = Query(None, description="Filter by service name"),
-    verification_status: Optional[str] = Query(None, description="Filter by status"),
-    limit: int = Query(50, le=100, description="Number of results"),
-    skip: int = Query(0, description="Number of results to skip"),
-    db: Session = Depends(get_db)
-):
-    """Get user's verification history with filtering."""
-    query = db.query(Verification).filter(Verification.user_id == user_id)
-    
-    if service:
-        query = query.filter(Verification.service_name == service)
-    if verification_status:
-        query = query.filter(Verification.status == verification_status)
-    
-    total = query.count()
-    verifications = query.order_by(Verification.created_at.desc()).offset(skip).limit(limit).all()
-    
-    return VerificationHistoryResponse(
-        verifications=[VerificationResponse.from_orm(v) for v in verifications],
-        total_count=total
+        data={
+            "refunded": 0 if entry is None or entry.replayed else entry.amount,
+            "new_balance": entry.balance if entry else None
+        }
     )
 
 
@@ -396,7 +516,8 @@ def get_verification_history(
 async def create_number_rental(
     rental_data: NumberRentalRequest,
     user_id: str = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
+    idempotency_key: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create long-term number rental."""
     # Calculate rental cost (simplified)
@@ -408,13 +529,13 @@ async def create_number_rental(
     
     total_cost = rental_data.duration_hours * hourly_rate
     
-    # Check user credits
-    current_user = db.query(User).filter(User.id == user_id).first()
-    if current_user.credits < total_cost:
-        raise InsufficientCreditsError(f"Insufficient credits. Need {total_cost}, have {current_user.credits}")
-    
-    # Deduct credits
-    current_user.credits -= total_cost
+    # Deduct credits; a repeated Idempotency-Key charges once
+    entry = await CreditLedger(db).debit(
+        user_id, total_cost, f"Number rental: {rental_data.duration_hours}h",
+        idempotency_key=f"rental:{user_id}:{idempotency_key}" if idempotency_key else None
+    )
+    if entry.replayed:
+        raise HTTPException(status_code=409, detail="A rental with this Idempotency-Key was already created")
     
     # Create rental (simplified - would integrate with TextVerified)
     
@@ -428,13 +549,11 @@ async def create_number_rental(
         status="active",
         started_at=datetime.now(timezone.utc),
         expires_at=datetime.now(timezone.utc) + timedelta(hours=rental_data.duration_hours),
-        auto_extend=rental_data.auto_extend,
-        available=False
+        auto_extend=rental_data.auto_extend
     )
     
     db.add(rental)
-    db.commit()
-    db.refresh(rental)
+    await db.commit()
     
     return NumberRentalResponse.from_orm(rental)
 
@@ -457,17 +576,18 @@ def get_user_rentals(
 
 
 @router.post("/rentals/{rental_id}/extend", response_model=NumberRentalResponse)
-def extend_rental(
+async def extend_rental(
     rental_id: str,
     extend_data: ExtendRentalRequest,
     user_id: str = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
+    idempotency_key: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Extend rental duration."""
-    rental = db.query(NumberRental).filter(
+    rental = await db.scalar(select(NumberRental).where(
         NumberRental.id == rental_id,
         NumberRental.user_id == user_id
-    ).first()
+    ))
     
     if not rental:
         raise HTTPException(status_code=404, detail="Rental not found")
@@ -479,18 +599,19 @@ def extend_rental(
     hourly_rate = rental.cost / rental.duration_hours
     extension_cost = extend_data.additional_hours * hourly_rate
     
-    # Check user credits
-    current_user = db.query(User).filter(User.id == user_id).first()
-    if current_user.credits < extension_cost:
-        raise InsufficientCreditsError(extension_cost, current_user.credits)
+    # Deduct credits; a repeated Idempotency-Key extends once
+    entry = await CreditLedger(db).debit(
+        user_id, extension_cost, f"Rental extension: {rental_id} +{extend_data.additional_hours}h",
+        idempotency_key=f"rental-extend:{rental_id}:{idempotency_key}" if idempotency_key else None
+    )
+    if entry.replayed:
+        return NumberRentalResponse.from_orm(rental)
     
     # Extend rental
-    current_user.credits -= extension_cost
     rental.duration_hours += extend_data.additional_hours
     rental.cost += extension_cost
     rental.expires_at += timedelta(hours=extend_data.additional_hours)
     
-    db.commit()
-    db.refresh(rental)
+    await db.commit()
     
     return NumberRentalResponse.from_orm(rental)
\ No newline at end of file
@@ -1,9 +1,11 @@
 """Wallet API router for payments and transactions."""
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.database import get_db
+from app.core.database import get_db, get_async_db
 from app.core.dependencies import get_current_user_id
 from app.services import get_payment_service
 from app.models.user import User
@@ -19,12 +21,14 @@ router = APIRouter(prefix="/wallet", tags=["Wallet"])
 
 
 @router.get("/balance", response_model=WalletBalanceResponse)
-def get_wallet_balance(
+async def get_wallet_balance(
     user_id: str = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get current wallet balance."""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = (await db.execute(
+        select(User.credits, User.free_verifications).where(User.id == user_id)
+    )).first()
     
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -1,25 +1,71 @@
 """WebSocket endpoint for real-time verification updates."""
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from typing import Dict, Set
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
+from typing import Dict, Optional, Set
 import json
 import asyncio
+import uuid
+
+from app.core.caching import cache
+from app.core.database import SessionLocal
+from app.core.logging import get_logger
+from app.core.principal_cache import Principal, resolve_principal_async
+from app.models.verification import Verification
+from app.utils.security import verify_token
 
 router = APIRouter()
+logger = get_logger(__name__)
+
+# Redis channel used to fan updates out to every worker
+UPDATES_CHANNEL = "verification_updates"
+
+# Seconds a client without ?token= has to send {"type": "auth", "token": ...}
+AUTH_TIMEOUT = 10
+
+class StreamSubscriber:
+    """Queue-backed subscriber for non-WebSocket streams such as SSE.
+    
+    A consumer that falls ``max_queue`` updates behind gets ``None`` in
+    place of its backlog and should close, so the client reconnects and
+    resynchronises from a fresh snapshot.
+    """
+    
+    def __init__(self, max_queue: int = 16):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue + 1)  # room for the overflow marker
+        self.max_queue = max_queue
+        self.overflowed = False
+    
+    async def send_text(self, payload: str):
+        """Buffer an update for the stream consumer."""
+        if self.overflowed:
+            return
+        if self.queue.qsize() >= self.max_queue:
+            # Too far behind; drop the backlog rather than silently stalling
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+            self.overflowed = True
+            return
+        self.queue.put_nowait(payload)
 
 class ConnectionManager:
     """Manage WebSocket connections for real-time updates."""
     
     def __init__(self):
-        self.active_connections: Dict[str, Set[WebSocket]] = {}
+        self.active_connections: Dict[str, Set] = {}
+        self.instance_id = uuid.uuid4().hex
+        self._fanout_task: Optional[asyncio.Task] = None
     
     async def connect(self, websocket: WebSocket, verification_id: str):
         """Connect client to verification updates."""
         await websocket.accept()
-        
+        self.subscribe(verification_id, websocket)
+    
+    def subscribe(self, verification_id: str, connection):
+        """Register any object with an async send_text() for updates."""
         if verification_id not in self.active_connections:
             self.active_connections[verification_id] = set()
         
-        self.active_connections[verification_id].add(websocket)
+        self.active_connections[verification_id].add(connection)
     
     def disconnect(self, websocket: WebSocket, verification_id: str):
         """Disconnect client."""
@@ -32,29 +78,154 @@ class ConnectionManager:
     async def send_update(self, verification_id: str, message: dict):
         """Send update to all connected clients for a verification."""
         if verification_id in self.active_connections:
+            payload = json.dumps(message, default=str)
             disconnected = set()
             
-            for connection in self.active_connections[verification_id]:
+            for connection in list(self.active_connections[verification_id]):
                 try:
-                    await connection.send_text(json.dumps(message))
-                except:
+                    await connection.send_text(payload)
+                except Exception:
                     disconnected.add(connection)
             
             # Clean up disconnected clients
             for connection in disconnected:
-                self.active_connections[verification_id].discard(connection)
+                self.disconnect(connection, verification_id)
+    
+    async def publish(self, verification_id: str, message: dict):
+        """Deliver an update locally and to sockets held by other workers."""
+        await self.send_update(verification_id, message)
+        
+        try:
+            await cache.connect()
+            await cache.redis_client.publish(UPDATES_CHANNEL, json.dumps({
+                "origin": self.instance_id,
+                "verification_id": verification_id,
+                "message": message
+            }, default=str))
+        except Exception as e:
+            logger.debug(f"Verification update fan-out unavailable: {e}")
+    
+    async def start_fanout(self):
+        """Start relaying updates published by other workers."""
+        if self._fanout_task is None or self._fanout_task.done():
+            self._fanout_task = asyncio.create_task(self._listen())
+    
+    async def stop_fanout(self):
+        """Stop the fan-out listener."""
+        if self._fanout_task is not None:
+            self._fanout_task.cancel()
+            await asyncio.gather(self._fanout_task, return_exceptions=True)
+            self._fanout_task = None
+    
+    async def _listen(self):
+        """Subscribe to the updates channel, reconnecting with backoff."""
+        retry_delay = 1
+        while True:
+            pubsub = None
+            try:
+                await cache.connect()
+                pubsub = cache.redis_client.pubsub()
+                await pubsub.subscribe(UPDATES_CHANNEL)
+                retry_delay = 1
+                
+                async for item in pubsub.listen():
+                    if item.get("type") != "message":
+                        continue
+                    
+                    data = json.loads(item["data"])
+                    if data.get("origin") == self.instance_id:
+                        continue
+                    
+                    await self.send_update(data["verification_id"], data["message"])
+            
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Verification update subscription lost, retrying in {retry_delay}s: {e}")
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, 60)
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.close()
+                    except Exception:
+                        pass
 
 manager = ConnectionManager()
 
+async def authenticate_websocket(websocket: WebSocket) -> Optional[Principal]:
+    """Active principal for the token in ?token= or the first message, or None."""
+    token = websocket.query_params.get("token")
+    if not token:
+        # Browsers cannot set headers on WebSockets, so the token may come first instead
+        try:
+            message = json.loads(await asyncio.wait_for(websocket.receive_text(), AUTH_TIMEOUT))
+        except (asyncio.TimeoutError, ValueError):
+            return None
+        token = message.get("token") if isinstance(message, dict) else None
+    
+    payload = verify_token(token) if isinstance(token, str) else None
+    if not payload:
+        return None
+    
+    principal = await resolve_principal_async(token, payload)
+    return principal if principal and principal.is_active else None
+
+def get_verification_state(verification_id: str, user_id: str) -> Optional[dict]:
+    """Load the current verification state for a (re)connecting owner."""
+    db = SessionLocal()
+    try:
+        verification = db.query(Verification).filter(
+            Verification.id == verification_id,
+            Verification.user_id == user_id
+        ).first()
+        if not verification:
+            return None
+        
+        return {
+            "type": "verification_state",
+            "verification_id": verification.id,
+            "status": verification.status,
+            "capability": verification.capability,
+            "phone_number": verification.phone_number,
+            "completed_at": verification.completed_at.isoformat() if verification.completed_at else None
+        }
+    finally:
+        db.close()
+
 @router.websocket("/ws/verification/{verification_id}")
 async def websocket_endpoint(websocket: WebSocket, verification_id: str):
     """WebSocket endpoint for verification updates."""
-    await manager.connect(websocket, verification_id)
+    await websocket.accept()
     
     try:
+        principal = await authenticate_websocket(websocket)
+        if principal is None:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Authentication required")
+            return
+        
+        # Other users' verifications look missing, as on the HTTP routes
+        state = await asyncio.to_thread(get_verification_state, verification_id, principal.user_id)
+        if state is None:
+            await websocket.send_text(json.dumps({
+                "type": "error",
+                "verification_id": verification_id,
+                "message": "Verification not found"
+            }))
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Verification not found")
+            return
+        
+        # Subscribe before sending the state, so no update falls between them
+        manager.subscribe(verification_id, websocket)
+        
+        # Send current state so reconnecting clients need no HTTP round-trip
+        await websocket.send_text(json.dumps(state))
+        
         while True:
             # Keep connection alive
             await websocket.receive_text()
-            
+    
     except WebSocketDisconnect:
+        pass
+    finally:
         manager.disconnect(websocket, verification_id)
\ No newline at end of file
@@ -0,0 +1,168 @@
+"""Two-tier cache of API key hashes to principals, including unknown keys."""
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict
+from typing import Optional, Tuple
+
+from app.core.caching import cache
+from app.core.database import AsyncSessionLocal
+from app.core.logging import get_logger
+from app.core.principal_cache import Principal, PrincipalCache, principal_columns, row_to_principal
+
+logger = get_logger(__name__)
+
+# Redis value for a key hash known not to match an active key
+_INVALID = {"invalid": True}
+
+
+class APIKeyCache:
+    """In-process and Redis cache keyed by API key hash.
+    
+    Valid keys map to a Principal; invalid keys are remembered too so that
+    repeated bad keys do not reach the database. The in-process tier keeps a
+    short TTL because revocations only clear it on the worker that handled
+    them; Redis is shared and cleared immediately.
+    """
+    
+    def __init__(
+        self,
+        ttl: float = 30.0,
+        redis_ttl: int = 300,
+        negative_ttl: float = 60.0,
+        max_size: int = 10000,
+        prefix: str = "apikey",
+        retry_interval: float = 30.0
+    ):
+        self.redis_ttl = redis_ttl
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+        self.prefix = prefix
+        self.retry_interval = retry_interval  # seconds before retrying Redis after a failure
+        self.local = PrincipalCache(ttl, max_size)
+        self._invalid: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._redis_down_until = 0.0
+    
+    async def get(self, key_hash: str) -> Tuple[bool, Optional[Principal]]:
+        """Return (hit, principal); a hit with no principal is a known bad key."""
+        self._loop = asyncio.get_running_loop()
+        
+        principal = self.local.get(key_hash)
+        if principal is not None:
+            return True, principal
+        if self._is_invalid(key_hash):
+            return True, None
+        
+        data = await self._redis_get(key_hash)
+        if data is None:
+            return False, None
+        if data.get("invalid"):
+            self._mark_invalid(key_hash)
+            return True, None
+        
+        principal = Principal(**data)
+        self.local.set(key_hash, principal)
+        return True, principal
+    
+    async def set(self, key_hash: str, principal: Principal):
+        """Cache a resolved key in both tiers."""
+        self._loop = asyncio.get_running_loop()
+        self.local.set(key_hash, principal)
+        await self._redis_set(key_hash, asdict(principal), self.redis_ttl)
+    
+    async def set_invalid(self, key_hash: str):
+        """Remember a key that matched nothing, for a shorter time."""
+        self._loop = asyncio.get_running_loop()
+        self._mark_invalid(key_hash)
+        await self._redis_set(key_hash, _INVALID, int(self.negative_ttl))
+    
+    def revoke(self, key_hash: str):
+        """Drop a key from both tiers; safe to call from sync code."""
+        self.local.invalidate_key(key_hash)
+        with self._lock:
+            self._invalid.pop(key_hash, None)
+        
+        coro = cache.delete(self._redis_key(key_hash))
+        try:
+            asyncio.get_running_loop().create_task(coro)
+            return
+        except RuntimeError:
+            pass
+        # Sync endpoints run in the threadpool; hand the delete to the app loop
+        if self._loop is not None and self._loop.is_running():
+            asyncio.run_coroutine_threadsafe(coro, self._loop)
+        else:
+            coro.close()
+    
+    def invalidate_user(self, user_id: str):
+        """Drop a user's keys from this worker, e.g. after suspension."""
+        self.local.invalidate_user(user_id)
+    
+    def _is_invalid(self, key_hash: str) -> bool:
+        """Check the in-process negative cache."""
+        with self._lock:
+            expires = self._invalid.get(key_hash)
+            if expires is None:
+                return False
+            if expires <= time.monotonic():
+                del self._invalid[key_hash]
+                return False
+            return True
+    
+    def _mark_invalid(self, key_hash: str):
+        """Add to the in-process negative cache, evicting the oldest when full."""
+        with self._lock:
+            self._invalid[key_hash] = time.monotonic() + self.negative_ttl
+            self._invalid.move_to_end(key_hash)
+            while len(self._invalid) > self.max_size:
+                self._invalid.popitem(last=False)
+    
+    def _redis_key(self, key_hash: str) -> str:
+        return f"{self.prefix}:{key_hash}"
+    
+    async def _redis_get(self, key_hash: str) -> Optional[dict]:
+        """Read the shared tier, skipping Redis for a while after a failure."""
+        if time.monotonic() < self._redis_down_until:
+            return None
+        try:
+            await cache.connect()
+            value = await cache.redis_client.get(self._redis_key(key_hash))
+            return json.loads(value) if value else None
+        except Exception as e:
+            self._redis_unavailable(e)
+            return None
+    
+    async def _redis_set(self, key_hash: str, value: dict, ttl: int):
+        """Write the shared tier unless Redis is known to be down."""
+        if time.monotonic() < self._redis_down_until:
+            return
+        try:
+            await cache.connect()
+            await cache.redis_client.setex(self._redis_key(key_hash), ttl, json.dumps(value))
+        except Exception as e:
+            self._redis_unavailable(e)
+    
+    def _redis_unavailable(self, error: Exception):
+        """Serve from the in-process tier alone until the retry interval passes."""
+        self._redis_down_until = time.monotonic() + self.retry_interval
+        logger.warning(f"API key cache skipping Redis: {error}")
+
+
+async def load_api_key_principal(key_hash: str) -> Optional[Principal]:
+    """Resolve an active key to its owner's authorization fields in one query."""
+    from app.models.user import APIKey, User
+    
+    query = principal_columns().join(APIKey, APIKey.user_id == User.id).where(
+        APIKey.key_hash == key_hash,
+        APIKey.is_active.is_(True)
+    )
+    async with AsyncSessionLocal() as db:
+        return row_to_principal((await db.execute(query)).first())
+
+
+# Global API key cache instance
+api_key_cache = APIKeyCache()
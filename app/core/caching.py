@@ -1,6 +1,11 @@
 """Caching layer implementation for task 12.2."""
+import asyncio
+import hashlib
 import json
-from typing import Any, Optional, Dict
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Hashable, Optional, Dict, Tuple
 import redis.asyncio as redis
 from app.core.config import settings
 
@@ -80,6 +85,101 @@ class CacheManager:
 cache = CacheManager()
 
 
+class SingleFlight:
+    """Coalesce concurrent identical async calls into one in-flight task."""
+    
+    def __init__(self, max_results: int = 1024):
+        self.max_results = max_results
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self._results: Dict[Hashable, Tuple[float, Any]] = {}
+        self.stats = Counter()
+    
+    async def do(
+        self,
+        key: Hashable,
+        func: Callable[[], Awaitable[Any]],
+        ttl: float = 0,
+        cacheable: Optional[Callable[[Any], bool]] = None,
+        on_hit: Optional[Callable[[str], None]] = None
+    ) -> Any:
+        """Run func once per key; concurrent callers share its result.
+        
+        With a ttl, results accepted by ``cacheable`` are also served to
+        callers arriving shortly after the call completed.
+        """
+        if ttl > 0:
+            cached = self._results.get(key)
+            if cached is not None and cached[0] > time.monotonic():
+                self._record("cache", on_hit)
+                return cached[1]
+        
+        task = self._in_flight.get(key)
+        if task is None:
+            self.stats["calls"] += 1
+            task = asyncio.ensure_future(self._run(key, func, ttl, cacheable))
+            self._in_flight[key] = task
+        else:
+            self._record("inflight", on_hit)
+        
+        # Shield so one cancelled caller does not cancel the shared call
+        return await asyncio.shield(task)
+    
+    async def _run(self, key: Hashable, func, ttl: float, cacheable) -> Any:
+        """Execute the shared call and optionally retain its result."""
+        try:
+            result = await func()
+            if ttl > 0 and (cacheable is None or cacheable(result)):
+                self._store(key, result, ttl)
+            return result
+        finally:
+            self._in_flight.pop(key, None)
+    
+    def _store(self, key: Hashable, result: Any, ttl: float):
+        """Store a short-lived result, pruning expired entries when full."""
+        now = time.monotonic()
+        if len(self._results) >= self.max_results:
+            self._results = {k: v for k, v in self._results.items() if v[0] > now}
+            if len(self._results) >= self.max_results:
+                self._results.pop(next(iter(self._results)))
+        self._results[key] = (now + ttl, result)
+    
+    def _record(self, source: str, on_hit: Optional[Callable[[str], None]]):
+        """Count a deduplicated call."""
+        self.stats[f"{source}_hits"] += 1
+        if on_hit:
+            on_hit(source)
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Get call and dedup-hit counters."""
+        return {
+            "calls": self.stats["calls"],
+            "inflight_hits": self.stats["inflight_hits"],
+            "cache_hits": self.stats["cache_hits"],
+            "in_flight": len(self._in_flight)
+        }
+
+
+@dataclass(frozen=True)
+class SerializedPayload:
+    """JSON bytes serialized once, with a strong ETag over those bytes."""
+    body: bytes
+    etag: str
+
+
+def serialize_payload(data: Any) -> SerializedPayload:
+    """Serialize a response body once so it can be served repeatedly."""
+    body = json.dumps(data, separators=(",", ":"), default=dict).encode()
+    return SerializedPayload(body=body, etag='"' + hashlib.sha256(body).hexdigest()[:32] + '"')
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag."""
+    if not if_none_match:
+        return False
+    tags = {tag.strip() for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
 def cache_key(prefix: str, *args) -> str:
     """Generate cache key."""
     return f"{prefix}:{':'.join(str(arg) for arg in args)}"
@@ -87,20 +187,10 @@ def cache_key(prefix: str, *args) -> str:
 
 async def cached_services_list():
     """Cache services list."""
-    key = cache_key("services", "list")
-    cached = await cache.get(key)
-    
-    if cached:
-        return cached
+    from app.services.service_catalog import service_catalog
     
-    # Fetch from external API (mock)
-    services = [
-        {"name": "telegram", "price": 0.5},
-        {"name": "whatsapp", "price": 0.7}
-    ]
-    
-    await cache.set(key, services, ttl=3600)  # 1 hour
-    return services
+    snapshot = await service_catalog.get()
+    return snapshot.services
 
 
 async def cached_user_stats(user_id: str):
@@ -122,7 +212,46 @@ async def cached_user_stats(user_id: str):
     return stats
 
 
+# One Redis hash per user, one field per period, so invalidation is a single DEL
+USAGE_ANALYTICS_TTL = 300
+
+
+async def get_cached_usage_analytics(user_id: str, period: int) -> Optional[Dict[str, Any]]:
+    """Get a user's cached usage analytics for a period, if still fresh."""
+    try:
+        await cache.connect()
+        value = await cache.redis_client.hget(cache_key("usage_analytics", user_id), str(period))
+    except Exception:
+        return None
+    if not value:
+        return None
+    
+    entry = json.loads(value)
+    if time.time() - entry["at"] > USAGE_ANALYTICS_TTL:
+        return None
+    return entry["data"]
+
+
+async def set_cached_usage_analytics(user_id: str, period: int, data: Dict[str, Any]):
+    """Cache a user's usage analytics for a period."""
+    key = cache_key("usage_analytics", user_id)
+    try:
+        await cache.connect()
+        async with cache.redis_client.pipeline(transaction=False) as pipe:
+            pipe.hset(key, str(period), json.dumps({"at": time.time(), "data": data}, default=str))
+            pipe.expire(key, USAGE_ANALYTICS_TTL)
+            await pipe.execute()
+    except Exception:
+        pass
+
+
+async def invalidate_usage_analytics(user_id: str):
+    """Drop every cached analytics period for a user."""
+    await cache.delete(cache_key("usage_analytics", user_id))
+
+
 async def invalidate_user_cache(user_id: str):
     """Invalidate all user-related cache."""
+    await invalidate_usage_analytics(user_id)
     await cache.invalidate_pattern(f"user_stats:{user_id}*")
     await cache.invalidate_pattern(f"user_verifications:{user_id}*")
\ No newline at end of file
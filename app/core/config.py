@@ -45,6 +45,31 @@ class Settings(BaseSettings):
     textverified_api_key: Optional[str] = None
     textverified_email: Optional[str] = None
     textverified_base_url: str = "https://www.textverified.com"
+    textverified_max_connections: int = 100
+    textverified_max_keepalive_connections: int = 20
+    textverified_keepalive_expiry: float = 30.0
+    textverified_pool_timeout: float = 5.0
+    textverified_http2: bool = True
+    
+    # Pricing overrides (JSON), reloaded when the file changes
+    pricing_config_path: Optional[str] = None
+    
+    # Background exports
+    export_dir: str = "exports"
+    export_workers: int = 2
+    export_max_queued: int = 100
+    export_retention_hours: int = 24
+    
+    # Logging
+    log_queue_size: int = 10000  # records waiting for the writer thread
+    request_log_sample_rate: float = 1.0  # share of 1xx-3xx requests logged; errors always are
+    
+    # System metrics sampling
+    system_sample_interval: float = 15.0  # seconds between host/loop/GC/pool samples
+    
+    # Event-loop profiler (opt-in)
+    loop_profiler_enabled: bool = False
+    slow_callback_threshold: float = 0.1  # seconds the loop may stall before its stack is captured
     
     # JWT Settings
     jwt_expiry_hours: int = 720  # 30 days
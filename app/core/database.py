@@ -1,5 +1,6 @@
 """Database connection and session management."""
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import QueuePool
@@ -28,6 +29,34 @@ else:
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def async_database_url(url: str) -> str:
+    """Map a sync database URL onto its async driver (asyncpg / aiosqlite)."""
+    scheme, _, rest = url.partition("://")
+    driver = scheme.split("+", 1)[0]
+    if driver in ("postgresql", "postgres"):
+        return f"postgresql+asyncpg://{rest}"
+    if driver == "sqlite":
+        return f"sqlite+aiosqlite://{rest}"
+    return url
+
+
+# Async engine for request handlers that must not block the event loop
+if "sqlite" in settings.database_url:
+    async_engine = create_async_engine(async_database_url(settings.database_url))
+else:
+    async_engine = create_async_engine(
+        async_database_url(settings.database_url),
+        pool_size=20,
+        max_overflow=30,
+        pool_pre_ping=True,
+        pool_recycle=3600,
+        echo=False
+    )
+
+# Async session factory; objects stay usable after commit
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Base class for models
 Base = declarative_base()
 
@@ -41,6 +70,12 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """Dependency to get an async database session."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def create_tables():
     """Create all database tables."""
     Base.metadata.create_all(bind=engine)
@@ -1,49 +1,71 @@
 """FastAPI dependency injection utilities."""
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from .database import get_db
 from .config import settings
 import jwt
 
 
-security = HTTPBearer()
+# Middleware may have authenticated the request by API key, without a Bearer header
+security = HTTPBearer(auto_error=False)
 
 
 def get_current_user_id(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> str:
     """Get current user ID from JWT token."""
+    # JWTAuthMiddleware already decoded and authorized this token
+    principal = getattr(request.state, "principal", None)
+    if principal is not None:
+        return principal.user_id
+    
+    if credentials is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated"
+        )
+    
     try:
         payload = jwt.decode(
             credentials.credentials,
             settings.secret_key,
             algorithms=[settings.jwt_algorithm]
         )
-        user_id = payload.get("user_id")
-        if not user_id:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
-            )
-        return user_id
     except jwt.InvalidTokenError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token"
         )
+    
+    # Paths the middleware skips still need an existing, active account
+    from app.core.principal_cache import resolve_principal
+    
+    principal = resolve_principal(credentials.credentials, payload)
+    if not principal:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token"
+        )
+    if not principal.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User account is disabled"
+        )
+    
+    request.state.principal = principal
+    request.state.token_payload = payload
+    return principal.user_id
 
 
 def get_admin_user_id(
-    user_id: str = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
+    request: Request,
+    user_id: str = Depends(get_current_user_id)
 ) -> str:
     """Get admin user ID (requires admin role)."""
-    # Import here to avoid circular imports
-    from app.models.user import User
+    # get_current_user_id attached the caller's active principal
+    principal = request.state.principal
     
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user or not user.is_admin:
+    if principal.user_id != user_id or not principal.is_admin or not principal.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Admin access required"
@@ -1,9 +1,12 @@
 """Enhanced structured logging configuration for production."""
+import atexit
 import logging
+import queue
 import sys
 import os
 import uuid
 import threading
+from logging.handlers import QueueHandler, QueueListener
 from typing import Dict, Any, Optional
 from contextvars import ContextVar
 from app.core.config import settings
@@ -12,6 +15,9 @@ from app.core.config import settings
 correlation_id_var: ContextVar[Optional[str]] = ContextVar('correlation_id', default=None)
 user_id_var: ContextVar[Optional[str]] = ContextVar('user_id', default=None)
 
+# Writes queued records to the real handlers on a background thread
+_log_listener: Optional[QueueListener] = None
+
 
 class CorrelationIDProcessor:
     """Add correlation ID to log entries."""
@@ -53,18 +59,51 @@ class ProductionMetadataProcessor:
         return event_dict
 
 
+class DeferredQueueHandler(QueueHandler):
+    """Queue records unformatted so messages are built on the writer thread.
+    
+    The stock handler formats in the caller so records can be pickled; this
+    queue never leaves the process, so formatting (including any lazy
+    ``__str__`` on arguments) is left to the listener. Arguments must not be
+    mutated after they are logged. Records are dropped, and counted, rather
+    than blocking the caller when the queue is full.
+    """
+    
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+    
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
 def setup_logging():
     """Configure basic logging temporarily for debugging."""
     # Set log level based on environment
     log_level = logging.INFO if settings.environment == "production" else logging.DEBUG
     
+    # Callers only enqueue; the listener thread formats and writes
+    stop_logging()
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+    log_queue = queue.Queue(settings.log_queue_size)
+    
+    global _log_listener
+    _log_listener = QueueListener(log_queue, output, respect_handler_level=True)
+    
     # Configure basic root logger only
     logging.basicConfig(
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        stream=sys.stdout,
+        handlers=[DeferredQueueHandler(log_queue)],
         level=log_level,
         force=True
     )
+    _log_listener.start()
     
     # Silence noisy loggers in production
     if settings.environment == "production":
@@ -72,10 +111,24 @@ def setup_logging():
         logging.getLogger("httpx").setLevel(logging.WARNING)
         logging.getLogger("httpcore").setLevel(logging.WARNING)
     
+    # aiosqlite logs every driver operation at DEBUG
+    logging.getLogger("aiosqlite").setLevel(logging.INFO)
+    
     # Skip structlog configuration temporarily
     print("Basic logging configured (structlog disabled for debugging)")
 
 
+def stop_logging():
+    """Flush queued records and stop the writer thread."""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+
+atexit.register(stop_logging)
+
+
 def setup_log_rotation():
     """Setup log rotation for production."""
     from logging.handlers import RotatingFileHandler
@@ -105,9 +158,11 @@ def setup_log_rotation():
     )
     file_handler.setLevel(logging.INFO)
     
-    # Add to root logger
-    root_logger = logging.getLogger()
-    root_logger.addHandler(file_handler)
+    # Write from the listener thread when logging is queued
+    if _log_listener is not None:
+        _log_listener.handlers += (file_handler,)
+    else:
+        logging.getLogger().addHandler(file_handler)
 
 
 def get_logger(name: str = None):
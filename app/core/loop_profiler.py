@@ -0,0 +1,151 @@
+"""Opt-in event-loop lag and slow-callback profiler."""
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import asdict, dataclass
+from types import CodeType
+from typing import Any, Deque, Dict, List, Optional, Sequence
+
+from starlette.routing import BaseRoute
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import EVENT_LOOP_BLOCKED, EVENT_LOOP_WAKEUP_DELAY
+
+logger = get_logger(__name__)
+
+# Endpoint label for stalls outside any request handler
+BACKGROUND_ROUTE = "background"
+
+STACK_LIMIT = 40  # innermost frames kept per event
+
+
+@dataclass
+class SlowCallback:
+    """One stall of the event loop."""
+    detected_at: float  # epoch seconds
+    route: str
+    stack: List[str]  # outermost first; the last entries are the blocking call
+    duration_seconds: Optional[float] = None  # None while the loop is still blocked
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Event as JSON-ready data."""
+        return asdict(self)
+
+
+class LoopProfiler:
+    """Find code that blocks the event loop.
+    
+    A heartbeat task wakes every ``tick`` seconds and records how late it
+    woke. A watchdog thread notices when the heartbeat is overdue by more
+    than ``threshold`` and captures the loop thread's stack at that moment,
+    which is the blocking call itself (a sync DB query, smtplib, ...). The
+    route is that of the first frame on the stack that is a route endpoint.
+    When the loop recovers, the heartbeat fills in how long it was blocked.
+    Nothing hooks the loop internals, so uvloop works too.
+    """
+    
+    def __init__(self, threshold: float = 0.1, tick: float = 0.05, max_events: int = 100):
+        self.threshold = threshold
+        self.tick = tick
+        self.events: Deque[SlowCallback] = deque(maxlen=max_events)
+        self._endpoints: Dict[CodeType, str] = {}
+        self._last_beat = 0.0
+        self._pending: Optional[SlowCallback] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+    
+    @property
+    def running(self) -> bool:
+        """Whether the heartbeat is alive."""
+        return self._task is not None and not self._task.done()
+    
+    async def start(self, routes: Sequence[BaseRoute] = ()):
+        """Start profiling the running loop; routes map endpoint code to path templates."""
+        if self.running:
+            return
+        
+        self._endpoints = {}
+        for route in routes:
+            code = getattr(getattr(route, "endpoint", None), "__code__", None)
+            if code is not None:
+                self._endpoints[code] = route.path
+        
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.perf_counter()
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-profiler", daemon=True)
+        self._thread.start()
+        logger.info(f"Event-loop profiler started ({self.threshold}s threshold)")
+    
+    async def stop(self):
+        """Stop the heartbeat and the watchdog."""
+        if self._task is None:
+            return
+        
+        self._stopping.set()
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        await asyncio.to_thread(self._thread.join)
+        self._task = None
+        self._thread = None
+        logger.info("Event-loop profiler stopped")
+    
+    def recent(self, limit: int = 50) -> List[SlowCallback]:
+        """Most recent stalls, newest first."""
+        return list(self.events)[::-1][:limit]
+    
+    async def _heartbeat(self):
+        """Wake every tick and settle any stall the watchdog caught."""
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.tick
+            await asyncio.sleep(self.tick)
+            delay = max(0.0, loop.time() - expected)
+            self._last_beat = time.perf_counter()
+            EVENT_LOOP_WAKEUP_DELAY.observe(delay)
+            
+            event, self._pending = self._pending, None
+            if event is not None:
+                event.duration_seconds = round(delay, 4)
+                EVENT_LOOP_BLOCKED.labels(endpoint=event.route).observe(delay)
+                blocker = event.stack[-1].splitlines()[0].strip() if event.stack else "unknown"
+                logger.warning(f"Event loop blocked for {delay:.3f}s in {event.route}: {blocker}")
+    
+    def _watch(self):
+        """Capture the loop thread's stack once per stall; runs in its own thread."""
+        while not self._stopping.wait(self.tick):
+            overdue = time.perf_counter() - self._last_beat - self.tick
+            if overdue < self.threshold or self._pending is not None:
+                continue
+            
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            
+            event = SlowCallback(
+                detected_at=time.time(),
+                route=self._route(frame),
+                stack=[line.rstrip() for line in traceback.format_list(traceback.extract_stack(frame, STACK_LIMIT))]
+            )
+            self._pending = event
+            self.events.append(event)
+    
+    def _route(self, frame) -> str:
+        """Path template of the innermost endpoint on the stack."""
+        while frame is not None:
+            route = self._endpoints.get(frame.f_code)
+            if route is not None:
+                return route
+            frame = frame.f_back
+        return BACKGROUND_ROUTE
+
+
+# Global loop profiler instance
+loop_profiler = LoopProfiler(threshold=settings.slow_callback_threshold)
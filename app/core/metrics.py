@@ -3,15 +3,23 @@ Production Metrics Collection System
 Prometheus-compatible metrics for monitoring and alerting.
 """
 import time
-import psutil
-from typing import Dict, Any
-from collections import defaultdict, Counter
+from typing import Dict, Any, Optional, Sequence
 from prometheus_client import Counter as PrometheusCounter, Histogram, Gauge, generate_latest, CONTENT_TYPE_LATEST
+from starlette.routing import BaseRoute, Match
 from app.core.config import settings
 from app.core.logging import get_logger
 
 logger = get_logger("metrics")
 
+# Request latency buckets (seconds), with edges at the 1s/2s/5s slow-request thresholds
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0)
+
+# Endpoint label for requests that match no route (404s, scanners)
+UNMATCHED_ROUTE = "unmatched"
+
+# Event-loop delay buckets (seconds)
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
 # Prometheus metrics
 REQUEST_COUNT = PrometheusCounter(
     'http_requests_total',
@@ -22,7 +30,8 @@ REQUEST_COUNT = PrometheusCounter(
 REQUEST_DURATION = Histogram(
     'http_request_duration_seconds',
     'HTTP request duration in seconds',
-    ['method', 'endpoint']
+    ['method', 'endpoint'],
+    buckets=LATENCY_BUCKETS
 )
 
 ACTIVE_CONNECTIONS = Gauge(
@@ -67,97 +76,149 @@ SYSTEM_DISK = Gauge(
     'System disk usage percentage'
 )
 
+EVENT_LOOP_LAG = Gauge(
+    'event_loop_lag_seconds',
+    'Worst delay waking a sleeping task over the last sampling interval'
+)
+
+GC_PAUSE_SECONDS = PrometheusCounter(
+    'gc_pause_seconds_total',
+    'Time spent in garbage collection',
+    ['generation']
+)
+
+GC_MAX_PAUSE = Gauge(
+    'gc_max_pause_seconds',
+    'Longest garbage collection pause over the last sampling interval'
+)
+
+DATABASE_POOL = Gauge(
+    'database_pool_connections',
+    'Database pool connections by state',
+    ['engine', 'state']
+)
+
+EVENT_LOOP_WAKEUP_DELAY = Histogram(
+    'event_loop_wakeup_delay_seconds',
+    'How late the loop profiler heartbeat woke',
+    buckets=LOOP_LAG_BUCKETS
+)
+
+EVENT_LOOP_BLOCKED = Histogram(
+    'event_loop_blocked_seconds',
+    'Event-loop stalls longer than the slow-callback threshold',
+    ['endpoint'],
+    buckets=LOOP_LAG_BUCKETS
+)
+
+UPSTREAM_POOL_IN_FLIGHT = Gauge(
+    'upstream_http_pool_requests_in_flight',
+    'Upstream requests currently holding a pooled connection',
+    ['upstream']
+)
+
+UPSTREAM_POOL_LIMIT = Gauge(
+    'upstream_http_pool_max_connections',
+    'Configured maximum connections for the upstream pool',
+    ['upstream']
+)
+
+UPSTREAM_POOL_SATURATED = PrometheusCounter(
+    'upstream_http_pool_saturated_total',
+    'Requests issued while every pooled connection was busy',
+    ['upstream']
+)
+
+UPSTREAM_COALESCED = PrometheusCounter(
+    'upstream_requests_coalesced_total',
+    'Upstream calls answered by a shared in-flight request or short-lived result',
+    ['upstream', 'endpoint', 'source']
+)
+
+UPSTREAM_POOL_TIMEOUTS = PrometheusCounter(
+    'upstream_http_pool_timeouts_total',
+    'Requests that timed out waiting for a pooled connection',
+    ['upstream']
+)
+
 
 class MetricsCollector:
-    """Centralized metrics collection and management."""
+    """Centralized metrics collection and management.
+    
+    The Prometheus metrics are the only store; application summaries are
+    read back from them.
+    """
     
     def __init__(self):
         self.start_time = time.time()
-        self.request_stats = defaultdict(lambda: {'count': 0, 'total_time': 0})
-        self.error_stats = Counter()
-        self.business_stats = Counter()
-        
-    def record_request(self, method: str, endpoint: str, status_code: int, duration: float):
+    
+    @staticmethod
+    def record_request(method: str, endpoint: str, status_code: int, duration: float):
         """Record HTTP request metrics."""
-        # Prometheus metrics
         REQUEST_COUNT.labels(method=method, endpoint=endpoint, status_code=status_code).inc()
         REQUEST_DURATION.labels(method=method, endpoint=endpoint).observe(duration)
-        
-        # Internal stats
-        key = f"{method}:{endpoint}"
-        self.request_stats[key]['count'] += 1
-        self.request_stats[key]['total_time'] += duration
-        
-        logger.debug("Request recorded", 
-                    method=method, endpoint=endpoint, 
-                    status_code=status_code, duration_ms=duration*1000)
     
-    def record_error(self, error_type: str, severity: str = "medium"):
+    @staticmethod
+    def record_error(error_type: str, severity: str = "medium"):
         """Record error metrics."""
         ERROR_COUNT.labels(error_type=error_type, severity=severity).inc()
-        self.error_stats[f"{error_type}:{severity}"] += 1
         
-        logger.info("Error recorded", error_type=error_type, severity=severity)
+        logger.info("Error recorded: error_type=%s, severity=%s", error_type, severity)
     
-    def record_business_event(self, event_type: str, status: str = "success"):
+    @staticmethod
+    def record_business_event(event_type: str, status: str = "success"):
         """Record business event metrics."""
         BUSINESS_EVENTS.labels(event_type=event_type, status=status).inc()
-        self.business_stats[f"{event_type}:{status}"] += 1
         
-        logger.info("Business event recorded", event_type=event_type, status=status)
+        logger.info("Business event recorded: event_type=%s, status=%s", event_type, status)
     
     @staticmethod
-    def update_system_metrics():
-        """Update system resource metrics."""
-        try:
-            # CPU usage
-            cpu_percent = psutil.cpu_percent(interval=1)
-            SYSTEM_CPU.set(cpu_percent)
-            
-            # Memory usage
-            memory = psutil.virtual_memory()
-            SYSTEM_MEMORY.set(memory.percent)
-            
-            # Disk usage
-            disk = psutil.disk_usage('/')
-            SYSTEM_DISK.set(disk.percent)
-            
-            logger.debug("System metrics updated",
-                        cpu_percent=cpu_percent,
-                        memory_percent=memory.percent,
-                        disk_percent=disk.percent)
-            
-        except Exception as e:
-            logger.error("Failed to update system metrics", error=str(e))
-            # Continue execution instead of raising
+    def _total(metric, sample_name: str) -> float:
+        """Sum one sample series of a metric across all label values."""
+        return sum(
+            sample.value
+            for family in metric.collect()
+            for sample in family.samples
+            if sample.name == sample_name
+        )
     
     def get_application_metrics(self) -> Dict[str, Any]:
         """Get application-specific metrics."""
         uptime = time.time() - self.start_time
         
         # Calculate request statistics
-        total_requests = sum(stats['count'] for stats in self.request_stats.values())
+        total_requests = int(self._total(REQUEST_DURATION, 'http_request_duration_seconds_count'))
         avg_response_time = 0
         if total_requests > 0:
-            total_time = sum(stats['total_time'] for stats in self.request_stats.values())
+            total_time = self._total(REQUEST_DURATION, 'http_request_duration_seconds_sum')
             avg_response_time = total_time / total_requests
         
         return {
             "uptime_seconds": uptime,
             "total_requests": total_requests,
             "average_response_time": avg_response_time,
-            "error_count": sum(self.error_stats.values()),
-            "business_events": sum(self.business_stats.values()),
+            "error_count": int(self._total(ERROR_COUNT, 'errors_total')),
+            "business_events": int(self._total(BUSINESS_EVENTS, 'business_events_total')),
             "requests_per_second": total_requests / uptime if uptime > 0 else 0
         }
     
     def get_health_score(self) -> Dict[str, Any]:
-        """Calculate overall health score."""
+        """Calculate overall health score from the latest system sample."""
+        from app.core.system_sampler import system_sampler
+        
+        snapshot = system_sampler.snapshot
+        if snapshot is None:
+            return {
+                "health_score": 0,
+                "status": "unknown",
+                "error": "System metrics not sampled yet"
+            }
+        
         try:
             # Get system metrics
-            cpu_percent = psutil.cpu_percent()
-            memory_percent = psutil.virtual_memory().percent
-            disk_percent = psutil.disk_usage('/').percent
+            cpu_percent = snapshot.cpu_percent
+            memory_percent = snapshot.memory_percent
+            disk_percent = snapshot.disk_percent
             
             # Calculate health score (0-100)
             health_score = 100
@@ -205,12 +266,13 @@ class MetricsCollector:
                     "memory_usage": memory_percent,
                     "disk_usage": disk_percent,
                     "error_rate": error_rate,
-                    "avg_response_time": app_metrics['average_response_time']
+                    "avg_response_time": app_metrics['average_response_time'],
+                    "sampled_at": snapshot.taken_at
                 }
             }
             
         except Exception as e:
-            logger.error("Failed to calculate health score", error=str(e))
+            logger.error("Failed to calculate health score: %s", e)
             return {
                 "health_score": 0,
                 "status": "unknown",
@@ -223,71 +285,71 @@ metrics_collector = MetricsCollector()
 
 
 class MetricsMiddleware:
-    """Middleware to collect request metrics."""
+    """Middleware to collect request metrics.
+    
+    Requests are labelled with the matched route's path template
+    (``/verify/{verification_id}``), so label cardinality is bounded by the
+    number of routes. Requests answered before routing, such as 401s and
+    429s, are matched against ``routes``; anything else is "unmatched".
+    """
     
-    def __init__(self, app):
+    def __init__(self, app, routes: Optional[Sequence[BaseRoute]] = None):
         self.app = app
+        self.routes = routes if routes is not None else []
     
     async def __call__(self, scope, receive, send):
         if scope["type"] != "http":
             await self.app(scope, receive, send)
             return
         
-        start_time = time.time()
-        
-        # Extract request info
+        start_time = time.perf_counter()
         method = scope["method"]
-        path = scope["path"]
+        root_path = scope.get("root_path", "")
+        response_started = False
         
-        # Normalize endpoint for metrics (remove IDs, etc.)
-        normalized_path = MetricsMiddleware._normalize_path(path)
+        def record(status_code: int):
+            duration = time.perf_counter() - start_time
+            endpoint = self._route_template(scope, root_path)
+            metrics_collector.record_request(method, endpoint, status_code, duration)
         
         async def send_wrapper(message):
+            nonlocal response_started
             if message["type"] == "http.response.start":
                 # Record metrics when response starts
-                duration = time.time() - start_time
-                status_code = message["status"]
-                
-                metrics_collector.record_request(method, normalized_path, status_code, duration)
-                
-                # Update active connections
-                ACTIVE_CONNECTIONS.inc()
+                response_started = True
+                record(message["status"])
             
             await send(message)
         
+        ACTIVE_CONNECTIONS.inc()
         try:
             await self.app(scope, receive, send_wrapper)
         except Exception as e:
-            # Record error
+            # Record error; the server error handler outside answers with a 500
             metrics_collector.record_error(type(e).__name__, "high")
+            if not response_started:
+                record(500)
             raise
         finally:
-            # Decrease active connections
             ACTIVE_CONNECTIONS.dec()
     
-    @staticmethod
-    def _normalize_path(path: str) -> str:
-        """Normalize path for metrics grouping."""
-        # Replace UUIDs and IDs with placeholders
-        import re
+    def _route_template(self, scope, root_path: str) -> str:
+        """Path template of the route that handled, or would handle, the request."""
+        route = scope.get("route")
+        if route is not None:
+            return route.path
         
-        # Replace UUIDs
-        path = re.sub(r'/[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}', '/{uuid}', path)
-        
-        # Replace numeric IDs
-        path = re.sub(r'/\d+', '/{id}', path)
-        
-        # Replace verification codes
-        path = re.sub(r'/[A-Z0-9]{6,}', '/{code}', path)
-        
-        return path
+        # Routing rewrites root_path for mounts; match as the request arrived
+        original = {**scope, "root_path": root_path}
+        for candidate in self.routes:
+            match, _ = candidate.matches(original)
+            if match != Match.NONE:
+                return getattr(candidate, "path", UNMATCHED_ROUTE)
+        return UNMATCHED_ROUTE
 
 
 def get_prometheus_metrics() -> str:
-    """Get Prometheus-formatted metrics."""
-    # Update system metrics before generating output
-    metrics_collector.update_system_metrics()
-    
+    """Get Prometheus-formatted metrics; system gauges are kept current by the sampler."""
     return generate_latest()
 
 
@@ -376,6 +438,38 @@ class CacheMetrics:
 cache_metrics = CacheMetrics()
 
 
+class UpstreamPoolMetrics:
+    """Connection pool metrics for long-lived upstream HTTP clients."""
+    
+    @staticmethod
+    def set_limit(upstream: str, max_connections: int):
+        """Record the configured pool size."""
+        UPSTREAM_POOL_LIMIT.labels(upstream=upstream).set(max_connections)
+    
+    @staticmethod
+    def record_acquire(upstream: str, in_flight: int, max_connections: int):
+        """Record a request taking a connection from the pool."""
+        UPSTREAM_POOL_IN_FLIGHT.labels(upstream=upstream).set(in_flight)
+        if in_flight > max_connections:
+            UPSTREAM_POOL_SATURATED.labels(upstream=upstream).inc()
+    
+    @staticmethod
+    def record_release(upstream: str, in_flight: int):
+        """Record a request returning its connection to the pool."""
+        UPSTREAM_POOL_IN_FLIGHT.labels(upstream=upstream).set(in_flight)
+    
+    @staticmethod
+    def record_pool_timeout(upstream: str):
+        """Record a request that could not obtain a connection in time."""
+        UPSTREAM_POOL_TIMEOUTS.labels(upstream=upstream).inc()
+        metrics_collector.record_error("upstream_pool_timeout", "high")
+    
+    @staticmethod
+    def record_coalesced(upstream: str, endpoint: str, source: str):
+        """Record a call deduplicated by single-flight (source: inflight or cache)."""
+        UPSTREAM_COALESCED.labels(upstream=upstream, endpoint=endpoint, source=source).inc()
+
+
 def get_application_info() -> Dict[str, Any]:
     """Get application information for metrics."""
     return {
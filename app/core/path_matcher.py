@@ -0,0 +1,77 @@
+"""Precompiled path classification for middleware exclusions and limits."""
+from typing import Any, Dict, Iterable, Mapping, Optional, Union
+
+_MISSING = object()
+
+
+class _Node:
+    """One path segment in the rule trie."""
+    __slots__ = ("children", "wildcard", "exact", "prefix")
+    
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.wildcard: Optional["_Node"] = None  # matches any single segment
+        self.exact: Any = _MISSING
+        self.prefix: Any = _MISSING
+
+
+Rules = Union[Iterable[str], Mapping[str, Any]]
+
+
+class PathMatcher:
+    """Segment trie matching request paths against exact and prefix rules.
+    
+    A prefix rule ``/admin`` matches ``/admin`` and ``/admin/users`` but not
+    ``/administrator``; an exact rule matches only that path (trailing slash
+    ignored). ``{param}`` segments match any single segment. The most
+    specific (longest) matching rule wins and lookups cost O(path length).
+    """
+    
+    def __init__(self, prefixes: Rules = (), exact: Rules = ()):
+        self._root = _Node()
+        for rules, is_prefix in ((prefixes, True), (exact, False)):
+            items = rules.items() if isinstance(rules, Mapping) else ((rule, True) for rule in rules)
+            for pattern, value in items:
+                self.add(pattern, value, prefix=is_prefix)
+    
+    def add(self, pattern: str, value: Any = True, prefix: bool = True):
+        """Add a rule; the value is returned by match() for paths it covers."""
+        node = self._root
+        for segment in _segments(pattern):
+            if segment.startswith("{") and segment.endswith("}"):
+                if node.wildcard is None:
+                    node.wildcard = _Node()
+                node = node.wildcard
+            else:
+                node = node.children.setdefault(segment, _Node())
+        
+        if prefix:
+            node.prefix = value
+        else:
+            node.exact = value
+    
+    def match(self, path: str, default: Any = None) -> Any:
+        """Return the value of the most specific rule covering path."""
+        found = self._match(self._root, _segments(path), 0)
+        return default if found is _MISSING else found
+    
+    def __contains__(self, path: str) -> bool:
+        return self._match(self._root, _segments(path), 0) is not _MISSING
+    
+    def _match(self, node: _Node, segments, index: int) -> Any:
+        """Walk literal children before wildcards, falling back to this prefix."""
+        if index == len(segments):
+            return node.exact if node.exact is not _MISSING else node.prefix
+        
+        for child in (node.children.get(segments[index]), node.wildcard):
+            if child is not None:
+                found = self._match(child, segments, index + 1)
+                if found is not _MISSING:
+                    return found
+        
+        return node.prefix
+
+
+def _segments(path: str):
+    """Split a path into non-empty segments, ignoring the query string."""
+    return [segment for segment in path.split("?", 1)[0].split("/") if segment]
@@ -0,0 +1,268 @@
+"""Short-lived cache of authenticated principals keyed by token id."""
+import asyncio
+import hashlib
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Set, Tuple
+
+from sqlalchemy import select
+
+from app.core.caching import cache
+from app.core.database import AsyncSessionLocal, SessionLocal
+from app.core.logging import get_logger
+from app.utils.security import verify_token
+
+logger = get_logger(__name__)
+
+# Redis channel used to drop a user's cached principals on every worker
+INVALIDATIONS_CHANNEL = "principal_invalidations"
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The subset of a user that authorization decisions need."""
+    user_id: str
+    email: Optional[str]
+    is_admin: bool
+    is_active: bool
+
+
+class PrincipalCache:
+    """TTL/LRU cache of principals with per-user invalidation."""
+    
+    def __init__(self, ttl: float = 60.0, max_size: int = 10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[float, Principal]]" = OrderedDict()
+        self._keys_by_user: Dict[str, Set[str]] = {}
+        # Sync dependencies run in the threadpool alongside the event loop
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Optional[Principal]:
+        """Get a cached principal if it has not expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+    
+    def set(self, key: str, principal: Principal, token_exp: Optional[float] = None):
+        """Cache a principal, never beyond the token's own expiry."""
+        ttl = self.ttl
+        if token_exp is not None:
+            ttl = min(ttl, token_exp - time.time())
+        if ttl <= 0:
+            return
+        
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl, principal)
+            self._keys_by_user.setdefault(principal.user_id, set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+    
+    def invalidate_key(self, key: str):
+        """Drop a single cached entry."""
+        with self._lock:
+            self._remove(key)
+    
+    def invalidate_user(self, user_id: str):
+        """Drop every cached token for a user, e.g. after suspension."""
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._remove(key)
+    
+    def clear(self):
+        """Drop all cached principals."""
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+    
+    def _remove(self, key: str):
+        """Remove one entry and its user index reference (lock held)."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self._keys_by_user.get(entry[1].user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[entry[1].user_id]
+
+
+class PrincipalInvalidator:
+    """Fan per-user invalidations out to every worker over Redis pub/sub.
+    
+    Each worker holds its own PrincipalCache, so a suspension handled by
+    one worker would otherwise stay invisible to the rest until their
+    entries expire. Without Redis only the local cache is cleared.
+    """
+    
+    def __init__(self, principals: PrincipalCache):
+        self.principals = principals
+        self.instance_id = uuid.uuid4().hex
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._listener_task: Optional[asyncio.Task] = None
+    
+    def invalidate_user(self, user_id: str):
+        """Drop a user's principals here and on other workers; safe to call from sync code."""
+        self.principals.invalidate_user(user_id)
+        
+        coro = self.publish(user_id)
+        try:
+            asyncio.get_running_loop().create_task(coro)
+            return
+        except RuntimeError:
+            pass
+        # Sync endpoints run in the threadpool; hand the publish to the app loop
+        if self._loop is not None and self._loop.is_running():
+            asyncio.run_coroutine_threadsafe(coro, self._loop)
+        else:
+            coro.close()
+    
+    async def publish(self, user_id: str):
+        """Tell other workers to drop a user's principals."""
+        try:
+            await cache.connect()
+            await cache.redis_client.publish(INVALIDATIONS_CHANNEL, json.dumps({
+                "origin": self.instance_id,
+                "user_id": user_id
+            }))
+        except Exception as e:
+            logger.warning(f"Principal invalidation fan-out unavailable: {e}")
+    
+    def apply(self, data: Dict[str, Any]):
+        """Handle an invalidation published by another worker."""
+        if data.get("origin") != self.instance_id and data.get("user_id"):
+            self.principals.invalidate_user(data["user_id"])
+    
+    async def start(self):
+        """Start applying invalidations published by other workers."""
+        self._loop = asyncio.get_running_loop()
+        if self._listener_task is None or self._listener_task.done():
+            self._listener_task = asyncio.create_task(self._listen())
+    
+    async def stop(self):
+        """Stop the invalidation listener."""
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            await asyncio.gather(self._listener_task, return_exceptions=True)
+            self._listener_task = None
+        self._loop = None
+    
+    async def _listen(self):
+        """Subscribe to the invalidations channel, reconnecting with backoff."""
+        retry_delay = 1
+        while True:
+            pubsub = None
+            try:
+                await cache.connect()
+                pubsub = cache.redis_client.pubsub()
+                await pubsub.subscribe(INVALIDATIONS_CHANNEL)
+                retry_delay = 1
+                
+                async for item in pubsub.listen():
+                    if item.get("type") == "message":
+                        self.apply(json.loads(item["data"]))
+            
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Entries cached meanwhile still expire within the cache TTL
+                logger.warning(f"Principal invalidation subscription lost, retrying in {retry_delay}s: {e}")
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, 60)
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.close()
+                    except Exception:
+                        pass
+
+
+def token_cache_key(token: str, payload: Dict[str, Any]) -> str:
+    """Key tokens by jti, or by digest for tokens issued without one."""
+    return payload.get("jti") or hashlib.sha256(token.encode()).hexdigest()
+
+
+def principal_columns():
+    """Columns that make up a Principal."""
+    from app.models.user import User
+    
+    return select(User.id, User.email, User.is_admin, User.is_active)
+
+
+def row_to_principal(row) -> Optional[Principal]:
+    """Build a principal from a principal_columns() row."""
+    if not row:
+        return None
+    return Principal(
+        user_id=row.id,
+        email=row.email,
+        is_admin=bool(row.is_admin),
+        is_active=row.is_active is not False  # NULL predates the column mapping
+    )
+
+
+def load_principal(user_id: str) -> Optional[Principal]:
+    """Load the authorization fields for a user."""
+    from app.models.user import User
+    
+    db = SessionLocal()
+    try:
+        return row_to_principal(db.execute(principal_columns().where(User.id == user_id)).first())
+    finally:
+        db.close()
+
+
+async def load_principal_async(user_id: str) -> Optional[Principal]:
+    """Load the authorization fields for a user without blocking the loop."""
+    from app.models.user import User
+    
+    async with AsyncSessionLocal() as db:
+        return row_to_principal((await db.execute(principal_columns().where(User.id == user_id))).first())
+
+
+def resolve_principal(token: str, payload: Optional[Dict[str, Any]] = None) -> Optional[Principal]:
+    """Decode a token (unless already decoded) and return its cached principal."""
+    if payload is None:
+        payload = verify_token(token)
+    if not payload or not payload.get("user_id"):
+        return None
+    
+    key = token_cache_key(token, payload)
+    principal = principal_cache.get(key)
+    if principal is None:
+        principal = load_principal(payload["user_id"])
+        if principal is not None:
+            principal_cache.set(key, principal, payload.get("exp"))
+    return principal
+
+
+async def resolve_principal_async(token: str, payload: Dict[str, Any]) -> Optional[Principal]:
+    """Async resolve_principal for middleware, which already holds the payload."""
+    if not payload.get("user_id"):
+        return None
+    
+    key = token_cache_key(token, payload)
+    principal = principal_cache.get(key)
+    if principal is None:
+        principal = await load_principal_async(payload["user_id"])
+        if principal is not None:
+            principal_cache.set(key, principal, payload.get("exp"))
+    return principal
+
+
+# Global principal cache instance
+principal_cache = PrincipalCache()
+
+# Global invalidation fan-out for principal_cache
+principal_invalidator = PrincipalInvalidator(principal_cache)
@@ -0,0 +1,146 @@
+"""Sliding-window rate limiter backed by Redis with an in-process fallback."""
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+from app.core.caching import cache
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Approximate sliding window: the previous fixed window's count is weighted by
+# how much of it still overlaps the sliding window. All keys are checked
+# before any is incremented, so a rejected request consumes nothing. Server
+# TIME keeps windows aligned across pods (needs Redis 5+ effects replication).
+#
+# KEYS: one base key per limit. ARGV: window seconds, then one limit per key.
+# Returns: allowed flag, reset timestamp, then remaining per key.
+SLIDING_WINDOW_SCRIPT = """
+local window = tonumber(ARGV[1])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local current = math.floor(now / window)
+local weight = 1 - (now - current * window) / window
+
+local used = {}
+local allowed = 1
+for i, key in ipairs(KEYS) do
+    local cur = tonumber(redis.call('GET', key .. ':' .. current) or '0')
+    local prev = tonumber(redis.call('GET', key .. ':' .. (current - 1)) or '0')
+    used[i] = prev * weight + cur
+    if used[i] >= tonumber(ARGV[i + 1]) then
+        allowed = 0
+    end
+end
+
+if allowed == 1 then
+    for i, key in ipairs(KEYS) do
+        local bucket = key .. ':' .. current
+        redis.call('INCR', bucket)
+        redis.call('EXPIRE', bucket, window * 2)
+        used[i] = used[i] + 1
+    end
+end
+
+local result = {allowed, (current + 1) * window}
+for i = 1, #KEYS do
+    result[i + 2] = math.max(0, math.floor(tonumber(ARGV[i + 1]) - used[i]))
+end
+return result
+"""
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    """Outcome of one rate limit check across all scopes."""
+    allowed: bool
+    reset: int  # unix time the current window ends
+    remaining: Tuple[int, ...]  # per limit, in the order given
+
+
+class LocalSlidingWindow:
+    """Bounded in-process sliding-window counters, used when Redis is down."""
+    
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        # key -> (window index, current count, previous count)
+        self._counters: "OrderedDict[str, Tuple[int, int, int]]" = OrderedDict()
+    
+    def hit(self, limits: Sequence[Tuple[str, int]], window: int, now: Optional[float] = None) -> RateLimitResult:
+        """Check every limit and count the request only if all pass."""
+        now = time.time() if now is None else now
+        current = int(now // window)
+        weight = 1 - (now - current * window) / window
+        
+        counts = [self._counts(key, current) for key, _ in limits]
+        used = [prev * weight + cur for cur, prev in counts]
+        allowed = all(u < limit for u, (_, limit) in zip(used, limits))
+        
+        if allowed:
+            for i, (key, _) in enumerate(limits):
+                cur, prev = counts[i]
+                self._store(key, (current, cur + 1, prev))
+                used[i] += 1
+        
+        return RateLimitResult(
+            allowed=allowed,
+            reset=(current + 1) * window,
+            remaining=tuple(max(0, int(limit - u)) for u, (_, limit) in zip(used, limits))
+        )
+    
+    def _counts(self, key: str, current: int) -> Tuple[int, int]:
+        """Get (current, previous) window counts, rolling windows forward."""
+        entry = self._counters.get(key)
+        if entry is None:
+            return 0, 0
+        index, cur, prev = entry
+        if index == current:
+            return cur, prev
+        if index == current - 1:
+            return 0, cur
+        return 0, 0
+    
+    def _store(self, key: str, entry: Tuple[int, int, int]):
+        """Store counters, evicting the least recently used key when full."""
+        self._counters[key] = entry
+        self._counters.move_to_end(key)
+        while len(self._counters) > self.max_keys:
+            self._counters.popitem(last=False)
+
+
+class SlidingWindowRateLimiter:
+    """One Redis round-trip per check, shared by every worker."""
+    
+    def __init__(self, prefix: str = "ratelimit", retry_interval: float = 30.0, max_local_keys: int = 10000):
+        self.prefix = prefix
+        self.retry_interval = retry_interval  # seconds before retrying Redis after a failure
+        self.local = LocalSlidingWindow(max_local_keys)
+        self._script = None
+        self._redis_down_until = 0.0
+    
+    async def hit(self, limits: List[Tuple[str, int]], window: int) -> RateLimitResult:
+        """Count a request against (key, limit) pairs sharing one window."""
+        if time.monotonic() >= self._redis_down_until:
+            try:
+                return await self._hit_redis(limits, window)
+            except Exception as e:
+                self._redis_down_until = time.monotonic() + self.retry_interval
+                logger.warning(f"Rate limiter falling back to in-process counters: {e}")
+        
+        return self.local.hit(limits, window)
+    
+    async def _hit_redis(self, limits: List[Tuple[str, int]], window: int) -> RateLimitResult:
+        """Run the sliding-window script atomically in Redis."""
+        if self._script is None:
+            await cache.connect()
+            self._script = cache.redis_client.register_script(SLIDING_WINDOW_SCRIPT)
+        
+        result = await self._script(
+            keys=[f"{self.prefix}:{key}:{window}" for key, _ in limits],
+            args=[window, *(limit for _, limit in limits)]
+        )
+        return RateLimitResult(
+            allowed=bool(int(result[0])),
+            reset=int(result[1]),
+            remaining=tuple(int(value) for value in result[2:])
+        )
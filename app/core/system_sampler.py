@@ -0,0 +1,222 @@
+"""Background sampling of host, event loop, GC and database pool health."""
+import asyncio
+import gc
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+import psutil
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import async_engine, engine
+from app.core.logging import get_logger
+from app.core.metrics import (
+    DATABASE_CONNECTIONS, DATABASE_POOL, EVENT_LOOP_LAG, GC_MAX_PAUSE, GC_PAUSE_SECONDS,
+    SYSTEM_CPU, SYSTEM_DISK, SYSTEM_MEMORY
+)
+
+logger = get_logger(__name__)
+
+LAG_PROBE_INTERVAL = 0.5  # seconds between event-loop wake-up probes
+DB_PING_TIMEOUT = 5.0
+
+
+@dataclass(frozen=True)
+class SystemSnapshot:
+    """One sample. Snapshots are replaced whole and never mutated, so readers need no lock."""
+    taken_at: float
+    cpu_percent: float
+    memory_percent: float
+    disk_percent: float
+    process_rss_bytes: int
+    loop_lag_seconds: float  # worst wake-up delay since the previous sample
+    gc_pause_seconds: float  # time in GC since the previous sample
+    gc_max_pause_seconds: float
+    gc_collections: List[int]  # per generation, since the previous sample
+    database: Dict[str, Any]
+    pools: Dict[str, Dict[str, int]]
+    
+    @property
+    def age(self) -> float:
+        """Seconds since the sample was taken."""
+        return time.time() - self.taken_at
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Snapshot as JSON-ready data."""
+        data = asdict(self)
+        data["age_seconds"] = round(self.age, 1)
+        return data
+
+
+class GCPauseTracker:
+    """Time garbage collections through gc.callbacks.
+    
+    The callback runs inside the collector, possibly while another thread
+    holds a metrics lock, so it only updates plain numbers; the sampler
+    publishes them.
+    """
+    
+    def __init__(self):
+        self._started: Optional[float] = None
+        self.pauses = [0.0, 0.0, 0.0]
+        self.max_pause = 0.0
+        self.collections = [0, 0, 0]
+    
+    def __call__(self, phase: str, info: Dict[str, Any]):
+        if phase == "start":
+            self._started = time.perf_counter()
+        elif self._started is not None:
+            pause = time.perf_counter() - self._started
+            self._started = None
+            generation = info["generation"]
+            self.pauses[generation] += pause
+            self.collections[generation] += 1
+            self.max_pause = max(self.max_pause, pause)
+    
+    def drain(self):
+        """Pauses, longest pause and collections since the last drain."""
+        pauses, self.pauses = self.pauses, [0.0, 0.0, 0.0]
+        collections, self.collections = self.collections, [0, 0, 0]
+        max_pause, self.max_pause = self.max_pause, 0.0
+        return pauses, max_pause, collections
+
+
+class SystemSampler:
+    """Refresh a SystemSnapshot on an interval, off the request path.
+    
+    Host counters are read in a worker thread and the database is pinged
+    through the async engine. Event-loop lag is the worst overshoot of a
+    short sleep between samples. Endpoints read ``snapshot`` and never
+    call psutil themselves.
+    """
+    
+    def __init__(self, interval: float = 15.0):
+        self.interval = interval
+        self.snapshot: Optional[SystemSnapshot] = None
+        self.gc_tracker = GCPauseTracker()
+        self._process = psutil.Process()
+        self._max_lag = 0.0
+        self._tasks: List[asyncio.Task] = []
+    
+    @property
+    def running(self) -> bool:
+        """Whether the sampling tasks are alive."""
+        return any(not task.done() for task in self._tasks)
+    
+    async def start(self):
+        """Take a first sample, then keep sampling in the background."""
+        if self.running:
+            return
+        
+        # cpu_percent(None) reports usage since the previous call; prime it
+        await asyncio.to_thread(psutil.cpu_percent, None)
+        if self.gc_tracker not in gc.callbacks:
+            gc.callbacks.append(self.gc_tracker)
+        
+        await self.sample()
+        self._tasks = [
+            asyncio.create_task(self._sample_forever()),
+            asyncio.create_task(self._probe_loop_lag())
+        ]
+        logger.info(f"System sampler started ({self.interval}s interval)")
+    
+    async def stop(self):
+        """Stop sampling."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self.gc_tracker in gc.callbacks:
+            gc.callbacks.remove(self.gc_tracker)
+        logger.info("System sampler stopped")
+    
+    async def sample(self) -> SystemSnapshot:
+        """Collect one snapshot, publish it and update the gauges."""
+        cpu_percent, memory_percent, disk_percent, rss = await asyncio.to_thread(self._read_host)
+        database = await self._ping_database()
+        pools = {"sync": self._pool_stats(engine.pool), "async": self._pool_stats(async_engine.sync_engine.pool)}
+        loop_lag, self._max_lag = self._max_lag, 0.0
+        gc_pauses, gc_max_pause, gc_collections = self.gc_tracker.drain()
+        
+        snapshot = SystemSnapshot(
+            taken_at=time.time(),
+            cpu_percent=cpu_percent,
+            memory_percent=memory_percent,
+            disk_percent=disk_percent,
+            process_rss_bytes=rss,
+            loop_lag_seconds=round(loop_lag, 4),
+            gc_pause_seconds=round(sum(gc_pauses), 4),
+            gc_max_pause_seconds=round(gc_max_pause, 4),
+            gc_collections=gc_collections,
+            database=database,
+            pools=pools
+        )
+        self.snapshot = snapshot
+        
+        SYSTEM_CPU.set(cpu_percent)
+        SYSTEM_MEMORY.set(memory_percent)
+        SYSTEM_DISK.set(disk_percent)
+        EVENT_LOOP_LAG.set(loop_lag)
+        GC_MAX_PAUSE.set(gc_max_pause)
+        for generation, pause in enumerate(gc_pauses):
+            GC_PAUSE_SECONDS.labels(generation=str(generation)).inc(pause)
+        checked_out = 0
+        for name, stats in pools.items():
+            for state, value in stats.items():
+                DATABASE_POOL.labels(engine=name, state=state).set(value)
+            checked_out += stats.get("checkedout", 0)
+        DATABASE_CONNECTIONS.set(checked_out)
+        
+        return snapshot
+    
+    def _read_host(self):
+        """Blocking psutil reads; run in a worker thread."""
+        return (
+            psutil.cpu_percent(None),
+            psutil.virtual_memory().percent,
+            psutil.disk_usage('/').percent,
+            self._process.memory_info().rss
+        )
+    
+    @staticmethod
+    async def _ping_database() -> Dict[str, Any]:
+        """Round-trip a trivial query through the async engine."""
+        started = time.perf_counter()
+        try:
+            async with async_engine.connect() as conn:
+                await asyncio.wait_for(conn.execute(text("SELECT 1")), DB_PING_TIMEOUT)
+            return {"status": "healthy", "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+        except Exception as e:
+            return {"status": "unhealthy", "error": f"Database error: {e}"}
+    
+    @staticmethod
+    def _pool_stats(pool) -> Dict[str, int]:
+        """Size and usage of a QueuePool; empty for pools that do not track them."""
+        stats = {}
+        for state in ("size", "checkedin", "checkedout", "overflow"):
+            reader = getattr(pool, state, None)
+            if callable(reader):
+                stats[state] = reader()
+        return stats
+    
+    async def _sample_forever(self):
+        """Sample every interval until cancelled."""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sample()
+            except Exception as e:
+                logger.error(f"System sampling failed: {e}")
+    
+    async def _probe_loop_lag(self):
+        """Track the worst delay in waking a sleeping task."""
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + LAG_PROBE_INTERVAL
+            await asyncio.sleep(LAG_PROBE_INTERVAL)
+            self._max_lag = max(self._max_lag, loop.time() - expected)
+
+
+# Global system sampler instance
+system_sampler = SystemSampler(interval=settings.system_sample_interval)
@@ -0,0 +1,38 @@
+"""Helpers for pure-ASGI middleware."""
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import Message, Scope, Send
+
+from app.utils.security import verify_token
+
+
+def send_with_headers(send: Send, headers: Callable[[], Iterable[Tuple[str, str]]]) -> Send:
+    """Wrap send so the response start message gains headers.
+    
+    ``headers`` is called when the response starts, so values computed by
+    the app (timings, status) are current. Existing headers are replaced.
+    """
+    async def wrapped(message: Message):
+        if message["type"] == "http.response.start":
+            response_headers = MutableHeaders(scope=message)
+            for name, value in headers():
+                response_headers[name] = value
+        await send(message)
+    
+    return wrapped
+
+
+def bearer_token_payload(scope: Scope) -> Optional[Dict[str, Any]]:
+    """Verified claims of the request's Bearer token, or None.
+    
+    Decoded once per request and kept in request state, so middleware
+    running before authentication can key on the user without paying
+    for a second decode.
+    """
+    state = scope.setdefault("state", {})
+    if "token_payload" not in state:
+        auth_header = Headers(scope=scope).get("authorization", "")
+        token = auth_header[len("Bearer "):] if auth_header.startswith("Bearer ") else None
+        state["token_payload"] = verify_token(token) if token else None
+    return state["token_payload"]
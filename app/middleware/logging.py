@@ -1,146 +1,219 @@
 """Logging middleware for request/response tracking and performance metrics."""
+import random
 import time
 import json
-from typing import Dict, Optional
+from typing import Any, Dict, Optional
 from fastapi import Request
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
 from app.core.logging import get_logger, log_performance
+from app.core.path_matcher import PathMatcher
 
 # Get structured logger
 logger = get_logger("middleware.logging")
 
+SENSITIVE_HEADERS = ("authorization", "x-api-key", "cookie", "x-auth-token", "bearer")
+SENSITIVE_PARAMS = ("password", "token", "key", "secret", "api_key")
+BODY_METHODS = ("POST", "PUT", "PATCH")
+BODY_LOG_LIMIT = 1000  # bytes of request body kept for the log
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
-    """Request/response logging middleware with structured format."""
+# Share of requests logged per status class; errors are always logged
+DEFAULT_SAMPLE_RATES = {
+    "1xx": settings.request_log_sample_rate,
+    "2xx": settings.request_log_sample_rate,
+    "3xx": settings.request_log_sample_rate,
+    "4xx": 1.0,
+    "5xx": 1.0
+}
+
+
+# Scope fields a log entry copies; headers are copied separately
+LOGGED_SCOPE_FIELDS = ("type", "scheme", "server", "root_path", "path", "query_string", "method", "client")
+
+
+class RequestLogEntry:
+    """Request details rendered, with secrets redacted, only when a handler formats them.
+    
+    The scope fields are copied when the entry is created, since the log
+    writer thread formats it while the request may still be running.
+    """
+    __slots__ = ("scope", "user_id", "user", "body", "timestamp")
+    
+    def __init__(self, scope: Scope, user_id: Optional[str], user: Any, body: Optional[bytes], timestamp: float):
+        self.scope = {field: scope[field] for field in LOGGED_SCOPE_FIELDS if field in scope}
+        self.scope["headers"] = list(scope.get("headers", ()))
+        self.user_id = user_id
+        self.user = user
+        self.body = body
+        self.timestamp = timestamp
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """The logged fields, redacted."""
+        request = Request(self.scope)
+        headers = dict(request.headers)
+        query_params = dict(request.query_params)
+        
+        # Remove sensitive headers and query parameters
+        for header in SENSITIVE_HEADERS:
+            if header in headers:
+                headers[header] = "[REDACTED]"
+        for param in SENSITIVE_PARAMS:
+            if param in query_params:
+                query_params[param] = "[REDACTED]"
+        
+        log_data = {
+            "event": "request",
+            "method": request.method,
+            "url": str(request.url),
+            "path": request.url.path,
+            "query_params": query_params,
+            "headers": headers,
+            "client_ip": RequestLoggingMiddleware._get_client_ip(request),
+            "user_agent": headers.get("user-agent", ""),
+            "user_id": self.user_id,
+            "user_email": getattr(self.user, "email", None),
+            "timestamp": self.timestamp
+        }
+        
+        if self.body:
+            # Try to parse as JSON, otherwise log as string
+            try:
+                log_data["body"] = RequestLoggingMiddleware._sanitize_sensitive_data(json.loads(self.body))
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                log_data["body"] = self.body.decode(errors="replace")
+        return log_data
+    
+    def __str__(self) -> str:
+        return str(self.to_dict())
+
+
+class RequestLoggingMiddleware:
+    """Request/response logging middleware with structured format.
+    
+    Requests are sampled per status class once the response starts, with
+    per-route overrides keyed by path prefix (``{"/system": {"2xx": 0.01}}``).
+    Sampled requests log a RequestLogEntry that is only redacted and
+    formatted by the log writer thread, and at most BODY_LOG_LIMIT body
+    bytes are copied as the app reads them.
+    """
     
     def __init__(
         self,
-        app,
+        app: ASGIApp,
         log_requests: bool = True,
         log_responses: bool = True,
         log_body: bool = False,
-        exclude_paths: Optional[list] = None
+        exclude_paths: Optional[list] = None,
+        sample_rates: Optional[Dict[str, float]] = None,
+        route_sample_rates: Optional[Dict[str, Dict[str, float]]] = None
     ):
-        super().__init__(app)
+        self.app = app
         self.log_requests = log_requests
         self.log_responses = log_responses
         self.log_body = log_body
         self.exclude_paths = exclude_paths or ["/health", "/docs", "/redoc", "/openapi.json"]
+        self._excluded = PathMatcher(self.exclude_paths)
+        self.sample_rates = {**DEFAULT_SAMPLE_RATES, **(sample_rates or {})}
+        self.route_sample_rates = route_sample_rates or {}
+        self._route_rates = PathMatcher({
+            path: self._rates_by_class({**self.sample_rates, **rates})
+            for path, rates in self.route_sample_rates.items()
+        })
+        self._default_rates = self._rates_by_class(self.sample_rates)
     
-    async def dispatch(self, request: Request, call_next):
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
         """Log request and response with performance metrics."""
-        # Skip logging for excluded paths
-        if any(request.url.path.startswith(path) for path in self.exclude_paths):
-            return await call_next(request)
+        # Skip logging for non-HTTP traffic and excluded paths
+        if scope["type"] != "http" or scope["path"] in self._excluded:
+            await self.app(scope, receive, send)
+            return
         
         start_time = time.time()
         
-        # Log request
-        if self.log_requests:
-            await self._log_request(request)
+        # Keep the start of the body as the app reads it
+        body = None
+        if self.log_requests and self.log_body and scope["method"] in BODY_METHODS:
+            body = bytearray()
+            receive = self._capture(receive, body)
+        
+        async def send_logged(message: Message):
+            if message["type"] == "http.response.start":
+                # Calculate processing time up to the response headers
+                process_time = time.time() - start_time
+                
+                if self._sampled(scope["path"], message["status"]):
+                    self._log(scope, message["status"], process_time, body, start_time)
+                
+                # Add performance headers
+                message.setdefault("headers", []).append((b"x-process-time", f"{process_time:.3f}".encode()))
+            await send(message)
         
         # Process request
-        response = await call_next(request)
-        
-        # Calculate processing time
-        process_time = time.time() - start_time
-        
-        # Log response
-        if self.log_responses:
-            self._log_response(request, response, process_time)
-        
-        # Add performance headers
-        response.headers["X-Process-Time"] = f"{process_time:.3f}"
-        
-        return response
+        await self.app(scope, receive, send_logged)
     
-    async def _log_request(self, request: Request):
-        """Log incoming request details."""
-        # Get user info if available
-        user_id = getattr(request.state, 'user_id', None)
-        user_obj = getattr(request.state, 'user', {})
-        if hasattr(user_obj, 'email'):
-            user_email = user_obj.email
-        else:
-            user_email = None
-        
-        # Get client info
-        client_ip = self._get_client_ip(request)
-        user_agent = request.headers.get("user-agent", "")
-        
-        # Prepare log data
-        log_data = {
-            "event": "request",
-            "method": request.method,
-            "url": str(request.url),
-            "path": request.url.path,
-            "query_params": dict(request.query_params),
-            "headers": dict(request.headers),
-            "client_ip": client_ip,
-            "user_agent": user_agent,
-            "user_id": user_id,
-            "user_email": user_email,
-            "timestamp": time.time()
-        }
-        
-        # Log request body for POST/PUT requests (if enabled)
-        if self.log_body and request.method in ["POST", "PUT", "PATCH"]:
-            try:
-                body = await request.body()
-                if body:
-                    # Try to parse as JSON, otherwise log as string
-                    try:
-                        log_data["body"] = json.loads(body.decode())
-                    except (json.JSONDecodeError, UnicodeDecodeError):
-                        log_data["body"] = body.decode()[:1000]  # Limit body size
-            except Exception:
-                log_data["body"] = "Could not read body"
-        
-        # Remove sensitive headers and data
-        sensitive_headers = ["authorization", "x-api-key", "cookie", "x-auth-token", "bearer"]
-        for header in sensitive_headers:
-            if header in log_data["headers"]:
-                log_data["headers"][header] = "[REDACTED]"
+    @staticmethod
+    def _rates_by_class(rates: Dict[str, float]) -> Dict[int, float]:
+        """Map "2xx"-style keys to status classes."""
+        return {int(status_class[0]): rate for status_class, rate in rates.items()}
+    
+    def _sampled(self, path: str, status_code: int) -> bool:
+        """Whether this request is logged."""
+        rate = self._route_rates.match(path, self._default_rates).get(status_code // 100, 1.0)
+        return rate >= 1.0 or random.random() < rate
+    
+    @staticmethod
+    def _capture(receive: Receive, body: bytearray) -> Receive:
+        """A receive that copies up to BODY_LOG_LIMIT body bytes into body."""
+        async def capturing() -> Message:
+            message = await receive()
+            if message["type"] == "http.request" and len(body) < BODY_LOG_LIMIT:
+                body.extend(message.get("body", b"")[:BODY_LOG_LIMIT - len(body)])
+            return message
+        
+        return capturing
+    
+    def _log(self, scope: Scope, status_code: int, process_time: float, body: Optional[bytearray], start_time: float):
+        """Log a sampled request and its response."""
+        # Auth middleware runs inside this one, so the user is known by now
+        state = scope.get("state", {})
+        user_id = state.get("user_id")
         
-        # Remove sensitive query parameters
-        sensitive_params = ["password", "token", "key", "secret", "api_key"]
-        for param in sensitive_params:
-            if param in log_data["query_params"]:
-                log_data["query_params"][param] = "[REDACTED]"
+        if self.log_requests:
+            entry = RequestLogEntry(scope, user_id, state.get("user"), bytes(body) if body else None, start_time)
+            logger.info("HTTP request received: %s", entry)
         
-        logger.info("HTTP request received: %s", log_data)
+        if self.log_responses:
+            self._log_response(scope, user_id, status_code, process_time)
     
     @staticmethod
-    def _log_response(request: Request, response: Response, process_time: float):
+    def _log_response(scope: Scope, user_id: Optional[str], status_code: int, process_time: float):
         """Log response details and performance metrics."""
-        # Get user info if available
-        user_id = getattr(request.state, 'user_id', None)
-        
         log_data = {
             "event": "response",
-            "method": request.method,
-            "path": request.url.path,
-            "status_code": response.status_code,
+            "method": scope["method"],
+            "path": scope["path"],
+            "status_code": status_code,
             "process_time": round(process_time, 3),
             "user_id": user_id,
             "timestamp": time.time()
         }
         
         # Log level based on status code
-        if response.status_code >= 500:
+        if status_code >= 500:
             logger.error("HTTP response - server error: %s", log_data)
-        elif response.status_code >= 400:
+        elif status_code >= 400:
             logger.warning("HTTP response - client error: %s", log_data)
         else:
             logger.info("HTTP response - success: %s", log_data)
-            
+        
         # Log performance metrics
         log_performance(
             logger, 
-            f"{request.method} {request.url.path}", 
+            f"{scope['method']} {scope['path']}", 
             process_time,
-            {"status_code": response.status_code, "user_id": user_id}
+            {"status_code": status_code, "user_id": user_id}
         )
     
     @staticmethod
@@ -278,11 +351,12 @@ class AuditTrailMiddleware(BaseHTTPMiddleware):
             "/admin", "/wallet", "/verify/create", "/auth/register",
             "/auth/login", "/api-keys", "/webhooks"
         ]
+        self._sensitive = PathMatcher(self.sensitive_paths)
     
     async def dispatch(self, request: Request, call_next):
         """Create audit trail for sensitive operations."""
         # Check if this is a sensitive operation
-        is_sensitive = any(request.url.path.startswith(path) for path in self.sensitive_paths)
+        is_sensitive = request.url.path in self._sensitive
         
         if is_sensitive:
             await self._log_audit_event(request, "before")
@@ -1,30 +1,34 @@
 """Rate limiting middleware with configurable limits per endpoint."""
 import time
-from collections import defaultdict, deque
+from collections import deque
 from typing import Dict, Optional, Tuple
 from fastapi import Request, status
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core.path_matcher import PathMatcher
+from app.core.rate_limiter import SlidingWindowRateLimiter
+from app.middleware.asgi import bearer_token_payload, send_with_headers
 
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
+class RateLimitMiddleware:
     """Rate limiting middleware with IP-based and user-based strategies."""
     
     def __init__(
         self,
-        app,
+        app: ASGIApp,
         default_requests: int = 100,
         default_window: int = 3600,  # 1 hour
-        endpoint_limits: Optional[Dict[str, Tuple[int, int]]] = None
+        endpoint_limits: Optional[Dict[str, Tuple[int, int]]] = None,
+        limiter: Optional[SlidingWindowRateLimiter] = None
     ):
-        super().__init__(app)
+        self.app = app
         self.default_requests = default_requests
         self.default_window = default_window
         self.endpoint_limits = endpoint_limits or {}
         
-        # Storage for rate limit data
-        self.ip_requests = defaultdict(deque)
-        self.user_requests = defaultdict(deque)
+        # Counters live in Redis so limits hold across workers
+        self.limiter = limiter or SlidingWindowRateLimiter()
         
         # Endpoint-specific limits
         self.endpoint_limits.update({
@@ -35,60 +39,58 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
             "/wallet/paystack/initialize": (50, 3600),  # 50 payments per hour
             "/support/submit": (10, 3600),  # 10 support tickets per hour
         })
+        self._limit_rules = PathMatcher({
+            path: (path, requests, window) for path, (requests, window) in self.endpoint_limits.items()
+        })
+        
+        # Exclude public pages (exact) and docs/static assets (prefix) from rate limiting
+        self.public_paths = PathMatcher(
+            prefixes=["/docs", "/redoc", "/openapi.json", "/system/health", "/static"],
+            exact=["/", "/app", "/services", "/pricing", "/about", "/contact", "/admin", "/verification"]
+        )
     
-    async def dispatch(self, request: Request, call_next):
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
         """Apply rate limiting based on IP and user."""
         
-        # Exclude public pages from rate limiting
-        public_paths = [
-            "/", "/app", "/services", "/pricing", "/about", "/contact", "/admin",
-            "/docs", "/redoc", "/openapi.json", "/system/health",
-            "/static"  # Static files
-        ]
-        
-        # Skip rate limiting for public pages
-        if any(request.url.path.startswith(path) for path in public_paths):
-            return await call_next(request)
-        
-        current_time = time.time()
+        # Skip rate limiting for non-HTTP traffic and public pages
+        if scope["type"] != "http" or scope["path"] in self.public_paths:
+            await self.app(scope, receive, send)
+            return
         
-        # Get client identifier
+        # Get client identifier; this runs before JWT auth, so read the token itself
+        request = Request(scope)
         client_ip = self._get_client_ip(request)
-        user_id = getattr(request.state, 'user_id', None)
+        user_id = (bearer_token_payload(scope) or {}).get("user_id")
         
         # Get rate limit for this endpoint
-        requests_limit, window = self._get_endpoint_limit(request.url.path)
+        rule, requests_limit, window = self._get_endpoint_limit(scope["path"])
         
-        # Check IP-based rate limit
-        if not self._check_rate_limit(self.ip_requests[client_ip], requests_limit, window, current_time):
-            return self._create_rate_limit_response("IP rate limit exceeded")
-        
-        # Check user-based rate limit (if authenticated)
-        if user_id:
-            user_limit = requests_limit * 2  # Users get higher limits
-            if not self._check_rate_limit(self.user_requests[user_id], user_limit, window, current_time):
-                return self._create_rate_limit_response("User rate limit exceeded")
-        
-        # Record the request
-        self.ip_requests[client_ip].append(current_time)
+        # IP-based limit, plus a higher user-based limit when authenticated
+        limits = [(f"ip:{client_ip}:{rule}", requests_limit)]
         if user_id:
-            self.user_requests[user_id].append(current_time)
-        
-        # Clean old entries periodically
-        if int(current_time) % 60 == 0:  # Every minute
-            self._cleanup_old_entries(current_time)
-        
-        response = await call_next(request)
-        
-        # Add rate limit headers
-        remaining = self._get_remaining_requests(client_ip, user_id, requests_limit, window, current_time)
-        reset_time = int(current_time + window)
-        
-        response.headers["X-RateLimit-Limit"] = str(requests_limit)
-        response.headers["X-RateLimit-Remaining"] = str(remaining)
-        response.headers["X-RateLimit-Reset"] = str(reset_time)
+            limits.append((f"user:{user_id}:{rule}", requests_limit * 2))  # Users get higher limits
+        
+        result = await self.limiter.hit(limits, window)
+        
+        # Report the scope that governs this client
+        effective_limit = limits[-1][1]
+        headers = {
+            "X-RateLimit-Limit": str(effective_limit),
+            "X-RateLimit-Remaining": str(result.remaining[-1]),
+            "X-RateLimit-Reset": str(result.reset)
+        }
+        
+        if not result.allowed:
+            exhausted_ip = result.remaining[0] == 0
+            response = self._create_rate_limit_response(
+                "IP rate limit exceeded" if exhausted_ip or not user_id else "User rate limit exceeded",
+                headers,
+                max(1, result.reset - int(time.time()))
+            )
+            await response(scope, receive, send)
+            return
         
-        return response
+        await self.app(scope, receive, send_with_headers(send, headers.items))
     
     @staticmethod
     def _get_client_ip(request: Request) -> str:
@@ -105,82 +107,23 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         # Fallback to direct client IP
         return request.client.host if request.client else "unknown"
     
-    def _get_endpoint_limit(self, path: str) -> Tuple[int, int]:
-        """Get rate limit for specific endpoint."""
-        # Check exact path match
-        if path in self.endpoint_limits:
-            return self.endpoint_limits[path]
-        
-        # Check prefix matches
-        for endpoint_path, limit in self.endpoint_limits.items():
-            if path.startswith(endpoint_path):
-                return limit
-        
-        # Return default limit
-        return self.default_requests, self.default_window
+    def _get_endpoint_limit(self, path: str) -> Tuple[str, int, int]:
+        """Get the most specific matching rule name and rate limit for an endpoint."""
+        return self._limit_rules.match(path) or ("default", self.default_requests, self.default_window)
     
     @staticmethod
-    def _check_rate_limit(request_times: deque, limit: int, window: int, current_time: float) -> bool:
-        """Check if request is within rate limit."""
-        # Remove old requests outside the window
-        while request_times and request_times[0] <= current_time - window:
-            request_times.popleft()
-        
-        # Check if under limit
-        return len(request_times) < limit
-    
-    def _get_remaining_requests(self, client_ip: str, user_id: Optional[str], limit: int, window: int, current_time: float) -> int:
-        """Get remaining requests for client."""
-        # Use user-based limit if authenticated, otherwise IP-based
-        if user_id:
-            request_times = self.user_requests[user_id]
-            effective_limit = limit * 2
-        else:
-            request_times = self.ip_requests[client_ip]
-            effective_limit = limit
-        
-        # Remove old requests
-        while request_times and request_times[0] <= current_time - window:
-            request_times.popleft()
-        
-        return max(0, effective_limit - len(request_times))
-    
-    def _cleanup_old_entries(self, current_time: float):
-        """Clean up old entries to prevent memory leaks."""
-        max_window = max(self.default_window, max((w for _, w in self.endpoint_limits.values()), default=0))
-        cutoff_time = current_time - max_window
-        
-        # Clean IP requests
-        for ip in list(self.ip_requests.keys()):
-            request_times = self.ip_requests[ip]
-            while request_times and request_times[0] <= cutoff_time:
-                request_times.popleft()
-            
-            # Remove empty entries
-            if not request_times:
-                del self.ip_requests[ip]
-        
-        # Clean user requests
-        for user_id in list(self.user_requests.keys()):
-            request_times = self.user_requests[user_id]
-            while request_times and request_times[0] <= cutoff_time:
-                request_times.popleft()
-            
-            # Remove empty entries
-            if not request_times:
-                del self.user_requests[user_id]
-    
-    def _create_rate_limit_response(self, message: str) -> JSONResponse:
+    def _create_rate_limit_response(message: str, headers: Dict[str, str], retry_after: int) -> JSONResponse:
         """Create rate limit exceeded response."""
         return JSONResponse(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             content={
                 "error": "Rate limit exceeded",
                 "message": message,
-                "retry_after": self.default_window
+                "retry_after": retry_after
             },
             headers={
-                "Retry-After": str(self.default_window)
+                **headers,
+                "Retry-After": str(retry_after)
             }
         )
 
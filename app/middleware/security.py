@@ -1,39 +1,103 @@
 """Security middleware for authentication and authorization."""
-from typing import Optional, List
+from typing import Dict, FrozenSet, Optional, List, Tuple, Union
 from fastapi import Request, status
 from fastapi.security import HTTPBearer
+from starlette.datastructures import Headers
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from app.core.config import settings
-from app.core.database import SessionLocal
-from app.services.auth_service import AuthService
+from app.core.api_key_cache import api_key_cache, load_api_key_principal
+from app.core.path_matcher import PathMatcher
+from app.core.principal_cache import Principal, principal_cache, resolve_principal_async, token_cache_key
+from app.middleware.asgi import bearer_token_payload, send_with_headers
+from app.utils.security import hash_api_key
 
+# Methods that may reach a method-restricted public path without a token
+READ_METHODS = frozenset({"GET", "HEAD"})
 
-class JWTAuthMiddleware(BaseHTTPMiddleware):
+API_KEY_HEADER = "X-API-Key"
+
+
+async def api_key_principal(api_key: str) -> Optional[Principal]:
+    """Owner of an API key; known keys and known-bad keys skip the database."""
+    key_hash = hash_api_key(api_key)
+    hit, principal = await api_key_cache.get(key_hash)
+    if not hit:
+        principal = None
+        if api_key.startswith("nsk_"):
+            principal = await load_api_key_principal(key_hash)
+        if principal is not None:
+            await api_key_cache.set(key_hash, principal)
+        else:
+            await api_key_cache.set_invalid(key_hash)
+    return principal
+
+
+class JWTAuthMiddleware:
     """JWT authentication middleware for protected endpoints."""
     
-    def __init__(self, app, exclude_paths: Optional[List[str]] = None):
-        super().__init__(app)
+    def __init__(
+        self,
+        app: ASGIApp,
+        exclude_paths: Optional[List[str]] = None,
+        exclude_exact: Optional[Dict[str, Union[bool, FrozenSet[str]]]] = None
+    ):
+        self.app = app
+        # Prefix rules: the path itself and everything below it
         self.exclude_paths = exclude_paths or [
-            "/docs", "/redoc", "/openapi.json", "/health", 
-            "/", "/app", "/services", "/pricing", "/about", "/contact", "/admin",
+            "/docs", "/redoc", "/openapi.json", "/health", "/static", "/admin",
             "/auth/login", "/auth/register", "/auth/google",
-            "/auth/forgot-password", "/auth/reset-password", "/auth/verify",
+            "/auth/forgot-password", "/auth/reset-password", "/auth/verify-email",
             "/services/list", "/services/price", "/services/status",
-            "/wallet/paystack/webhook", "/support/submit", "/system/health"
+            "/verify/services", "/verify/quote", "/countries",
+            "/wallet/paystack/webhook", "/support/submit", "/system", "/setup"
         ]
+        # Exact rules; False keeps a path protected when a pattern would match it,
+        # a set of methods makes it public for those methods only
+        self.exclude_exact = exclude_exact or {
+            "/": True, "/app": True, "/services": True, "/pricing": True,
+            "/about": True, "/contact": True, "/verification": True,
+            "/verify/{verification_id}": READ_METHODS,  # DELETE cancels and refunds
+            "/verify/{verification_id}/messages": READ_METHODS,
+            "/verify/{verification_id}/voice": READ_METHODS,
+            "/verify/{verification_id}/stream": READ_METHODS,
+            "/verify/create": False, "/verify/history": False, "/verify/rentals": False
+        }
+        self.public_paths = PathMatcher(self.exclude_paths, self.exclude_exact)
         self.security = HTTPBearer(auto_error=False)
     
-    async def dispatch(self, request: Request, call_next):
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
         """Process request with JWT authentication."""
-        # Skip authentication for excluded paths
-        if any(request.url.path.startswith(path) for path in self.exclude_paths):
-            return await call_next(request)
+        # Skip authentication for non-HTTP traffic, excluded paths and CORS preflights
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or self._is_public(scope):
+            await self.app(scope, receive, send)
+            return
         
-        # Extract authorization header
+        rejection = await self._authenticate(Request(scope))
+        if rejection is not None:
+            await rejection(scope, receive, send)
+            return
+        
+        await self.app(scope, receive, send)
+    
+    def _is_public(self, scope: Scope) -> bool:
+        """Whether the path, for this method, is excluded from authentication."""
+        rule = self.public_paths.match(scope["path"], False)
+        if isinstance(rule, bool):
+            return rule
+        return scope["method"] in rule
+    
+    @staticmethod
+    async def _authenticate(request: Request) -> Optional[JSONResponse]:
+        """Attach the caller's principal to request state, or return the rejection."""
+        # Extract authorization header; programmatic clients may send an API key instead
         auth_header = request.headers.get("authorization")
         if not auth_header or not auth_header.startswith("Bearer "):
+            api_key = request.headers.get(API_KEY_HEADER)
+            if api_key:
+                return await JWTAuthMiddleware._authenticate_api_key(request, api_key)
             return JSONResponse(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 content={"error": "Authentication required", "message": "Missing or invalid authorization header"}
@@ -41,43 +105,74 @@ class JWTAuthMiddleware(BaseHTTPMiddleware):
         
         token = auth_header.split(" ")[1]
         
-        # Validate token and get user
-        db = SessionLocal()
+        # Decode once per request; cached principals keep hot paths free of DB queries
+        payload = bearer_token_payload(request.scope)
         try:
-            auth_service = AuthService(db)
-            user = auth_service.get_user_from_token(token)
+            principal = None
+            if payload:
+                principal = principal_cache.get(token_cache_key(token, payload))
+                if principal is None:
+                    principal = await resolve_principal_async(token, payload)
             
-            if not user:
+            if not principal:
                 return JSONResponse(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     content={"error": "Invalid token", "message": "Token is invalid or expired"}
                 )
             
-            if not user.is_active:
+            if not principal.is_active:
                 return JSONResponse(
                     status_code=status.HTTP_403_FORBIDDEN,
                     content={"error": "Account disabled", "message": "User account is disabled"}
                 )
             
             # Add user info to request state
-            request.state.user = user
-            request.state.user_id = user.id
-            
+            request.state.principal = principal
+            request.state.user = principal
+            request.state.user_id = principal.user_id
+        
         except Exception as e:
             return JSONResponse(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 content={"error": "Authentication failed", "message": str(e)}
             )
-        finally:
-            db.close()
         
-        return await call_next(request)
+        return None
+    
+    @staticmethod
+    async def _authenticate_api_key(request: Request, api_key: str) -> Optional[JSONResponse]:
+        """Attach the API key owner's principal to request state, or return the rejection."""
+        try:
+            principal = await api_key_principal(api_key)
+        except Exception as e:
+            return JSONResponse(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                content={"error": "Authentication failed", "message": str(e)}
+            )
+        
+        if not principal:
+            return JSONResponse(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                content={"error": "Invalid API key", "message": "API key is invalid or revoked"}
+            )
+        
+        if not principal.is_active:
+            return JSONResponse(
+                status_code=status.HTTP_403_FORBIDDEN,
+                content={"error": "Account disabled", "message": "User account is disabled"}
+            )
+        
+        request.state.principal = principal
+        request.state.user = principal
+        request.state.user_id = principal.user_id
+        request.state.auth_method = "api_key"
+        return None
 
 
 class APIKeyAuthMiddleware(BaseHTTPMiddleware):
     """API key authentication middleware for programmatic access."""
     
-    def __init__(self, app, api_key_header: str = "X-API-Key"):
+    def __init__(self, app, api_key_header: str = API_KEY_HEADER):
         super().__init__(app)
         self.api_key_header = api_key_header
     
@@ -91,21 +186,17 @@ class APIKeyAuthMiddleware(BaseHTTPMiddleware):
         if not api_key:
             return await call_next(request)
         
-        # Validate API key
-        db = SessionLocal()
         try:
-            auth_service = AuthService(db)
-            user = auth_service.verify_api_key(api_key)
+            principal = await api_key_principal(api_key)
             
-            if user:
-                request.state.user = user
-                request.state.user_id = user.id
+            if principal and principal.is_active:
+                request.state.principal = principal
+                request.state.user = principal
+                request.state.user_id = principal.user_id
                 request.state.auth_method = "api_key"
-            
+        
         except Exception:
             pass  # Continue without authentication
-        finally:
-            db.close()
         
         return await call_next(request)
 
@@ -116,11 +207,12 @@ class AdminRoleMiddleware(BaseHTTPMiddleware):
     def __init__(self, app, admin_paths: Optional[List[str]] = None):
         super().__init__(app)
         self.admin_paths = admin_paths or ["/admin"]
+        self._admin_matcher = PathMatcher(self.admin_paths)
     
     async def dispatch(self, request: Request, call_next):
         """Check admin role for admin endpoints."""
         # Check if this is an admin path
-        is_admin_path = any(request.url.path.startswith(path) for path in self.admin_paths)
+        is_admin_path = request.url.path in self._admin_matcher
         
         if is_admin_path:
             # Ensure user is authenticated
@@ -140,18 +232,18 @@ class AdminRoleMiddleware(BaseHTTPMiddleware):
         return await call_next(request)
 
 
-class CORSMiddleware(BaseHTTPMiddleware):
+class CORSMiddleware:
     """CORS middleware with proper origin validation."""
     
     def __init__(
         self, 
-        app, 
+        app: ASGIApp, 
         allowed_origins: Optional[List[str]] = None,
         allowed_methods: Optional[List[str]] = None,
         allowed_headers: Optional[List[str]] = None,
         allow_credentials: bool = True
     ):
-        super().__init__(app)
+        self.app = app
         self.allowed_origins = allowed_origins or ["*"]
         self.allowed_methods = allowed_methods or ["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"]
         self.allowed_headers = allowed_headers or [
@@ -159,46 +251,54 @@ class CORSMiddleware(BaseHTTPMiddleware):
             "Authorization", "X-API-Key", "X-Requested-With"
         ]
         self.allow_credentials = allow_credentials
+        
+        # Everything except the echoed origin is the same for every response
+        self._headers: List[Tuple[str, str]] = [
+            ("Access-Control-Allow-Methods", ", ".join(self.allowed_methods)),
+            ("Access-Control-Allow-Headers", ", ".join(self.allowed_headers))
+        ]
+        if self.allow_credentials:
+            self._headers.append(("Access-Control-Allow-Credentials", "true"))
+        
+        # Security headers
+        self._headers += [
+            ("X-Content-Type-Options", "nosniff"),
+            ("X-Frame-Options", "DENY"),
+            ("X-XSS-Protection", "1; mode=block"),
+            ("Referrer-Policy", "strict-origin-when-cross-origin")
+        ]
+        if settings.environment == "production":
+            self._headers.append(("Strict-Transport-Security", "max-age=31536000; includeSubDomains"))
     
-    async def dispatch(self, request: Request, call_next):
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
         """Handle CORS headers."""
-        origin = request.headers.get("origin")
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        headers = self._response_headers(Headers(scope=scope).get("origin"))
         
         # Handle preflight requests
-        if request.method == "OPTIONS":
-            response = JSONResponse(content={})
-        else:
-            response = await call_next(request)
+        if scope["method"] == "OPTIONS":
+            response = JSONResponse(content={}, headers=dict(headers))
+            await response(scope, receive, send)
+            return
         
-        # Set CORS headers
+        await self.app(scope, receive, send_with_headers(send, lambda: headers))
+    
+    def _response_headers(self, origin: Optional[str]) -> List[Tuple[str, str]]:
+        """CORS and security headers for a request from origin."""
         if (origin and ("*" in self.allowed_origins or origin in self.allowed_origins or 
             (settings.environment == "development" and ("localhost" in origin or "127.0.0.1" in origin)))):
-            response.headers["Access-Control-Allow-Origin"] = origin
-        
-        response.headers["Access-Control-Allow-Methods"] = ", ".join(self.allowed_methods)
-        response.headers["Access-Control-Allow-Headers"] = ", ".join(self.allowed_headers)
-        
-        if self.allow_credentials:
-            response.headers["Access-Control-Allow-Credentials"] = "true"
-        
-        # Security headers
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        
-        if settings.environment == "production":
-            response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-        
-        return response
+            return [("Access-Control-Allow-Origin", origin)] + self._headers
+        return self._headers
 
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
+class SecurityHeadersMiddleware:
     """Security headers middleware."""
     
-    async def dispatch(self, request: Request, call_next):
-        """Add security headers to all responses."""
-        response = await call_next(request)
+    def __init__(self, app: ASGIApp):
+        self.app = app
         
         # Enhanced Content Security Policy
         csp_policy = (
@@ -213,14 +313,22 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
             "base-uri 'self';"
         )
         
-        response.headers["Content-Security-Policy"] = csp_policy
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+        self._headers: List[Tuple[str, str]] = [
+            ("Content-Security-Policy", csp_policy),
+            ("X-Content-Type-Options", "nosniff"),
+            ("X-Frame-Options", "DENY"),
+            ("X-XSS-Protection", "1; mode=block"),
+            ("Referrer-Policy", "strict-origin-when-cross-origin")
+        ]
         
         # HSTS for production
         if settings.environment == "production":
-            response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains; preload"
+            self._headers.append(("Strict-Transport-Security", "max-age=31536000; includeSubDomains; preload"))
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        """Add security headers to all responses."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         
-        return response
\ No newline at end of file
+        await self.app(scope, receive, send_with_headers(send, lambda: self._headers))
@@ -14,6 +14,7 @@ from .system import (
     ServiceStatus, SupportTicket, ActivityLog, 
     BannedNumber, InAppNotification
 )
+from .stats import UserDailyStats
 
 __all__ = [
     # Base
@@ -31,5 +32,8 @@ __all__ = [
     
     # System models
     "ServiceStatus", "SupportTicket", "ActivityLog",
-    "BannedNumber", "InAppNotification"
+    "BannedNumber", "InAppNotification",
+    
+    # Reporting models
+    "UserDailyStats"
 ]
\ No newline at end of file
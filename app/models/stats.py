@@ -0,0 +1,30 @@
+"""Pre-aggregated reporting models."""
+from sqlalchemy import Column, String, Float, Integer, Date, Index
+from app.models.base import Base
+
+
+class UserDailyStats(Base):
+    """Per-user, per-day, per-service verification and spend counters.
+    
+    Verification counters are bucketed by the verification's creation day
+    and service; money counters live on the row with an empty service_name
+    and are bucketed by the transaction's day. Maintained incrementally by
+    app.services.daily_stats.
+    """
+    __tablename__ = "user_daily_stats"
+    __table_args__ = (
+        Index("ix_user_daily_stats_day", "day"),
+    )
+    
+    user_id = Column(String, primary_key=True)
+    day = Column(Date, primary_key=True)  # UTC calendar day
+    service_name = Column(String, primary_key=True, default="")  # "" holds the account-level money counters
+    verifications = Column(Integer, default=0, nullable=False)
+    completed = Column(Integer, default=0, nullable=False)
+    failed = Column(Integer, default=0, nullable=False)
+    timed_out = Column(Integer, default=0, nullable=False)
+    cancelled = Column(Integer, default=0, nullable=False)
+    verification_cost = Column(Float, default=0.0, nullable=False)
+    spent = Column(Float, default=0.0, nullable=False)  # debits, as a positive amount
+    refunded = Column(Float, default=0.0, nullable=False)
+    funded = Column(Float, default=0.0, nullable=False)  # credits: payments, bonuses, adjustments
@@ -11,6 +11,7 @@ class Transaction(BaseModel):
     amount = Column(Float, nullable=False)
     type = Column(String, nullable=False, index=True)  # credit, debit
     description = Column(String)
+    idempotency_key = Column(String, unique=True, index=True)  # set by CreditLedger callers
 
 
 class PaymentLog(BaseModel):
@@ -12,6 +12,7 @@ class User(BaseModel):
     credits = Column(Float, default=0.0, nullable=False)
     free_verifications = Column(Float, default=1.0, nullable=False)
     is_admin = Column(Boolean, default=False, nullable=False)
+    is_active = Column(Boolean, default=True)  # NULL on rows created before the mapping; treated as active
     email_verified = Column(Boolean, default=False, nullable=False)
     verification_token = Column(String)
     reset_token = Column(String)
@@ -26,9 +27,11 @@ class APIKey(BaseModel):
     __tablename__ = "api_keys"
     
     user_id = Column(String, nullable=False, index=True)
-    key = Column(String, unique=True, nullable=False, index=True)
+    key_prefix = Column(String, nullable=False, index=True)
+    key_hash = Column(String, unique=True, nullable=False, index=True)  # SHA-256; the key itself is never stored
     name = Column(String, nullable=False)
     is_active = Column(Boolean, default=True, nullable=False)
+    last_used = Column(DateTime)
 
 
 class Webhook(BaseModel):
@@ -1,5 +1,5 @@
 """Verification-related database models."""
-from sqlalchemy import Column, String, Float, DateTime, Boolean
+from sqlalchemy import Column, String, Float, DateTime, Boolean, Index
 from app.models.base import BaseModel
 
 
@@ -21,6 +21,11 @@ class Verification(BaseModel):
     requested_carrier = Column(String)
     requested_area_code = Column(String)
     completed_at = Column(DateTime)
+    
+    __table_args__ = (
+        # Keyset pagination of a user's history, newest first
+        Index("ix_verifications_user_created_id", "user_id", "created_at", "id"),
+    )
 
 
 class NumberRental(BaseModel):
@@ -13,7 +13,8 @@ from .auth import (
 from .verification import (
     VerificationCreate, VerificationResponse, MessageResponse,
     NumberRentalRequest, NumberRentalResponse, ExtendRentalRequest,
-    RetryVerificationRequest, ServicePriceResponse, VerificationHistoryResponse
+    RetryVerificationRequest, ServicePriceResponse, VerificationHistoryResponse,
+    QuoteItem, QuoteRequest, QuoteResponse, QuoteListResponse
 )
 
 # Payment schemas
@@ -31,7 +32,7 @@ from .common import (
     HealthCheck, ServiceStatus, ServiceStatusSummary,
     NotificationResponse, NotificationPreferences,
     AnalyticsResponse, SupportTicketCreate, SupportTicketResponse,
-    ExportRequest
+    ExportRequest, ExportJobResponse
 )
 
 # Validation utilities
@@ -55,6 +56,7 @@ __all__ = [
     "VerificationCreate", "VerificationResponse", "MessageResponse",
     "NumberRentalRequest", "NumberRentalResponse", "ExtendRentalRequest",
     "RetryVerificationRequest", "ServicePriceResponse", "VerificationHistoryResponse",
+    "QuoteItem", "QuoteRequest", "QuoteResponse", "QuoteListResponse",
     
     # Payment
     "PaymentInitialize", "PaymentInitializeResponse",
@@ -68,7 +70,7 @@ __all__ = [
     "HealthCheck", "ServiceStatus", "ServiceStatusSummary",
     "NotificationResponse", "NotificationPreferences",
     "AnalyticsResponse", "SupportTicketCreate", "SupportTicketResponse",
-    "ExportRequest",
+    "ExportRequest", "ExportJobResponse",
     
     # Validators
     "validate_phone_number", "validate_service_name", "validate_currency_amount",
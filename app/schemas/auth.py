@@ -159,7 +159,7 @@ class APIKeyListResponse(BaseModel):
             "example": {
                 "id": "key_1642680000000",
                 "name": "Production API Key",
-                "key_preview": "nsk_abc123...def456",
+                "key_preview": "nsk_abc12345...",
                 "is_active": True,
                 "created_at": "2024-01-20T10:00:00Z",
                 "last_used": "2024-01-20T15:30:00Z"
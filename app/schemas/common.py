@@ -189,8 +189,8 @@ class NotificationPreferences(BaseModel):
 
 class AnalyticsResponse(BaseModel):
     """Schema for analytics data."""
-    total_users: int = Field(..., description="Total users count")
-    new_users: int = Field(..., description="New users in period")
+    total_users: Optional[int] = Field(None, description="Total users count")
+    new_users: Optional[int] = Field(None, description="New users in period")
     total_verifications: int = Field(..., description="Total verifications count")
     success_rate: float = Field(..., description="Success rate percentage")
     total_spent: float = Field(..., description="Total amount spent")
@@ -274,22 +274,49 @@ class SupportTicketResponse(BaseModel):
 
 class ExportRequest(BaseModel):
     """Schema for data export request."""
-    format: str = Field(default="csv", description="Export format: csv or json")
+    data_type: str = Field(default="verifications", description="Data type: verifications or transactions")
+    format: str = Field(default="csv", description="Export format: csv, ndjson or json")
     date_from: Optional[datetime] = Field(None, description="Start date for export")
     date_to: Optional[datetime] = Field(None, description="End date for export")
     
+    @validator('data_type')
+    def validate_data_type(cls, v):
+        if v not in ['verifications', 'transactions']:
+            raise ValueError('Data type must be verifications or transactions')
+        return v
+    
     @validator('format')
     def validate_format(cls, v):
-        if v not in ['csv', 'json']:
-            raise ValueError('Format must be csv or json')
+        if v not in ['csv', 'ndjson', 'json']:
+            raise ValueError('Format must be csv, ndjson or json')
         return v
     
     model_config = {
         "json_schema_extra": {
             "example": {
+                "data_type": "verifications",
                 "format": "csv",
                 "date_from": "2024-01-01T00:00:00Z",
                 "date_to": "2024-01-31T23:59:59Z"
             }
         }
-    }
\ No newline at end of file
+    }
+
+
+class ExportJobResponse(BaseModel):
+    """Schema for background export job status."""
+    id: str
+    data_type: str
+    output_format: str
+    status: str = Field(..., description="queued, running, completed or failed")
+    rows: int = Field(..., description="Rows written so far")
+    bytes_written: int = Field(..., description="Compressed bytes written so far")
+    error: Optional[str]
+    created_at: datetime
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+    queue_seconds: Optional[float] = Field(None, description="Time spent waiting for a worker")
+    run_seconds: Optional[float] = Field(None, description="Time spent exporting")
+    rows_per_second: Optional[float]
+    filename: Optional[str] = Field(None, description="Set once the file can be downloaded")
+    download_url: Optional[str] = None
@@ -234,10 +234,71 @@ class ServicePriceResponse(BaseModel):
     }
 
 
+class QuoteItem(BaseModel):
+    """One service/country/capability combination to price."""
+    service_name: str = Field(..., min_length=1, description="Service name (e.g., telegram, whatsapp)")
+    country: str = Field(default="US", description="Country code for verification")
+    capability: str = Field(default="sms", description="Verification type: sms or voice")
+    
+    @validator('capability')
+    def validate_capability(cls, v):
+        if v not in ['sms', 'voice']:
+            raise ValueError('Capability must be sms or voice')
+        return v
+    
+    @validator('country')
+    def validate_country(cls, v):
+        if not v or len(v) != 2:
+            raise ValueError('Country must be a 2-letter code')
+        return v.upper()
+    
+    @validator('service_name')
+    def validate_service_name(cls, v):
+        return v.lower().strip()
+
+
+class QuoteRequest(BaseModel):
+    """Schema for bulk price quotes."""
+    items: List[QuoteItem] = Field(..., min_length=1, max_length=500)
+    
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "items": [
+                    {"service_name": "telegram", "country": "US", "capability": "sms"},
+                    {"service_name": "whatsapp", "country": "GB", "capability": "voice"}
+                ]
+            }
+        }
+    }
+
+
+class QuoteResponse(BaseModel):
+    """Schema for a single price quote."""
+    service_name: str
+    country: str
+    capability: str
+    service_id: int
+    base_price: float
+    country_multiplier: float
+    tier: str
+    price: Optional[float]
+    voice_supported: bool
+    available: bool
+
+
+class QuoteListResponse(BaseModel):
+    """Schema for bulk price quotes response."""
+    quotes: List[QuoteResponse]
+    total_price: float
+
+
 class VerificationHistoryResponse(BaseModel):
     """Schema for verification history."""
     verifications: List[VerificationResponse]
-    total_count: int
+    total_count: Optional[int] = Field(None, description="Matching rows, capped; null when include_total is false")
+    total_count_is_estimate: bool = Field(False, description="True when total_count stopped at the count cap")
+    next_cursor: Optional[str] = Field(None, description="Pass as cursor to fetch the next page")
     
     model_config = {
         "json_schema_extra": {
@@ -254,7 +315,9 @@ class VerificationHistoryResponse(BaseModel):
                         "completed_at": "2024-01-20T10:05:00Z"
                     }
                 ],
-                "total_count": 1
+                "total_count": 1,
+                "total_count_is_estimate": False,
+                "next_cursor": None
             }
         }
     }
\ No newline at end of file
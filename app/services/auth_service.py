@@ -7,8 +7,10 @@ from app.models.user import User, APIKey
 from app.services.base import BaseService
 from app.utils.security import (
     hash_password, verify_password, create_access_token, 
-    verify_token, generate_api_key, generate_secure_id
+    verify_token, generate_api_key, generate_secure_id,
+    hash_api_key, api_key_prefix
 )
+from app.core.api_key_cache import api_key_cache
 from app.core.exceptions import ValidationError
 
 
@@ -73,31 +75,29 @@ class AuthService(BaseService[User]):
         return self.get_by_id(user_id)
     
     def create_api_key(self, user_id: str, name: str) -> APIKey:
-        """Create API key for user."""
+        """Create API key for user; the plain key is only available on the result."""
+        key = f"nsk_{generate_api_key()}"
         api_key = APIKey(
             user_id=user_id,
-            key=f"nsk_{generate_api_key()}",
+            key_prefix=api_key_prefix(key),
+            key_hash=hash_api_key(key),
             name=name
         )
         self.db.add(api_key)
         self.db.commit()
         self.db.refresh(api_key)
+        api_key.key = key  # not persisted; shown to the user once
         return api_key
     
     def verify_api_key(self, key: str) -> Optional[User]:
         """Verify API key and return associated user."""
-        api_key = self.db.query(APIKey).filter(
-            APIKey.key == key,
+        return self.db.query(User).join(APIKey, APIKey.user_id == User.id).filter(
+            APIKey.key_hash == hash_api_key(key),
             APIKey.is_active.is_(True)
         ).first()
-        
-        if not api_key:
-            return None
-        
-        return self.get_by_id(api_key.user_id)
     
     def deactivate_api_key(self, key_id: str, user_id: str) -> bool:
-        """Deactivate API key for user."""
+        """Deactivate API key for user and revoke any cached lookups of it."""
         api_key = self.db.query(APIKey).filter(
             APIKey.id == key_id,
             APIKey.user_id == user_id
@@ -106,10 +106,18 @@ class AuthService(BaseService[User]):
         if not api_key:
             return False
         
+        key_hash = api_key.key_hash
         self.db.delete(api_key)
         self.db.commit()
+        api_key_cache.revoke(key_hash)
         return True
     
+    def revoke_cached_api_keys(self, user_id: str):
+        """Revoke cached lookups of all a user's keys, e.g. after suspension."""
+        api_key_cache.invalidate_user(user_id)
+        for (key_hash,) in self.db.query(APIKey.key_hash).filter(APIKey.user_id == user_id):
+            api_key_cache.revoke(key_hash)
+    
     def get_user_api_keys(self, user_id: str) -> list[APIKey]:
         """Get all API keys for user."""
         return self.db.query(APIKey).filter(APIKey.user_id == user_id).all()
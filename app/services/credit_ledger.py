@@ -0,0 +1,164 @@
+"""Atomic credit ledger: conditional balance updates with idempotency keys."""
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.exceptions import InsufficientCreditsError, ValidationError
+from app.models.transaction import Transaction
+from app.models.user import User
+
+
+@dataclass(frozen=True)
+class LedgerEntry:
+    """Result of one ledger operation."""
+    transaction_id: Optional[str]
+    amount: float  # signed change applied to the balance
+    balance: Optional[float]  # None when replayed; the balance may have moved since
+    replayed: bool = False  # the idempotency key was already used
+
+
+class CreditLedger:
+    """Debit and credit user balances in single conditional statements.
+    
+    Each operation is one ``UPDATE ... RETURNING credits`` plus its
+    Transaction row inside a savepoint, so no balance is read into Python
+    and no row lock outlives the statement. Callers own the surrounding
+    transaction and commit it together with their own rows.
+    """
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def debit(
+        self,
+        user_id: str,
+        amount: float,
+        description: str,
+        idempotency_key: Optional[str] = None
+    ) -> LedgerEntry:
+        """Take credits if the balance covers them; raise InsufficientCreditsError otherwise."""
+        return await self._apply(user_id, -amount, "debit", description, idempotency_key)
+    
+    async def credit(
+        self,
+        user_id: str,
+        amount: float,
+        description: str,
+        idempotency_key: Optional[str] = None,
+        transaction_type: str = "credit"
+    ) -> LedgerEntry:
+        """Add credits to a balance."""
+        return await self._apply(user_id, amount, transaction_type, description, idempotency_key)
+    
+    async def refund(self, user_id: str, amount: float, description: str, idempotency_key: str) -> LedgerEntry:
+        """Return debited credits; the key makes repeated refunds no-ops."""
+        return await self.credit(user_id, amount, description, idempotency_key, transaction_type="refund")
+    
+    async def return_verification(
+        self,
+        user_id: str,
+        verification_id: str,
+        cost: float,
+        description: str
+    ) -> LedgerEntry:
+        """Give back what a verification consumed: its cost, or the free verification it used.
+        
+        Refunds are keyed per verification, but restoring a free verification
+        is not; call this only from the status change that ends it.
+        """
+        if cost:
+            return await self.refund(user_id, cost, description, idempotency_key=verification_refund_key(verification_id))
+        
+        await self.restore_free_verification(user_id)
+        balance = await self.db.scalar(select(User.credits).where(User.id == user_id))
+        return LedgerEntry(transaction_id=None, amount=0.0, balance=balance)
+    
+    async def use_free_verification(self, user_id: str) -> bool:
+        """Consume one free verification if the user has any left."""
+        used = await self.db.execute(
+            update(User)
+            .where(User.id == user_id, User.free_verifications > 0)
+            .values(free_verifications=User.free_verifications - 1)
+            .returning(User.id)
+        )
+        return used.first() is not None
+    
+    async def restore_free_verification(self, user_id: str):
+        """Give back a free verification consumed by a failed purchase."""
+        await self.db.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(free_verifications=User.free_verifications + 1)
+        )
+    
+    async def _apply(
+        self,
+        user_id: str,
+        amount: float,
+        transaction_type: str,
+        description: str,
+        idempotency_key: Optional[str]
+    ) -> LedgerEntry:
+        """Apply a signed change and record it, unless the key was already used."""
+        if idempotency_key:
+            existing = await self._find(idempotency_key)
+            if existing is not None:
+                return existing
+        
+        statement = update(User).where(User.id == user_id)
+        if amount < 0:
+            statement = statement.where(User.credits >= -amount)
+        statement = statement.values(credits=User.credits + amount).returning(User.credits)
+        
+        try:
+            async with self.db.begin_nested():
+                balance = (await self.db.execute(statement)).scalar_one_or_none()
+                if balance is None:
+                    raise await self._rejection(user_id, -amount)
+                
+                transaction = Transaction(
+                    user_id=user_id,
+                    amount=amount,
+                    type=transaction_type,
+                    description=description,
+                    idempotency_key=idempotency_key
+                )
+                self.db.add(transaction)
+                await self.db.flush()
+        except IntegrityError:
+            # A concurrent request with the same key won; the savepoint undid our update
+            existing = await self._find(idempotency_key) if idempotency_key else None
+            if existing is None:
+                raise
+            return existing
+        
+        return LedgerEntry(transaction_id=transaction.id, amount=float(amount), balance=float(balance))
+    
+    async def _find(self, idempotency_key: str) -> Optional[LedgerEntry]:
+        """Look up the entry already recorded under an idempotency key."""
+        row = (await self.db.execute(
+            select(Transaction.id, Transaction.amount).where(Transaction.idempotency_key == idempotency_key)
+        )).first()
+        if row is None:
+            return None
+        return LedgerEntry(transaction_id=row.id, amount=row.amount, balance=None, replayed=True)
+    
+    async def _rejection(self, user_id: str, required: float) -> Exception:
+        """Build the error for an update that matched no row."""
+        available = await self.db.scalar(select(User.credits).where(User.id == user_id))
+        if available is None:
+            return ValidationError("User not found")
+        return InsufficientCreditsError(required, available)
+
+
+def verification_refund_key(verification_id: str) -> str:
+    """Idempotency key shared by every path that refunds a verification."""
+    return f"refund:verification:{verification_id}"
+
+
+def get_credit_ledger(db: AsyncSession) -> CreditLedger:
+    """Get CreditLedger instance."""
+    return CreditLedger(db)
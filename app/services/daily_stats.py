@@ -0,0 +1,225 @@
+"""Incremental maintenance of the user_daily_stats rollup."""
+from collections import Counter, defaultdict
+from datetime import date, datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, event, insert, inspect, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.stats import UserDailyStats
+from app.models.transaction import Transaction
+from app.models.verification import Verification
+
+# Verification statuses with their own counter; reserved/pending are the remainder
+STATUS_COUNTERS = {
+    "completed": "completed",
+    "failed": "failed",
+    "timeout": "timed_out",
+    "cancelled": "cancelled"
+}
+
+ACCOUNT_ROW = ""  # service_name of the row holding money counters
+
+StatsKey = Tuple[str, date, str]
+Deltas = Dict[StatsKey, Counter]
+
+
+def stats_day(timestamp: Optional[datetime]) -> date:
+    """UTC calendar day a row is bucketed under."""
+    if timestamp is None:
+        return datetime.now(timezone.utc).date()
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc)
+    return timestamp.date()
+
+
+def new_deltas() -> Deltas:
+    """Empty delta accumulator keyed by (user_id, day, service_name)."""
+    return defaultdict(Counter)
+
+
+def add_verification(deltas: Deltas, user_id: str, service_name: str, created_at, status: str, cost, sign: int = 1):
+    """Count a verification in (sign=1) or out (sign=-1) of its day."""
+    counters = deltas[(user_id, stats_day(created_at), service_name or ACCOUNT_ROW)]
+    counters["verifications"] += sign
+    counters["verification_cost"] += sign * float(cost or 0)
+    if status in STATUS_COUNTERS:
+        counters[STATUS_COUNTERS[status]] += sign
+
+
+def add_status_change(deltas: Deltas, user_id: str, service_name: str, created_at, old_status: str, new_status: str):
+    """Move a verification between status counters."""
+    if old_status == new_status:
+        return
+    counters = deltas[(user_id, stats_day(created_at), service_name or ACCOUNT_ROW)]
+    if old_status in STATUS_COUNTERS:
+        counters[STATUS_COUNTERS[old_status]] -= 1
+    if new_status in STATUS_COUNTERS:
+        counters[STATUS_COUNTERS[new_status]] += 1
+
+
+def add_transaction(deltas: Deltas, user_id: str, created_at, transaction_type: str, amount, sign: int = 1):
+    """Count a transaction's amount towards its day's money counters."""
+    amount = float(amount or 0)
+    counters = deltas[(user_id, stats_day(created_at), ACCOUNT_ROW)]
+    if transaction_type == "debit":
+        counters["spent"] -= sign * amount  # debits are stored negative
+    elif transaction_type == "refund":
+        counters["refunded"] += sign * amount
+    else:
+        counters["funded"] += sign * amount
+
+
+def upsert_statements(dialect_name: str, deltas: Deltas) -> List:
+    """One INSERT ... ON CONFLICT DO UPDATE per touched row, in key order."""
+    dialect_insert = pg_insert if dialect_name == "postgresql" else sqlite_insert
+    table = UserDailyStats.__table__
+    statements = []
+    
+    # Fixed key order keeps concurrent transactions from deadlocking on row locks
+    for (user_id, day, service_name), counters in sorted(deltas.items()):
+        values = {column: value for column, value in counters.items() if value}
+        if not values:
+            continue
+        
+        statement = dialect_insert(table).values(user_id=user_id, day=day, service_name=service_name, **values)
+        statements.append(statement.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.day, table.c.service_name],
+            set_={column: table.c[column] + statement.excluded[column] for column in values}
+        ))
+    return statements
+
+
+async def record_status_changes(db: AsyncSession, rows: Iterable, old_status: str, new_status: str):
+    """Apply status moves made by bulk UPDATEs, which bypass the flush hook.
+    
+    Each row needs user_id, service_name and created_at, typically from
+    the UPDATE's RETURNING clause. Runs in the caller's transaction.
+    """
+    deltas = new_deltas()
+    for row in rows:
+        add_status_change(deltas, row.user_id, row.service_name, row.created_at, old_status, new_status)
+    
+    for statement in upsert_statements(db.get_bind().dialect.name, deltas):
+        await db.execute(statement)
+
+
+def rebuild_daily_stats(db: Session, user_id: Optional[str] = None, batch_size: int = 5000) -> int:
+    """Recompute the rollup from raw rows, for all users or one; returns rows written.
+    
+    Runs in the caller's transaction; writes committed by other sessions
+    while it runs are not reflected, so run it while traffic is quiet.
+    """
+    deltas = new_deltas()
+    
+    verifications = select(
+        Verification.user_id, Verification.service_name, Verification.created_at,
+        Verification.status, Verification.cost
+    )
+    transactions = select(Transaction.user_id, Transaction.created_at, Transaction.type, Transaction.amount)
+    cleared = delete(UserDailyStats)
+    if user_id:
+        verifications = verifications.where(Verification.user_id == user_id)
+        transactions = transactions.where(Transaction.user_id == user_id)
+        cleared = cleared.where(UserDailyStats.user_id == user_id)
+    
+    for row in db.execute(verifications.execution_options(yield_per=batch_size)):
+        add_verification(deltas, row.user_id, row.service_name, row.created_at, row.status, row.cost)
+    for row in db.execute(transactions.execution_options(yield_per=batch_size)):
+        add_transaction(deltas, row.user_id, row.created_at, row.type, row.amount)
+    
+    rows = [
+        {"user_id": key[0], "day": key[1], "service_name": key[2], **counters}
+        for key, counters in sorted(deltas.items())
+    ]
+    
+    db.execute(cleared)
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        # executemany needs every row to carry the same columns
+        db.execute(insert(UserDailyStats), [
+            {column.name: row.get(column.name, 0) for column in UserDailyStats.__table__.columns}
+            for row in batch
+        ])
+    return len(rows)
+
+
+def _loaded_value(state, key: str):
+    """Current value of an attribute without triggering a lazy load."""
+    return state.dict.get(key)
+
+
+def _verification_identity(connection, state) -> Tuple[str, str, Optional[datetime]]:
+    """user_id, service_name and created_at of a flushed verification."""
+    values = [_loaded_value(state, key) for key in ("user_id", "service_name", "created_at")]
+    if None in values:
+        # Expired attributes; the row itself is unchanged in these columns
+        row = connection.execute(
+            select(Verification.user_id, Verification.service_name, Verification.created_at)
+            .where(Verification.id == state.identity[0])
+        ).first()
+        if row is not None:
+            values = list(row)
+    return values[0], values[1], values[2]
+
+
+def _history_change(state, key: str) -> Optional[Tuple]:
+    """(old, new) for an attribute changed in this flush, else None."""
+    history = state.attrs[key].history
+    if not history.added:
+        return None
+    old = history.deleted[0] if history.deleted else None
+    return old, history.added[0]
+
+
+@event.listens_for(Session, "after_flush")
+def _record_flushed_changes(session: Session, flush_context):
+    """Fold ORM inserts, updates and deletes of verifications and transactions into the rollup."""
+    deltas = new_deltas()
+    connection = None
+    
+    for obj in session.new:
+        if isinstance(obj, Verification):
+            add_verification(deltas, obj.user_id, obj.service_name, obj.created_at, obj.status, obj.cost)
+        elif isinstance(obj, Transaction):
+            add_transaction(deltas, obj.user_id, obj.created_at, obj.type, obj.amount)
+    
+    for obj in session.deleted:
+        if isinstance(obj, Verification):
+            add_verification(deltas, obj.user_id, obj.service_name, obj.created_at, obj.status, obj.cost, sign=-1)
+        elif isinstance(obj, Transaction):
+            add_transaction(deltas, obj.user_id, obj.created_at, obj.type, obj.amount, sign=-1)
+    
+    for obj in session.dirty:
+        if not isinstance(obj, Verification):
+            continue
+        state = inspect(obj)
+        status_change = _history_change(state, "status")
+        cost_change = _history_change(state, "cost")
+        if status_change is None and cost_change is None:
+            continue
+        
+        connection = connection or session.connection()
+        user_id, service_name, created_at = _verification_identity(connection, state)
+        if status_change is not None:
+            add_status_change(deltas, user_id, service_name, created_at, *status_change)
+        if cost_change is not None:
+            old_cost, new_cost = cost_change
+            deltas[(user_id, stats_day(created_at), service_name or ACCOUNT_ROW)]["verification_cost"] += (
+                float(new_cost or 0) - float(old_cost or 0)
+            )
+    
+    statements = upsert_statements(session.get_bind().dialect.name, deltas)
+    if statements:
+        connection = connection or session.connection()
+        for statement in statements:
+            connection.execute(statement)
+
+
+@event.listens_for(Verification.status, "set", active_history=True)
+@event.listens_for(Verification.cost, "set", active_history=True)
+def _load_previous_value(target, value, oldvalue, initiator):
+    """No-op; registered so expired attributes are loaded before being overwritten."""
@@ -0,0 +1,276 @@
+"""Background export jobs: a bounded worker pool writing gzipped files to storage."""
+import asyncio
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.services.export_service import export_service
+from app.utils.security import generate_secure_id
+
+logger = get_logger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+@dataclass
+class ExportJob:
+    """One export request and its progress."""
+    id: str
+    owner_id: str  # who may read the job and download the file
+    data_type: str
+    output_format: str
+    user_id: Optional[str]  # rows exported; None exports every user (admin)
+    date_from: Optional[str] = None
+    date_to: Optional[str] = None
+    transaction_type: Optional[str] = None
+    status: str = QUEUED
+    rows: int = 0
+    bytes_written: int = 0
+    error: Optional[str] = None
+    created_at: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    queue_seconds: Optional[float] = None
+    run_seconds: Optional[float] = None
+    
+    @property
+    def filename(self) -> str:
+        """Stored and downloaded file name."""
+        return f"{self.data_type}_{self.id}.{self.output_format}.gz"
+    
+    def to_dict(self) -> Dict:
+        """Public job status."""
+        data = asdict(self)
+        data["filename"] = self.filename if self.status == COMPLETED else None
+        data["rows_per_second"] = round(self.rows / self.run_seconds, 1) if self.run_seconds else None
+        return data
+
+
+class LocalExportStorage:
+    """Directory-backed stand-in for object storage."""
+    
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+    
+    def path(self, name: str) -> Path:
+        """Absolute location of a stored object."""
+        return self.directory / name
+    
+    def open_partial(self, name: str):
+        """Open a temporary file that becomes the object on publish."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        return open(self.path(f"{name}.part"), "wb")
+    
+    def publish(self, name: str):
+        """Atomically expose a finished partial file."""
+        os.replace(self.path(f"{name}.part"), self.path(name))
+    
+    def write_json(self, name: str, data: Dict):
+        """Store a small JSON document, replacing any previous one."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        partial = self.path(f"{name}.part")
+        partial.write_text(json.dumps(data))
+        os.replace(partial, self.path(name))
+    
+    def read_json(self, name: str) -> Optional[Dict]:
+        """Load a JSON document, or None if absent or unreadable."""
+        try:
+            return json.loads(self.path(name).read_text())
+        except (OSError, ValueError):
+            return None
+    
+    def delete_older_than(self, cutoff: float) -> int:
+        """Remove objects last modified before cutoff (epoch seconds)."""
+        removed = 0
+        if not self.directory.is_dir():
+            return removed
+        for path in self.directory.iterdir():
+            try:
+                if path.is_file() and path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except OSError:
+                continue
+        return removed
+
+
+class ExportJobs:
+    """Queue exports and run them on a fixed number of workers.
+    
+    Each job streams rows through ExportService into a gzipped file, so
+    a large export holds one DB connection per worker rather than one per
+    waiting HTTP request. Job state is mirrored to a JSON file beside the
+    export, letting any process sharing the directory report on it.
+    """
+    
+    def __init__(self, storage: LocalExportStorage, workers: int = 2, max_queued: int = 100, retention_hours: int = 24):
+        self.storage = storage
+        self.workers = workers
+        self.max_queued = max_queued
+        self.retention = timedelta(hours=retention_hours)
+        self.jobs: Dict[str, ExportJob] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks: List[asyncio.Task] = []
+    
+    @property
+    def running(self) -> bool:
+        """Whether workers are alive."""
+        return any(not task.done() for task in self._worker_tasks)
+    
+    async def submit(
+        self,
+        owner_id: str,
+        data_type: str,
+        output_format: str,
+        user_id: Optional[str],
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        transaction_type: Optional[str] = None
+    ) -> Optional[ExportJob]:
+        """Queue an export; None when the pool is not running or the queue is full."""
+        if self._queue is None or self._queue.qsize() >= self.max_queued:
+            return None
+        
+        await self._purge_expired()
+        job = ExportJob(
+            id=generate_secure_id("export"),
+            owner_id=owner_id,
+            data_type=data_type,
+            output_format=output_format,
+            user_id=user_id,
+            date_from=date_from.isoformat() if date_from else None,
+            date_to=date_to.isoformat() if date_to else None,
+            transaction_type=transaction_type
+        )
+        self.jobs[job.id] = job
+        await self._save(job)
+        self._queue.put_nowait(job)
+        return job
+    
+    def get(self, job_id: str) -> Optional[ExportJob]:
+        """Job by id, from this process or from the shared status file."""
+        job = self.jobs.get(job_id)
+        if job is not None:
+            return job
+        if not job_id.replace("_", "").isalnum():
+            return None
+        data = self.storage.read_json(f"{job_id}.json")
+        return ExportJob(**data) if data else None
+    
+    def file_path(self, job: ExportJob) -> Path:
+        """Where a completed job's file is stored."""
+        return self.storage.path(job.filename)
+    
+    async def start(self):
+        """Start the worker pool."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        await self._purge_expired()
+        self._worker_tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        logger.info(f"Export job workers started ({self.workers})")
+    
+    async def stop(self):
+        """Stop the worker pool; running and queued jobs are marked failed."""
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        
+        while self._queue is not None and not self._queue.empty():
+            job = self._queue.get_nowait()
+            job.status = FAILED
+            job.error = "Export cancelled by shutdown"
+            await self._save(job)
+        self._queue = None
+        logger.info("Export job workers stopped")
+    
+    async def _work(self):
+        """Run queued jobs one at a time."""
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+    
+    async def _run(self, job: ExportJob):
+        """Stream one export to storage, recording progress and timing."""
+        started = datetime.now(timezone.utc)
+        job.status = RUNNING
+        job.started_at = started.isoformat()
+        job.queue_seconds = round((started - datetime.fromisoformat(job.created_at)).total_seconds(), 3)
+        await self._save(job)
+        
+        def count_rows(rows: int):
+            job.rows += rows
+        
+        clock = time.perf_counter()
+        try:
+            handle = await asyncio.to_thread(self.storage.open_partial, job.filename)
+            try:
+                chunks = export_service.stream(
+                    job.data_type, job.user_id,
+                    datetime.fromisoformat(job.date_from) if job.date_from else None,
+                    datetime.fromisoformat(job.date_to) if job.date_to else None,
+                    job.output_format, compress=True,
+                    transaction_type=job.transaction_type,
+                    progress=count_rows
+                )
+                async for chunk in chunks:
+                    await asyncio.to_thread(handle.write, chunk)
+                    job.bytes_written += len(chunk)
+            finally:
+                await asyncio.to_thread(handle.close)
+            await asyncio.to_thread(self.storage.publish, job.filename)
+            job.status = COMPLETED
+        except asyncio.CancelledError:
+            job.status = FAILED
+            job.error = "Export interrupted by shutdown"
+            raise
+        except Exception as e:
+            logger.error(f"Export job {job.id} failed: {e}")
+            job.status = FAILED
+            job.error = "Export failed"
+        finally:
+            job.run_seconds = round(time.perf_counter() - clock, 3)
+            job.finished_at = datetime.now(timezone.utc).isoformat()
+            await asyncio.shield(self._save(job))
+        
+        logger.info(f"Export job {job.id} {job.status}: {job.rows} rows, {job.bytes_written} bytes in {job.run_seconds}s")
+    
+    async def _save(self, job: ExportJob):
+        """Mirror job state to its status file."""
+        try:
+            await asyncio.to_thread(self.storage.write_json, f"{job.id}.json", asdict(job))
+        except OSError as e:
+            logger.warning(f"Could not save export job {job.id} status: {e}")
+    
+    async def _purge_expired(self):
+        """Delete files and forget finished jobs past retention."""
+        cutoff = datetime.now(timezone.utc) - self.retention
+        await asyncio.to_thread(self.storage.delete_older_than, cutoff.timestamp())
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job.finished_at and datetime.fromisoformat(job.finished_at) < cutoff
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
+
+
+# Global export jobs instance
+export_jobs = ExportJobs(
+    LocalExportStorage(settings.export_dir),
+    workers=settings.export_workers,
+    max_queued=settings.export_max_queued,
+    retention_hours=settings.export_retention_hours
+)
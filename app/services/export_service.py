@@ -0,0 +1,187 @@
+"""Streaming data export in CSV, NDJSON or JSON with optional gzip."""
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+from sqlalchemy import select
+
+from app.core.database import AsyncSessionLocal
+from app.models.transaction import Transaction
+from app.models.verification import Verification
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "json": "application/json"
+}
+
+EXPORT_COLUMNS = {
+    "verifications": [
+        Verification.id, Verification.service_name, Verification.phone_number,
+        Verification.status, Verification.cost, Verification.created_at, Verification.completed_at
+    ],
+    "transactions": [
+        Transaction.id, Transaction.amount, Transaction.type,
+        Transaction.description, Transaction.created_at
+    ]
+}
+
+
+class ExportService:
+    """Encode a user's rows batch by batch, so memory does not grow with the export.
+    
+    Rows are read as plain tuples through a server-side cursor and each
+    batch is encoded (and compressed) before the next one is fetched.
+    """
+    
+    def __init__(self, batch_size: int = 1000):
+        self.batch_size = batch_size
+    
+    @staticmethod
+    def _selected(data_type: str, user_id: Optional[str]) -> List:
+        """Exported columns; exports spanning all users lead with user_id."""
+        columns = EXPORT_COLUMNS[data_type]
+        if user_id is None:
+            model = Verification if data_type == "verifications" else Transaction
+            columns = [model.user_id] + columns
+        return columns
+    
+    def columns(self, data_type: str, user_id: Optional[str]) -> List[str]:
+        """Column names of an export, in output order."""
+        return [column.key for column in self._selected(data_type, user_id)]
+    
+    @staticmethod
+    def filename(data_type: str, output_format: str, compress: bool) -> str:
+        """Download filename for an export."""
+        name = f"{data_type}.{output_format}"
+        return f"{name}.gz" if compress else name
+    
+    @staticmethod
+    def media_type(output_format: str, compress: bool) -> str:
+        """Content type of an export body."""
+        return "application/gzip" if compress else EXPORT_FORMATS[output_format]
+    
+    def statement(
+        self,
+        data_type: str,
+        user_id: Optional[str],
+        date_from: Optional[datetime],
+        date_to: Optional[datetime],
+        transaction_type: Optional[str] = None
+    ):
+        """Newest-first select of the exported columns; None filters are not applied."""
+        model = Verification if data_type == "verifications" else Transaction
+        statement = select(*self._selected(data_type, user_id))
+        if user_id is not None:
+            statement = statement.where(model.user_id == user_id)
+        if date_from is not None:
+            statement = statement.where(model.created_at >= date_from)
+        if date_to is not None:
+            statement = statement.where(model.created_at <= date_to)
+        if transaction_type and data_type == "transactions":
+            statement = statement.where(Transaction.type == transaction_type)
+        return statement.order_by(model.created_at.desc()).execution_options(yield_per=self.batch_size)
+    
+    async def stream(
+        self,
+        data_type: str,
+        user_id: Optional[str],
+        date_from: Optional[datetime],
+        date_to: Optional[datetime],
+        output_format: str = "csv",
+        compress: bool = False,
+        transaction_type: Optional[str] = None,
+        progress: Optional[Callable[[int], None]] = None
+    ) -> AsyncIterator[bytes]:
+        """Yield the encoded export chunk by chunk.
+        
+        Opens its own session: the response body is produced after the
+        request's dependencies have been torn down. ``progress`` is called
+        with the row count of each batch; a None user_id exports every user.
+        """
+        chunks = self._encode(data_type, user_id, date_from, date_to, output_format, transaction_type, progress)
+        if not compress:
+            async for chunk in chunks:
+                yield chunk
+            return
+        
+        compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)  # gzip container
+        async for chunk in chunks:
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+    
+    async def _encode(
+        self,
+        data_type: str,
+        user_id: Optional[str],
+        date_from: Optional[datetime],
+        date_to: Optional[datetime],
+        output_format: str,
+        transaction_type: Optional[str],
+        progress: Optional[Callable[[int], None]]
+    ) -> AsyncIterator[bytes]:
+        """Yield uncompressed chunks, one per fetched batch."""
+        columns = self.columns(data_type, user_id)
+        count = 0
+        
+        if output_format == "csv":
+            yield self._csv_rows([columns])
+        elif output_format == "json":
+            yield b'{"data": ['
+        
+        async with AsyncSessionLocal() as db:
+            result = await db.stream(self.statement(data_type, user_id, date_from, date_to, transaction_type))
+            async for batch in result.partitions():
+                if output_format == "csv":
+                    yield self._csv_rows([[self._csv_value(value) for value in row] for row in batch])
+                else:
+                    records = [json.dumps(self._record(columns, row)) for row in batch]
+                    if output_format == "ndjson":
+                        yield ("\n".join(records) + "\n").encode()
+                    else:
+                        yield (("," if count else "") + ",".join(records)).encode()
+                count += len(batch)
+                if progress is not None:
+                    progress(len(batch))
+        
+        if output_format == "json":
+            trailer = {
+                "format": output_format,
+                "count": count,
+                "date_range": {
+                    "from": date_from.isoformat() if date_from else None,
+                    "to": date_to.isoformat() if date_to else None
+                }
+            }
+            yield ("], " + json.dumps(trailer)[1:]).encode()
+    
+    @staticmethod
+    def _csv_rows(rows: List[List]) -> bytes:
+        """Encode rows as CSV lines."""
+        output = io.StringIO()
+        csv.writer(output).writerows(rows)
+        return output.getvalue().encode()
+    
+    @staticmethod
+    def _csv_value(value):
+        """CSV cell for a column value."""
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return "" if value is None else value
+    
+    @staticmethod
+    def _record(columns: List[str], row) -> Dict:
+        """JSON object for a row."""
+        return {
+            column: value.isoformat() if isinstance(value, datetime) else value
+            for column, value in zip(columns, row)
+        }
+
+
+# Global export service instance
+export_service = ExportService()
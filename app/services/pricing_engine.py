@@ -0,0 +1,252 @@
+"""Pricing engine with a precomputed service x country x capability price table."""
+import json
+import os
+import time
+import zlib
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, List, Mapping, Optional, Tuple
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# TextVerified service ids and base prices
+DEFAULT_SERVICE_PRICES = {
+    "telegram": {"id": 1, "price": 0.75}, "whatsapp": {"id": 2, "price": 0.75},
+    "discord": {"id": 3, "price": 0.75}, "google": {"id": 6, "price": 0.75},
+    "instagram": {"id": 4, "price": 1.00}, "facebook": {"id": 7, "price": 1.00},
+    "twitter": {"id": 5, "price": 1.00}, "tiktok": {"id": 8, "price": 1.00},
+    "paypal": {"id": 13, "price": 1.50}, "microsoft": {"id": 14, "price": 1.00},
+    "amazon": {"id": 9, "price": 1.00}, "apple": {"id": 15, "price": 1.25},
+    "netflix": {"id": 10, "price": 1.00}, "spotify": {"id": 16, "price": 0.85},
+    "steam": {"id": 17, "price": 0.90}, "twitch": {"id": 18, "price": 0.85},
+    "youtube": {"id": 19, "price": 0.75}, "reddit": {"id": 20, "price": 0.80},
+    "snapchat": {"id": 21, "price": 1.00}, "pinterest": {"id": 22, "price": 0.85},
+    "uber": {"id": 11, "price": 0.90}, "lyft": {"id": 23, "price": 0.90},
+    "airbnb": {"id": 12, "price": 1.10}, "ebay": {"id": 24, "price": 0.95},
+    "coinbase": {"id": 27, "price": 1.50}, "binance": {"id": 28, "price": 1.50}
+}
+
+# Price multipliers from the TextVerified country assessment
+DEFAULT_COUNTRY_MULTIPLIERS = {
+    # Premium Tier (1.2x - 1.8x)
+    "CH": 1.8, "IS": 1.7, "NO": 1.6, "SE": 1.5, "JP": 1.5,
+    "AU": 1.4, "DK": 1.4, "FI": 1.3, "SG": 1.3, "LU": 1.2, "KR": 1.2,
+
+    # Standard Tier (0.8x - 1.1x)
+    "CA": 1.1, "US": 1.0, "GB": 1.0, "DE": 1.0, "FR": 1.0, "NL": 1.0,
+    "AT": 1.0, "BE": 1.0, "IE": 1.0, "HK": 1.0, "IL": 1.0,
+    "IT": 0.9, "ES": 0.9, "MT": 0.9, "PT": 0.8, "CY": 0.8, "AE": 0.8, "CN": 0.8,
+    "TW": 0.8, "QA": 0.8,
+
+    # Economy Tier (0.2x - 0.7x)
+    "SI": 0.7, "KW": 0.7, "BH": 0.7, "PL": 0.6, "CZ": 0.6, "HU": 0.6,
+    "HR": 0.6, "SK": 0.6, "SA": 0.6, "OM": 0.6, "RO": 0.5, "BG": 0.5,
+    "LT": 0.5, "LV": 0.5, "EE": 0.5, "RU": 0.5, "TR": 0.5, "ZA": 0.5,
+    "JO": 0.5, "LB": 0.5, "MY": 0.5, "MX": 0.4, "BR": 0.4, "CL": 0.4,
+    "UY": 0.4, "TH": 0.4, "EG": 0.4, "MA": 0.4, "TN": 0.4, "DZ": 0.4,
+    "UA": 0.4, "BY": 0.4, "KZ": 0.4, "IQ": 0.4, "AR": 0.3, "CO": 0.3,
+    "PE": 0.3, "PY": 0.3, "BO": 0.3, "EC": 0.3, "VE": 0.3, "PH": 0.3,
+    "ID": 0.3, "VN": 0.3, "NG": 0.3, "KE": 0.3, "GH": 0.3, "UZ": 0.3,
+    "IN": 0.2, "BD": 0.2, "PK": 0.2, "LK": 0.2, "NP": 0.2
+}
+
+DEFAULT_VOICE_SUPPORTED_COUNTRIES = {
+    "US", "CA", "GB", "DE", "FR", "AU", "NL", "SE", "NO", "DK", "FI",
+    "CH", "AT", "BE", "IT", "ES", "IE", "JP", "KR", "SG", "HK", "AE",
+    "SA", "IL", "BR", "RU", "PL", "CZ", "HU", "ZA", "TR"
+}
+
+DEFAULT_VOICE_PREMIUM = 0.30
+DEFAULT_SERVICE_PRICE = 1.00  # unlisted services (TextVerified supports 1,800+)
+DEFAULT_COUNTRY_MULTIPLIER = 1.0
+
+CAPABILITIES = ("sms", "voice")
+
+
+def get_pricing_tier(multiplier: float) -> str:
+    """Get pricing tier based on multiplier."""
+    if multiplier >= 1.2:
+        return "Premium"
+    elif multiplier >= 0.8:
+        return "Standard"
+    else:
+        return "Economy"
+
+
+@dataclass(frozen=True)
+class Quote:
+    """Price for one service, country and capability."""
+    service_name: str
+    country: str
+    capability: str
+    service_id: int
+    base_price: float
+    country_multiplier: float
+    price: Optional[float]  # None when the capability is unavailable
+    voice_supported: bool
+
+    @property
+    def available(self) -> bool:
+        return self.price is not None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize for API responses."""
+        return {
+            "service_name": self.service_name,
+            "country": self.country,
+            "capability": self.capability,
+            "service_id": self.service_id,
+            "base_price": self.base_price,
+            "country_multiplier": self.country_multiplier,
+            "tier": get_pricing_tier(self.country_multiplier),
+            "price": self.price,
+            "voice_supported": self.voice_supported,
+            "available": self.available
+        }
+
+
+@dataclass(frozen=True)
+class PriceTable:
+    """Dense price matrix; the last row and column hold unlisted defaults."""
+    service_index: Mapping[str, int]
+    country_index: Mapping[str, int]
+    service_ids: Tuple[int, ...]
+    base_prices: Tuple[float, ...]
+    multipliers: Tuple[float, ...]
+    voice_supported: FrozenSet[str]
+    prices: Tuple[Optional[float], ...]  # flat [service][country][capability]
+
+
+def build_price_table(
+    services: Mapping[str, Mapping[str, Any]],
+    multipliers: Mapping[str, float],
+    voice_supported: FrozenSet[str],
+    voice_premium: float
+) -> PriceTable:
+    """Precompute every price so quoting is a single index lookup."""
+    service_names = list(services)
+    country_codes = list(multipliers)
+    service_ids = tuple(int(services[name]["id"]) for name in service_names) + (0,)
+    base_prices = tuple(float(services[name]["price"]) for name in service_names) + (DEFAULT_SERVICE_PRICE,)
+    country_multipliers = tuple(float(multipliers[code]) for code in country_codes) + (DEFAULT_COUNTRY_MULTIPLIER,)
+    voice_flags = [code in voice_supported for code in country_codes] + [False]
+
+    prices: List[Optional[float]] = []
+    for base_price in base_prices:
+        for multiplier, voice_ok in zip(country_multipliers, voice_flags):
+            sms_price = base_price * multiplier
+            prices.append(sms_price)
+            prices.append(sms_price + voice_premium if voice_ok else None)
+
+    return PriceTable(
+        service_index=MappingProxyType({name: i for i, name in enumerate(service_names)}),
+        country_index=MappingProxyType({code: i for i, code in enumerate(country_codes)}),
+        service_ids=service_ids,
+        base_prices=base_prices,
+        multipliers=country_multipliers,
+        voice_supported=voice_supported,
+        prices=tuple(prices)
+    )
+
+
+class PricingEngine:
+    """Serve O(1) quotes from a price table that can be reloaded at runtime."""
+
+    def __init__(self, config_path: Optional[str] = None, check_interval: float = 5.0):
+        self.config_path = config_path
+        self.check_interval = check_interval  # seconds between config mtime checks
+        self._config_mtime: Optional[float] = None
+        self._next_check = 0.0
+        self.table = self._load()
+
+    def quote(self, service_name: str, country: str = "US", capability: str = "sms") -> Quote:
+        """Price one verification."""
+        self.reload_if_changed()
+        table = self.table
+        service_name = service_name.lower().strip()
+        country = country.upper()
+
+        service = table.service_index.get(service_name, len(table.service_ids) - 1)
+        column = table.country_index.get(country, len(table.multipliers) - 1)
+        price = table.prices[(service * len(table.multipliers) + column) * 2 + CAPABILITIES.index(capability)]
+
+        service_id = table.service_ids[service]
+        if service_name not in table.service_index:
+            # Stable id for unlisted services
+            service_id = zlib.crc32(service_name.encode()) % 1000 + 100
+
+        return Quote(
+            service_name=service_name,
+            country=country,
+            capability=capability,
+            service_id=service_id,
+            base_price=table.base_prices[service],
+            country_multiplier=table.multipliers[column],
+            price=price,
+            voice_supported=country in table.voice_supported
+        )
+
+    def quote_many(self, items: List[Tuple[str, str, str]]) -> List[Quote]:
+        """Price many (service, country, capability) combinations."""
+        return [self.quote(service_name, country, capability) for service_name, country, capability in items]
+
+    def get_country_multiplier(self, country: str) -> float:
+        """Get price multiplier for country."""
+        table = self.table
+        column = table.country_index.get(country.upper(), len(table.multipliers) - 1)
+        return table.multipliers[column]
+
+    def is_voice_supported(self, country: str) -> bool:
+        """Check if voice verification is supported in country."""
+        return country.upper() in self.table.voice_supported
+
+    def reload(self) -> PriceTable:
+        """Rebuild the price table from defaults and the pricing config file."""
+        self.table = self._load()
+        logger.info(f"Pricing table reloaded: {len(self.table.service_index)} services, {len(self.table.country_index)} countries")
+        return self.table
+
+    def reload_if_changed(self):
+        """Reload when the pricing config file has been modified."""
+        if not self.config_path:
+            return
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+
+        try:
+            mtime = os.stat(self.config_path).st_mtime
+        except OSError:
+            return
+        if mtime != self._config_mtime:
+            try:
+                self.reload()
+            except Exception as e:
+                logger.error(f"Pricing config reload failed, keeping current prices: {e}")
+
+    def _load(self) -> PriceTable:
+        """Merge config overrides onto the built-in price data."""
+        services = dict(DEFAULT_SERVICE_PRICES)
+        multipliers = dict(DEFAULT_COUNTRY_MULTIPLIERS)
+        voice_supported = set(DEFAULT_VOICE_SUPPORTED_COUNTRIES)
+        voice_premium = DEFAULT_VOICE_PREMIUM
+
+        if self.config_path and os.path.exists(self.config_path):
+            mtime = os.stat(self.config_path).st_mtime
+            with open(self.config_path) as f:
+                config = json.load(f)
+            services.update({name.lower(): info for name, info in config.get("services", {}).items()})
+            multipliers.update({code.upper(): value for code, value in config.get("country_multipliers", {}).items()})
+            if "voice_supported_countries" in config:
+                voice_supported = {code.upper() for code in config["voice_supported_countries"]}
+            voice_premium = float(config.get("voice_premium", voice_premium))
+            self._config_mtime = mtime
+
+        return build_price_table(services, multipliers, frozenset(voice_supported), voice_premium)
+
+
+# Global pricing engine instance
+pricing_engine = PricingEngine(settings.pricing_config_path)
@@ -0,0 +1,130 @@
+"""Stale-while-revalidate cache for the TextVerified service catalog."""
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+from app.core.caching import cache, cache_key, serialize_payload
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Served when neither upstream nor any cached copy is available
+FALLBACK_SERVICES = [
+    {"name": "telegram", "price": 0.75, "voice_supported": True},
+    {"name": "whatsapp", "price": 0.75, "voice_supported": True},
+    {"name": "discord", "price": 0.75, "voice_supported": True},
+    {"name": "google", "price": 0.75, "voice_supported": True},
+    {"name": "instagram", "price": 1.00, "voice_supported": True},
+    {"name": "twitter", "price": 1.00, "voice_supported": True}
+]
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """An immutable, pre-serialized copy of the service catalog."""
+    services: List[Dict[str, Any]]
+    body: bytes
+    etag: str
+    fetched_at: float  # wall-clock, shared across workers via Redis
+
+
+def format_service(service: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalize an upstream service entry for the frontend."""
+    name = service.get("name", "")
+    return {
+        "id": service.get("id"),
+        "name": name.lower(),
+        "display_name": name,
+        "price": service.get("price", 0.50),
+        "voice_supported": service.get("voice_supported", service.get("voice", False)),
+        "available": service.get("available", True)
+    }
+
+
+def build_snapshot(services: List[Dict[str, Any]], fetched_at: float) -> CatalogSnapshot:
+    """Serialize the catalog once and derive its ETag from the bytes."""
+    payload = serialize_payload({"services": services})
+    return CatalogSnapshot(services=services, body=payload.body, etag=payload.etag, fetched_at=fetched_at)
+
+
+class ServiceCatalog:
+    """In-process plus Redis copy of the catalog, refreshed before it expires."""
+
+    def __init__(self, ttl: int = 300, refresh_ahead: int = 60, stale_ttl: int = 86400):
+        self.ttl = ttl  # seconds a copy counts as fresh
+        self.refresh_ahead = refresh_ahead  # refresh this long before expiry
+        self.stale_ttl = stale_ttl  # how long Redis keeps a copy for stale serving
+        self.redis_key = cache_key("services", "catalog")
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._fallback = build_snapshot([format_service(s) for s in FALLBACK_SERVICES], 0)
+
+    async def get(self) -> CatalogSnapshot:
+        """Get the catalog, never waiting on upstream when any copy exists."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = await self._load_from_redis()
+
+        if snapshot is None:
+            # Cold start: wait for the first fetch, shared by concurrent callers
+            try:
+                return await asyncio.shield(self._schedule_refresh())
+            except Exception as e:
+                logger.warning(f"Service catalog unavailable, serving fallback: {e}")
+                return self._fallback
+
+        if time.time() - snapshot.fetched_at >= self.ttl - self.refresh_ahead:
+            self._schedule_refresh()
+        return snapshot
+
+    async def invalidate(self):
+        """Drop cached copies so the next request refetches."""
+        self._snapshot = None
+        await cache.delete(self.redis_key)
+
+    def _schedule_refresh(self) -> asyncio.Task:
+        """Start a background refresh unless one is already running."""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh())
+            self._refresh_task.add_done_callback(self._log_refresh_failure)
+        return self._refresh_task
+
+    @staticmethod
+    def _log_refresh_failure(task: asyncio.Task):
+        """Keep serving the current copy when a refresh fails."""
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Service catalog refresh failed, serving stale copy: {task.exception()}")
+
+    async def _refresh(self) -> CatalogSnapshot:
+        """Fetch the catalog from TextVerified and publish it to both tiers."""
+        from app.services.textverified_service import TextVerifiedService
+
+        result = await TextVerifiedService().get_services()
+        if "error" in result:
+            raise RuntimeError(result["error"])
+
+        services = [
+            format_service(service)
+            for service in result.get("services", [])
+            if isinstance(service, dict)
+        ]
+        snapshot = build_snapshot(services, time.time())
+        self._snapshot = snapshot
+        await cache.set(
+            self.redis_key,
+            {"services": services, "fetched_at": snapshot.fetched_at},
+            ttl=self.stale_ttl
+        )
+        return snapshot
+
+    async def _load_from_redis(self) -> Optional[CatalogSnapshot]:
+        """Adopt a copy written by another worker."""
+        data = await cache.get(self.redis_key)
+        if not data:
+            return None
+        self._snapshot = build_snapshot(data["services"], data["fetched_at"])
+        return self._snapshot
+
+
+# Global service catalog instance
+service_catalog = ServiceCatalog()
@@ -1,98 +1,329 @@
 """Real-time SMS polling service for verification updates."""
 import asyncio
-from datetime import datetime, timezone, timedelta
-from typing import Dict, List
-from sqlalchemy.orm import Session
-from app.core.database import SessionLocal
+import heapq
+import itertools
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import select, update
+from app.core.database import AsyncSessionLocal
+from app.core.logging import get_logger
 from app.models.verification import Verification
-from app.services.textverified_service import TextVerifiedService
+from app.services.credit_ledger import CreditLedger
+from app.services.daily_stats import record_status_changes
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class PollTarget:
+    """A pending verification tracked by the polling scheduler."""
+    verification_id: str
+    number_id: str
+    capability: str = "sms"
+    started_at: float = field(default_factory=time.monotonic)
+    interval: float = 0.0
+    due_at: float = 0.0
+    attempts: int = 0
+
 
 class SMSPollingService:
-    """Background service for polling SMS messages."""
+    """Heap-scheduled poller for all pending verifications with batched commits."""
+    
+    def __init__(
+        self,
+        max_concurrency: int = 20,
+        min_interval: float = 2.0,
+        max_interval: float = 15.0,
+        backoff_factor: float = 1.5,
+        fast_phase: float = 30.0,
+        max_poll_duration: float = 600.0,
+        flush_interval: float = 1.0,
+        recent_results_size: int = 10000
+    ):
+        self.max_concurrency = max_concurrency
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff_factor = backoff_factor
+        self.fast_phase = fast_phase  # seconds polled at min_interval
+        self.max_poll_duration = max_poll_duration  # 10 minutes
+        self.flush_interval = flush_interval
+        self.recent_results_size = recent_results_size
+        
+        self.active_verifications: Dict[str, PollTarget] = {}
+        self._schedule: List[Tuple[float, int, str]] = []
+        self._sequence = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._in_flight: set = set()
+        
+        # Results waiting for the next batched commit
+        self._completed: Dict[str, List] = {}
+        self._timed_out: List[str] = []
+        
+        self._scheduler_task: Optional[asyncio.Task] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._textverified = None
+        
+        # Callbacks notified after results are committed
+        self._listeners: List[Callable[[str, Dict], Awaitable[None]]] = []
+        
+        # Last committed update per verification, served to late subscribers
+        self.recent_results: "OrderedDict[str, Dict]" = OrderedDict()
+    
+    @property
+    def textverified(self):
+        """TextVerified service, created on first poll."""
+        if self._textverified is None:
+            from app.services.textverified_service import TextVerifiedService
+            self._textverified = TextVerifiedService()
+        return self._textverified
+    
+    @property
+    def running(self) -> bool:
+        """Whether the scheduler task is alive."""
+        return self._scheduler_task is not None and not self._scheduler_task.done()
+    
+    async def start(self):
+        """Start the scheduler and batch writer."""
+        if self.running:
+            return
+        # Bind loop primitives to the loop the scheduler runs on
+        self._wakeup = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._scheduler_task = asyncio.create_task(self._run_scheduler())
+        self._flush_task = asyncio.create_task(self._run_flusher())
+        logger.info("SMS polling scheduler started")
     
-    def __init__(self):
-        self.textverified = TextVerifiedService()
-        self.polling_interval = 5  # seconds
-        self.max_poll_duration = 600  # 10 minutes
-        self.active_verifications: Dict[str, datetime] = {}
+    async def stop(self):
+        """Stop polling and commit any buffered results."""
+        for task in (self._scheduler_task, self._flush_task, *self._in_flight):
+            if task is not None:
+                task.cancel()
+        await asyncio.gather(
+            *(t for t in (self._scheduler_task, self._flush_task, *self._in_flight) if t is not None),
+            return_exceptions=True
+        )
+        self._scheduler_task = None
+        self._flush_task = None
+        await self._flush()
+        logger.info("SMS polling scheduler stopped")
     
-    async def start_polling(self, verification_id: str):
+    async def start_polling(self, verification_id: str, number_id: Optional[str] = None, capability: str = "sms"):
         """Start polling for a specific verification."""
-        self.active_verifications[verification_id] = datetime.now(timezone.utc)
+        target = PollTarget(
+            verification_id=verification_id,
+            number_id=number_id or verification_id,
+            capability=capability,
+            interval=self.min_interval
+        )
+        self.active_verifications[verification_id] = target
+        self._schedule_poll(target, time.monotonic() + target.interval)
         
-        # Start background polling task
-        asyncio.create_task(self._poll_verification(verification_id))
+        if not self.running:
+            await self.start()
     
-    async def _poll_verification(self, verification_id: str):
-        """Poll for SMS messages for a verification."""
-        start_time = datetime.now(timezone.utc)
-        
-        while verification_id in self.active_verifications:
-            # Check if polling timeout reached
-            if (datetime.now(timezone.utc) - start_time).seconds > self.max_poll_duration:
-                await self._timeout_verification(verification_id)
-                break
+    def add_listener(self, callback: Callable[[str, Dict], Awaitable[None]]):
+        """Register a coroutine called with (verification_id, update) per committed result."""
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+    
+    def get_recent_result(self, verification_id: str) -> Optional[Dict]:
+        """Get the last committed update for a verification, if still retained."""
+        return self.recent_results.get(verification_id)
+    
+    def stop_polling(self, verification_id: str):
+        """Stop polling for a verification."""
+        # Heap entries for removed verifications are skipped when popped
+        self.active_verifications.pop(verification_id, None)
+    
+    def _schedule_poll(self, target: PollTarget, due_at: float):
+        """Push a verification onto the poll heap."""
+        target.due_at = due_at
+        heapq.heappush(self._schedule, (due_at, next(self._sequence), target.verification_id))
+        self._wakeup.set()
+    
+    def _next_interval(self, target: PollTarget, now: float) -> float:
+        """Poll fast while an SMS is most likely, then back off."""
+        if now - target.started_at < self.fast_phase:
+            return self.min_interval
+        return min(self.max_interval, target.interval * self.backoff_factor)
+    
+    async def _run_scheduler(self):
+        """Pop due verifications and dispatch polls."""
+        while True:
+            if not self._schedule:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
             
-            try:
-                # Check for messages
-                messages_result = await self.textverified.get_sms(verification_id)
-                
-                if messages_result and "messages" in messages_result:
-                    messages = messages_result["messages"]
-                    if messages:
-                        await self._complete_verification(verification_id, messages)
-                        break
-                
-            except Exception as e:
-                print(f"Polling error for {verification_id}: {e}")
+            due_at, _, verification_id = self._schedule[0]
+            delay = due_at - time.monotonic()
+            if delay > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
             
-            # Wait before next poll
-            await asyncio.sleep(self.polling_interval)
-        
-        # Clean up
-        self.active_verifications.pop(verification_id, None)
+            heapq.heappop(self._schedule)
+            target = self.active_verifications.get(verification_id)
+            if target is None or target.due_at != due_at:
+                continue  # stopped or superseded by a newer entry
+            
+            await self._semaphore.acquire()
+            task = asyncio.create_task(self._poll_target(target))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
     
-    async def _complete_verification(self, verification_id: str, messages: List):
-        """Mark verification as completed."""
-        db = SessionLocal()
+    async def _poll_target(self, target: PollTarget):
+        """Poll one number and either finish it or reschedule it."""
+        verification_id = target.verification_id
         try:
-            verification = db.query(Verification).filter(
-                Verification.id == verification_id
-            ).first()
+            if time.monotonic() - target.started_at > self.max_poll_duration:
+                self.active_verifications.pop(verification_id, None)
+                self._timed_out.append(verification_id)
+                return
             
-            if verification and verification.status == "pending":
-                verification.status = "completed"
-                verification.completed_at = datetime.now(timezone.utc)
-                db.commit()
-                
+            target.attempts += 1
+            messages = await self._fetch_messages(target)
+            if messages:
+                self.active_verifications.pop(verification_id, None)
+                self._completed[verification_id] = messages
+                return
+        
+        except Exception as e:
+            logger.warning(f"Polling error for {verification_id}: {e}")
+        
         finally:
-            db.close()
+            self._semaphore.release()
+        
+        if verification_id in self.active_verifications:
+            now = time.monotonic()
+            target.interval = self._next_interval(target, now)
+            self._schedule_poll(target, now + target.interval)
     
-    async def _timeout_verification(self, verification_id: str):
-        """Handle verification timeout."""
-        db = SessionLocal()
+    async def _fetch_messages(self, target: PollTarget) -> List:
+        """Fetch received SMS or voice codes for a number."""
+        if target.capability == "voice":
+            result = await self.textverified.get_voice(target.number_id)
+            payload = result.get("voice")
+        else:
+            result = await self.textverified.get_sms(target.number_id)
+            payload = result.get("sms") or result.get("messages")
+        
+        if not payload or "error" in result:
+            return []
+        return payload if isinstance(payload, list) else [payload]
+    
+    async def _run_flusher(self):
+        """Commit buffered completions and timeouts on an interval."""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self._flush()
+            except Exception as e:
+                logger.error(f"Polling batch commit failed: {e}")
+    
+    async def _flush(self):
+        """Write buffered results in one transaction, then notify listeners."""
+        if not self._completed and not self._timed_out:
+            return
+        
+        completed, self._completed = self._completed, {}
+        timed_out, self._timed_out = self._timed_out, []
+        
         try:
-            verification = db.query(Verification).filter(
-                Verification.id == verification_id
-            ).first()
+            completed_ids, expired_ids = await self._commit_batch(list(completed), timed_out)
+        except Exception:
+            # Put results back so the next flush retries them
+            self._completed.update(completed)
+            self._timed_out.extend(timed_out)
+            raise
+        
+        # Rows cancelled or finished elsewhere since polling matched nothing
+        updates = {
+            verification_id: {"status": "completed", "messages": completed[verification_id]}
+            for verification_id in completed_ids
+        }
+        updates.update({
+            verification_id: {"status": "timeout", "messages": []}
+            for verification_id in expired_ids
+        })
+        await self._notify(updates)
+    
+    async def _notify(self, updates: Dict[str, Dict]):
+        """Deliver committed results to registered listeners."""
+        event_id = int(time.time() * 1000)
+        for verification_id, update in updates.items():
+            message = {
+                "type": "verification_update",
+                "verification_id": verification_id,
+                "event_id": event_id,
+                **update
+            }
             
-            if verification and verification.status == "pending":
-                verification.status = "timeout"
-                db.commit()
-                
-                # Refund user credits
-                from app.models.user import User
-                user = db.query(User).filter(User.id == verification.user_id).first()
-                if user:
-                    user.credits += verification.cost
-                    db.commit()
-                
-        finally:
-            db.close()
+            self.recent_results[verification_id] = message
+            self.recent_results.move_to_end(verification_id)
+            while len(self.recent_results) > self.recent_results_size:
+                self.recent_results.popitem(last=False)
+            
+            for listener in self._listeners:
+                try:
+                    await listener(verification_id, message)
+                except Exception as e:
+                    logger.warning(f"Polling listener failed for {verification_id}: {e}")
     
-    def stop_polling(self, verification_id: str):
-        """Stop polling for a verification."""
-        self.active_verifications.pop(verification_id, None)
+    @staticmethod
+    async def _commit_batch(completed_ids: List[str], timed_out_ids: List[str]) -> Tuple[List[str], List[str]]:
+        """Mark completions and refund timeouts with batched statements; return the ids each changed."""
+        completed, expired = [], []
+        async with AsyncSessionLocal() as db:
+            async with db.begin():
+                if completed_ids:
+                    completed = (await db.execute(
+                        update(Verification).where(
+                            Verification.id.in_(completed_ids),
+                            Verification.status == "pending"
+                        ).values(status="completed", completed_at=datetime.now(timezone.utc))
+                        .returning(
+                            Verification.id, Verification.user_id, Verification.service_name, Verification.created_at
+                        )
+                    )).all()
+                    await record_status_changes(db, completed, "pending", "completed")
+                
+                if timed_out_ids:
+                    expired = (await db.execute(
+                        select(
+                            Verification.id, Verification.user_id, Verification.service_name,
+                            Verification.created_at, Verification.cost
+                        ).where(
+                            Verification.id.in_(timed_out_ids),
+                            Verification.status == "pending"
+                        ).with_for_update()
+                    )).all()
+                    
+                    if expired:
+                        await db.execute(
+                            update(Verification).where(
+                                Verification.id.in_([row.id for row in expired])
+                            ).values(status="timeout")
+                        )
+                        await record_status_changes(db, expired, "pending", "timeout")
+                        
+                        # Keyed refunds, so a later cancel cannot refund the same verification
+                        ledger = CreditLedger(db)
+                        for row in expired:
+                            await ledger.return_verification(
+                                row.user_id, row.id, row.cost,
+                                f"Refund: verification {row.id} timed out"
+                            )
+        
+        return [row.id for row in completed], [row.id for row in expired]
+
 
 # Global polling service instance
-polling_service = SMSPollingService()
\ No newline at end of file
+polling_service = SMSPollingService()
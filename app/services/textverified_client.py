@@ -4,8 +4,10 @@ import time
 from typing import Dict, Any, Optional
 from enum import Enum
 import httpx
+from app.core.caching import SingleFlight
 from app.core.config import settings
 from app.core.logging import get_logger
+from app.core.metrics import UpstreamPoolMetrics
 
 logger = get_logger(__name__)
 
@@ -14,6 +16,15 @@ class CircuitState(Enum):
     OPEN = "open"
     HALF_OPEN = "half_open"
 
+# Read-only endpoints safe to coalesce, with result TTL in seconds
+COALESCED_ENDPOINTS = {
+    "GetSMS": 1.0,
+    "GetVoice": 1.0,
+    "GetBalance": 5.0,
+    "Services": 0,
+    "GetCountries": 0
+}
+
 class TextVerifiedClient:
     """Production-ready TextVerified API client with circuit breaker."""
     
@@ -23,6 +34,14 @@ class TextVerifiedClient:
         self.timeout = 30
         self.max_retries = 3
         
+        # Shared connection pool (opened on app startup, closed on shutdown)
+        self.max_connections = settings.textverified_max_connections
+        self._client: Optional[httpx.AsyncClient] = None
+        self._in_flight = 0
+        
+        # Request coalescing for identical concurrent reads
+        self._single_flight = SingleFlight()
+        
         # Circuit breaker configuration
         self.circuit_state = CircuitState.CLOSED
         self.failure_count = 0
@@ -35,6 +54,63 @@ class TextVerifiedClient:
         self.health_check_interval = 300  # 5 minutes
         self.is_healthy = True
         
+    def _build_client(self) -> httpx.AsyncClient:
+        """Create the pooled keep-alive client."""
+        http2 = settings.textverified_http2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("h2 not installed, TextVerified client falling back to HTTP/1.1")
+                http2 = False
+        
+        return httpx.AsyncClient(
+            http2=http2,
+            timeout=httpx.Timeout(self.timeout, pool=settings.textverified_pool_timeout),
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=settings.textverified_max_keepalive_connections,
+                keepalive_expiry=settings.textverified_keepalive_expiry
+            )
+        )
+    
+    async def start(self):
+        """Open the shared connection pool."""
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+        UpstreamPoolMetrics.set_limit("textverified", self.max_connections)
+        
+    async def close(self):
+        """Close the shared connection pool."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            
+    def _get_client(self) -> httpx.AsyncClient:
+        """Get the shared client, opening it lazily outside the app lifecycle."""
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+        return self._client
+        
+    async def get(self, endpoint: str, params: Dict[str, Any], timeout: Optional[float] = None) -> httpx.Response:
+        """Issue a GET over the shared pool, tracking pool occupancy."""
+        client = self._get_client()
+        self._in_flight += 1
+        UpstreamPoolMetrics.record_acquire("textverified", self._in_flight, self.max_connections)
+        
+        try:
+            return await client.get(
+                f"{self.base_url}/{endpoint}",
+                params=params,
+                timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT
+            )
+        except httpx.PoolTimeout:
+            UpstreamPoolMetrics.record_pool_timeout("textverified")
+            raise
+        finally:
+            self._in_flight -= 1
+            UpstreamPoolMetrics.record_release("textverified", self._in_flight)
+        
     async def health_check(self) -> bool:
         """Check API health status."""
         current_time = time.time()
@@ -42,14 +118,10 @@ class TextVerifiedClient:
             return self.is_healthy
             
         try:
-            async with httpx.AsyncClient(timeout=10) as client:
-                response = await client.get(
-                    f"{self.base_url}/GetBalance",
-                    params={"bearer": self.api_key}
-                )
-                self.is_healthy = response.status_code == 200
-                if self.is_healthy:
-                    self._reset_circuit()
+            response = await self.get("GetBalance", {"bearer": self.api_key}, timeout=10)
+            self.is_healthy = response.status_code == 200
+            if self.is_healthy:
+                self._reset_circuit()
                     
         except Exception as e:
             logger.warning(f"Health check failed: {e}")
@@ -87,6 +159,24 @@ class TextVerifiedClient:
         return True  # HALF_OPEN
         
     async def make_request(self, endpoint: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Make API request, sharing identical concurrent read calls."""
+        if endpoint not in COALESCED_ENDPOINTS:
+            return await self._make_request(endpoint, params)
+        
+        key = (endpoint, tuple(sorted((params or {}).items())))
+        return await self._single_flight.do(
+            key,
+            lambda: self._make_request(endpoint, params),
+            ttl=COALESCED_ENDPOINTS[endpoint],
+            cacheable=lambda result: "error" not in result,
+            on_hit=lambda source: UpstreamPoolMetrics.record_coalesced("textverified", endpoint, source)
+        )
+        
+    def get_coalescing_stats(self) -> Dict[str, int]:
+        """Get single-flight call and dedup-hit counters."""
+        return self._single_flight.get_stats()
+        
+    async def _make_request(self, endpoint: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
         """Make API request with circuit breaker protection."""
         if not self._can_attempt_request():
             logger.warning("Circuit breaker open, using fallback")
@@ -102,27 +192,23 @@ class TextVerifiedClient:
             
         for attempt in range(self.max_retries):
             try:
-                async with httpx.AsyncClient(timeout=self.timeout) as client:
-                    response = await client.get(
-                        f"{self.base_url}/{endpoint}",
-                        params=request_params
-                    )
+                response = await self.get(endpoint, request_params)
+                
+                if response.status_code == 200:
+                    if self.circuit_state == CircuitState.HALF_OPEN:
+                        self._reset_circuit()
+                    return response.json()
                     
-                    if response.status_code == 200:
-                        if self.circuit_state == CircuitState.HALF_OPEN:
-                            self._reset_circuit()
-                        return response.json()
-                        
-                    elif response.status_code == 429:
-                        wait_time = 2 ** attempt
-                        logger.warning(f"Rate limited, waiting {wait_time}s")
-                        await asyncio.sleep(wait_time)
-                        continue
-                        
-                    else:
-                        logger.error(f"API error: {response.status_code}")
-                        self._record_failure()
-                        break
+                elif response.status_code == 429:
+                    wait_time = 2 ** attempt
+                    logger.warning(f"Rate limited, waiting {wait_time}s")
+                    await asyncio.sleep(wait_time)
+                    continue
+                    
+                else:
+                    logger.error(f"API error: {response.status_code}")
+                    self._record_failure()
+                    break
                         
             except (httpx.TimeoutException, httpx.ConnectError) as e:
                 logger.warning(f"Request failed (attempt {attempt + 1}): {e}")
@@ -7,6 +7,7 @@ from typing import Dict, Any
 from app.core.config import settings
 from app.core.logging import get_logger
 from app.services.textverified_client import textverified_client
+from app.services.pricing_engine import pricing_engine, get_pricing_tier
 
 logger = get_logger(__name__)
 
@@ -28,27 +29,23 @@ class TextVerifiedService:
             
         for attempt in range(self.max_retries):
             try:
-                async with httpx.AsyncClient(timeout=self.timeout) as client:
-                    response = await client.get(
-                        f"{self.base_url}/{endpoint}",
-                        params=request_params
-                    )
-                    
-                    if response.status_code == 200:
-                        data = response.json()
-                        logger.info(f"TextVerified API success: {endpoint}")
-                        return data
-                    elif response.status_code == 401:
-                        logger.error("Invalid API key")
-                        return {"error": "Invalid TextVerified API key"}
-                    elif response.status_code == 429:  # Rate limited
-                        wait_time = 2 ** attempt
-                        logger.warning(f"Rate limited, waiting {wait_time}s")
-                        await asyncio.sleep(wait_time)
-                        continue
-                    else:
-                        logger.error(f"TextVerified API error: {response.status_code} - {response.text}")
-                        return {"error": f"API error: {response.status_code}"}
+                response = await textverified_client.get(endpoint, request_params)
+                
+                if response.status_code == 200:
+                    data = response.json()
+                    logger.info(f"TextVerified API success: {endpoint}")
+                    return data
+                elif response.status_code == 401:
+                    logger.error("Invalid API key")
+                    return {"error": "Invalid TextVerified API key"}
+                elif response.status_code == 429:  # Rate limited
+                    wait_time = 2 ** attempt
+                    logger.warning(f"Rate limited, waiting {wait_time}s")
+                    await asyncio.sleep(wait_time)
+                    continue
+                else:
+                    logger.error(f"TextVerified API error: {response.status_code} - {response.text}")
+                    return {"error": f"API error: {response.status_code}"}
                         
             except httpx.TimeoutException:
                 logger.warning(f"Request timeout (attempt {attempt + 1}/{self.max_retries})")
@@ -102,21 +99,16 @@ class TextVerifiedService:
     
     async def get_country_pricing(self, country: str, service_name: str = "telegram") -> Dict[str, Any]:
         """Get pricing information for a specific country and service."""
-        multiplier = self._get_country_multiplier(country)
-        voice_supported = self._is_voice_supported(country)
-        
-        # Base service price (using telegram as default)
-        base_price = 0.75
-        country_price = base_price * multiplier
-        voice_price = country_price + 0.30 if voice_supported else None
+        sms = pricing_engine.quote(service_name, country, "sms")
+        voice = pricing_engine.quote(service_name, country, "voice")
         
         return {
-            "country": country,
-            "base_price": country_price,
-            "voice_price": voice_price,
-            "voice_supported": voice_supported,
-            "multiplier": multiplier,
-            "tier": "Premium" if multiplier >= 1.2 else "Standard" if multiplier >= 0.8 else "Economy"
+            "country": sms.country,
+            "base_price": sms.price,
+            "voice_price": voice.price,
+            "voice_supported": sms.voice_supported,
+            "multiplier": sms.country_multiplier,
+            "tier": get_pricing_tier(sms.country_multiplier)
         }
     
     async def get_countries(self) -> Dict[str, Any]:
@@ -151,48 +143,14 @@ class TextVerifiedService:
     
     async def create_verification(self, service_name: str, country: str = "US", capability: str = "sms") -> Dict[str, Any]:
         """Create verification by getting a phone number with country-specific pricing."""
-        # Comprehensive service mapping for 1,800+ services
-        service_mapping = {
-            "telegram": {"id": 1, "price": 0.75}, "whatsapp": {"id": 2, "price": 0.75}, 
-            "discord": {"id": 3, "price": 0.75}, "google": {"id": 6, "price": 0.75},
-            "instagram": {"id": 4, "price": 1.00}, "facebook": {"id": 7, "price": 1.00},
-            "twitter": {"id": 5, "price": 1.00}, "tiktok": {"id": 8, "price": 1.00},
-            "paypal": {"id": 13, "price": 1.50}, "microsoft": {"id": 14, "price": 1.00},
-            "amazon": {"id": 9, "price": 1.00}, "apple": {"id": 15, "price": 1.25},
-            "netflix": {"id": 10, "price": 1.00}, "spotify": {"id": 16, "price": 0.85},
-            "steam": {"id": 17, "price": 0.90}, "twitch": {"id": 18, "price": 0.85},
-            "youtube": {"id": 19, "price": 0.75}, "reddit": {"id": 20, "price": 0.80},
-            "snapchat": {"id": 21, "price": 1.00}, "pinterest": {"id": 22, "price": 0.85},
-            "uber": {"id": 11, "price": 0.90}, "lyft": {"id": 23, "price": 0.90},
-            "airbnb": {"id": 12, "price": 1.10}, "ebay": {"id": 24, "price": 0.95},
-            "coinbase": {"id": 27, "price": 1.50}, "binance": {"id": 28, "price": 1.50}
-        }
-        
-        # Fallback for unlisted services (TextVerified supports 1,800+)
-        if service_name.lower() not in service_mapping:
-            service_mapping[service_name.lower()] = {
-                "id": hash(service_name) % 1000 + 100,
-                "price": 1.00
-            }
-        
-        service_info = service_mapping.get(service_name.lower())
-        if not service_info:
-            return {"error": f"Service {service_name} not supported"}
-        
-        # Get country multiplier from TextVerified assessment data
-        country_multiplier = self._get_country_multiplier(country)
-        
-        # Calculate cost with country multiplier and voice premium
-        base_cost = service_info["price"] * country_multiplier
-        voice_premium = 0.30 if capability == "voice" else 0
-        total_cost = base_cost + voice_premium
+        quote = pricing_engine.quote(service_name, country, capability)
         
         # Validate voice capability for country
-        if capability == "voice" and not self._is_voice_supported(country):
+        if not quote.available:
             return {"error": f"Voice verification not supported in {country}"}
         
         # Get phone number from TextVerified
-        number_result = await self.get_number(service_info["id"], country, voice=(capability == "voice"))
+        number_result = await self.get_number(quote.service_id, country, voice=(capability == "voice"))
         
         if "error" in number_result:
             return number_result
@@ -200,46 +158,19 @@ class TextVerifiedService:
         return {
             "phone_number": number_result.get("number"),
             "number_id": number_result.get("id"),
-            "service_id": service_info["id"],
+            "service_id": quote.service_id,
             "capability": capability,
-            "cost": total_cost,
+            "cost": quote.price,
             "country": country,
-            "country_multiplier": country_multiplier
+            "country_multiplier": quote.country_multiplier
         }
     
     @staticmethod
     def _get_country_multiplier(country_code: str) -> float:
         """Get price multiplier for country based on TextVerified assessment."""
-        country_multipliers = {
-            # Premium Tier (1.2x - 1.8x)
-            "CH": 1.8, "IS": 1.7, "NO": 1.6, "SE": 1.5, "JP": 1.5,
-            "AU": 1.4, "DK": 1.4, "FI": 1.3, "SG": 1.3, "LU": 1.2, "KR": 1.2,
-            
-            # Standard Tier (0.8x - 1.1x)
-            "CA": 1.1, "US": 1.0, "GB": 1.0, "DE": 1.0, "FR": 1.0, "NL": 1.0,
-            "AT": 1.0, "BE": 1.0, "IE": 1.0, "HK": 1.0, "IL": 1.0,
-            "IT": 0.9, "ES": 0.9, "MT": 0.9, "PT": 0.8, "CY": 0.8, "AE": 0.8, "CN": 0.8,
-            
-            # Economy Tier (0.2x - 0.7x)
-            "SI": 0.7, "KW": 0.7, "BH": 0.7, "PL": 0.6, "CZ": 0.6, "HU": 0.6,
-            "HR": 0.6, "SK": 0.6, "SA": 0.6, "OM": 0.6, "RO": 0.5, "BG": 0.5,
-            "LT": 0.5, "LV": 0.5, "EE": 0.5, "RU": 0.5, "TR": 0.5, "ZA": 0.5,
-            "JO": 0.5, "LB": 0.5, "MY": 0.5, "MX": 0.4, "BR": 0.4, "CL": 0.4,
-            "UY": 0.4, "TH": 0.4, "EG": 0.4, "MA": 0.4, "TN": 0.4, "DZ": 0.4,
-            "UA": 0.4, "BY": 0.4, "KZ": 0.4, "IQ": 0.4, "AR": 0.3, "CO": 0.3,
-            "PE": 0.3, "PY": 0.3, "BO": 0.3, "EC": 0.3, "VE": 0.3, "PH": 0.3,
-            "ID": 0.3, "VN": 0.3, "NG": 0.3, "KE": 0.3, "GH": 0.3, "UZ": 0.3,
-            "IN": 0.2, "BD": 0.2, "PK": 0.2, "LK": 0.2, "NP": 0.2
-        }
-        
-        return country_multipliers.get(country_code, 1.0)  # Default to 1.0x
+        return pricing_engine.get_country_multiplier(country_code)
     
     @staticmethod
     def _is_voice_supported(country_code: str) -> bool:
         """Check if voice verification is supported in country."""
-        voice_supported_countries = {
-            "US", "CA", "GB", "DE", "FR", "AU", "NL", "SE", "NO", "DK", "FI",
-            "CH", "AT", "BE", "IT", "ES", "IE", "JP", "KR", "SG", "HK", "AE",
-            "SA", "IL", "BR", "RU", "PL", "CZ", "HU", "ZA", "TR"
-        }
-        return country_code in voice_supported_countries
\ No newline at end of file
+        return pricing_engine.is_voice_supported(country_code)
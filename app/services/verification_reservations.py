@@ -0,0 +1,165 @@
+"""Two-phase verification purchases: reserve credits, buy upstream, then confirm or release."""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import select, update
+
+from app.core.caching import invalidate_usage_analytics
+from app.core.database import AsyncSessionLocal
+from app.core.logging import get_logger
+from app.models.verification import Verification
+from app.services.credit_ledger import CreditLedger
+from app.services.daily_stats import record_status_changes
+
+logger = get_logger(__name__)
+
+RESERVED = "reserved"
+ACTIVE_STATUSES = (RESERVED, "pending")  # still holding what the purchase consumed
+
+
+class VerificationReservations:
+    """Short transactions around an upstream purchase, plus a reaper for orphans.
+    
+    A reservation charges the user and inserts the verification as
+    ``reserved`` in one commit, so no session or row lock is held while
+    the upstream call runs. Reservations that are neither confirmed nor
+    released (e.g. the worker died mid-call) are released by the reaper
+    once older than ``max_age``.
+    """
+    
+    def __init__(self, max_age: float = 300.0, reap_interval: float = 60.0):
+        self.max_age = max_age  # must exceed the upstream call's worst-case duration
+        self.reap_interval = reap_interval
+        self._reaper_task: Optional[asyncio.Task] = None
+    
+    async def reserve(
+        self,
+        user_id: str,
+        service_name: str,
+        capability: str,
+        country: str,
+        cost: float,
+        requested_carrier: Optional[str] = None,
+        requested_area_code: Optional[str] = None
+    ) -> Verification:
+        """Charge the user and record a reserved verification in one transaction."""
+        verification = Verification(
+            user_id=user_id,
+            service_name=service_name,
+            capability=capability,
+            country=country,
+            status=RESERVED,
+            cost=cost,
+            requested_carrier=requested_carrier,
+            requested_area_code=requested_area_code
+        )
+        
+        async with AsyncSessionLocal() as db:
+            ledger = CreditLedger(db)
+            if await ledger.use_free_verification(user_id):
+                verification.cost = 0  # Free verification
+            else:
+                await ledger.debit(
+                    user_id, cost,
+                    f"Verification: {service_name} ({capability})",
+                    idempotency_key=f"verification:{verification.id}"
+                )
+            db.add(verification)
+            await db.commit()
+        
+        await invalidate_usage_analytics(user_id)
+        return verification
+    
+    async def confirm(self, verification: Verification, phone_number: str, number_id: str) -> bool:
+        """Attach the purchased number; False if the reservation was already released."""
+        async with AsyncSessionLocal() as db:
+            confirmed = (await db.execute(
+                update(Verification)
+                .where(Verification.id == verification.id, Verification.status == RESERVED)
+                .values(status="pending", phone_number=phone_number, verification_code=number_id)
+                .returning(Verification.id)
+            )).first()
+            await db.commit()
+        
+        if confirmed is None:
+            return False
+        verification.status = "pending"
+        verification.phone_number = phone_number
+        verification.verification_code = number_id
+        return True
+    
+    async def release(self, verification_id: str, reason: str = "upstream purchase failed") -> bool:
+        """Fail a reservation and return its credits; only the first caller refunds."""
+        async with AsyncSessionLocal() as db:
+            released = (await db.execute(
+                update(Verification)
+                .where(Verification.id == verification_id, Verification.status == RESERVED)
+                .values(status="failed")
+                .returning(Verification.user_id, Verification.service_name, Verification.created_at, Verification.cost)
+            )).first()
+            if released is None:
+                return False
+            await record_status_changes(db, [released], RESERVED, "failed")
+            
+            await CreditLedger(db).return_verification(
+                released.user_id, verification_id, released.cost,
+                f"Refund: verification {verification_id} {reason}"
+            )
+            await db.commit()
+        
+        await invalidate_usage_analytics(released.user_id)
+        logger.info(f"Released verification reservation {verification_id}: {reason}")
+        return True
+    
+    async def reap(self) -> int:
+        """Release reservations older than max_age; return how many were released."""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.max_age)
+        async with AsyncSessionLocal() as db:
+            orphaned: List[str] = list((await db.scalars(
+                select(Verification.id).where(
+                    Verification.status == RESERVED,
+                    Verification.created_at < cutoff
+                )
+            )).all())
+        
+        released = 0
+        for verification_id in orphaned:
+            if await self.release(verification_id, "reservation expired"):
+                released += 1
+        return released
+    
+    @property
+    def running(self) -> bool:
+        """Whether the reaper task is alive."""
+        return self._reaper_task is not None and not self._reaper_task.done()
+    
+    async def start(self):
+        """Start the background reaper."""
+        if self.running:
+            return
+        self._reaper_task = asyncio.create_task(self._run_reaper())
+        logger.info("Verification reservation reaper started")
+    
+    async def stop(self):
+        """Stop the background reaper."""
+        if self._reaper_task is not None:
+            self._reaper_task.cancel()
+            await asyncio.gather(self._reaper_task, return_exceptions=True)
+            self._reaper_task = None
+        logger.info("Verification reservation reaper stopped")
+    
+    async def _run_reaper(self):
+        """Periodically release orphaned reservations."""
+        while True:
+            await asyncio.sleep(self.reap_interval)
+            try:
+                released = await self.reap()
+                if released:
+                    logger.warning(f"Released {released} orphaned verification reservations")
+            except Exception as e:
+                logger.error(f"Reservation reaper failed: {e}")
+
+
+# Global verification reservations instance
+verification_reservations = VerificationReservations()
@@ -1,9 +1,16 @@
 """Test configuration and fixtures."""
+import importlib
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from app.core.database import get_db
+from sqlalchemy.pool import NullPool
+from app.core.database import async_database_url, get_async_db, get_db
+from app.core.principal_cache import principal_cache
+from app.core.rate_limiter import LocalSlidingWindow
+from app.core.security_hardening import security_hardening
+from app.middleware.rate_limiting import RateLimitMiddleware
 from app.models.base import Base
 from main import app
 
@@ -12,6 +19,18 @@ SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine on the same file via aiosqlite; no pooling, since each
+# TestClient request and each async test runs on its own event loop
+async_engine = create_async_engine(async_database_url(SQLALCHEMY_DATABASE_URL), poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# Modules that open their own sessions instead of using a dependency
+ASYNC_SESSION_MODULES = [
+    "app.core.api_key_cache", "app.core.principal_cache", "app.services.export_service",
+    "app.services.sms_polling_service", "app.services.verification_reservations"
+]
+SYNC_SESSION_MODULES = ["app.core.principal_cache", "app.api.websocket"]
+
 def override_get_db():
     """Override database dependency for testing."""
     try:
@@ -20,7 +39,18 @@ def override_get_db():
     finally:
         db.close()
 
+async def override_get_async_db():
+    """Override async database dependency for testing."""
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_async_db] = override_get_async_db
+
+for module_name in ASYNC_SESSION_MODULES:
+    importlib.import_module(module_name).AsyncSessionLocal = TestingAsyncSessionLocal
+for module_name in SYNC_SESSION_MODULES:
+    importlib.import_module(module_name).SessionLocal = TestingSessionLocal
 
 @pytest.fixture(scope="session")
 def test_db():
@@ -29,6 +59,26 @@ def test_db():
     yield
     Base.metadata.drop_all(bind=engine)
 
+@pytest.fixture(autouse=True)
+def clean_db(test_db):
+    """Empty every table and cached principal after each test."""
+    yield
+    principal_cache.clear()
+    with engine.begin() as connection:
+        for table in reversed(Base.metadata.sorted_tables):
+            connection.execute(table.delete())
+
+@pytest.fixture(autouse=True)
+def reset_rate_limits():
+    """Give each test a fresh request budget on the shared app."""
+    yield
+    security_hardening.rate_limits.clear()
+    layer = app.middleware_stack
+    while layer is not None:
+        if isinstance(layer, RateLimitMiddleware):
+            layer.limiter.local = LocalSlidingWindow(layer.limiter.local.max_keys)
+        layer = getattr(layer, "app", None)
+
 @pytest.fixture
 def client():
     """Test client fixture."""
@@ -54,7 +104,8 @@ def test_user(db_session):
         email="test@example.com",
         password_hash=hash_password("testpass123"),
         credits=10.0,
-        free_verifications=1.0
+        free_verifications=1.0,
+        referral_code="TESTREF1"
     )
     db_session.add(user)
     db_session.commit()
@@ -62,7 +113,7 @@ def test_user(db_session):
     return user
 
 @pytest.fixture
-def auth_headers(client):
+def auth_headers(client, test_user):
     """Authentication headers for test user."""
     response = client.post("/auth/login", json={
         "email": "test@example.com",
@@ -82,7 +133,8 @@ def admin_user(db_session):
         email="admin@example.com",
         password_hash=hash_password("adminpass123"),
         credits=100.0,
-        is_admin=True
+        is_admin=True,
+        referral_code="ADMINREF"
     )
     db_session.add(user)
     db_session.commit()
@@ -0,0 +1,61 @@
+"""Tests for usage and cost analytics read from the daily rollup."""
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.models.transaction import Transaction
+from app.models.verification import Verification
+
+
+@pytest.fixture
+def activity(db_session, test_user, admin_user):
+    """Three verifications today, one yesterday, one debit, and another user's activity."""
+    yesterday = datetime.now(timezone.utc) - timedelta(days=1)
+    db_session.add_all([
+        Verification(user_id=test_user.id, service_name="telegram", status="completed", cost=1.0),
+        Verification(user_id=test_user.id, service_name="telegram", status="completed", cost=1.0),
+        Verification(user_id=test_user.id, service_name="whatsapp", status="failed", cost=2.0),
+        Verification(user_id=test_user.id, service_name="telegram", status="completed", cost=1.0, created_at=yesterday),
+        Transaction(user_id=test_user.id, amount=-3.5, type="debit", description="Verifications"),
+        Verification(user_id=admin_user.id, service_name="google", status="completed", cost=9.0)
+    ])
+    db_session.commit()
+
+
+def test_usage_totals(client, auth_headers, activity):
+    """Test totals, success rate, popular services and the zero-filled daily series."""
+    body = client.get("/analytics/usage", params={"period": 7}, headers=auth_headers).json()
+    
+    assert body["total_verifications"] == 4
+    assert body["success_rate"] == 75.0
+    assert body["total_spent"] == 3.5
+    assert body["popular_services"] == [{"service": "telegram", "count": 3}, {"service": "whatsapp", "count": 1}]
+    assert len(body["daily_usage"]) == 7
+    assert [day["count"] for day in body["daily_usage"][-2:]] == [1, 3]
+    assert sum(day["count"] for day in body["daily_usage"]) == 4
+
+
+def test_usage_period_excludes_older_days(client, auth_headers, activity):
+    """Test a one-day period counts only today."""
+    body = client.get("/analytics/usage", params={"period": 1}, headers=auth_headers).json()
+    
+    assert body["total_verifications"] == 3
+    assert body["daily_usage"] == [{"date": datetime.now(timezone.utc).strftime("%Y-%m-%d"), "count": 3}]
+
+
+def test_usage_without_activity(client, auth_headers):
+    """Test a new user gets zeros rather than an error."""
+    body = client.get("/analytics/usage", params={"period": 3}, headers=auth_headers).json()
+    
+    assert (body["total_verifications"], body["success_rate"], body["popular_services"]) == (0, 0, [])
+    assert [day["count"] for day in body["daily_usage"]] == [0, 0, 0]
+
+
+def test_cost_analysis(client, auth_headers, activity):
+    """Test per-service costs and the current month's spending."""
+    body = client.get("/analytics/costs", headers=auth_headers).json()
+    
+    costs = {row["service"]: row for row in body["service_costs"]}
+    assert costs["telegram"] == {"service": "telegram", "total_cost": 3.0, "count": 3, "avg_cost": 1.0}
+    assert costs["whatsapp"]["total_cost"] == 2.0
+    assert "google" not in costs
+    assert len(body["monthly_spending"]) == 6
+    assert body["monthly_spending"][-1] == {"month": datetime.now(timezone.utc).strftime("%Y-%m"), "amount": 3.5}
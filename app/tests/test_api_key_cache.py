@@ -0,0 +1,82 @@
+"""Tests for cached API key lookups and their invalidation."""
+import pytest
+from app.core.api_key_cache import api_key_cache
+from app.middleware import security
+
+
+@pytest.fixture(autouse=True)
+def local_only(monkeypatch):
+    """Keep the API key cache in process."""
+    monkeypatch.setattr(api_key_cache, "_redis_down_until", float("inf"))
+
+
+@pytest.fixture
+def lookups(monkeypatch):
+    """Count API key lookups that reach the database."""
+    calls = []
+    load = security.load_api_key_principal
+    
+    async def counting(key_hash):
+        calls.append(key_hash)
+        return await load(key_hash)
+    
+    monkeypatch.setattr(security, "load_api_key_principal", counting)
+    return calls
+
+
+@pytest.fixture
+def api_key(client, auth_headers):
+    """A new API key for the test user."""
+    return client.post("/auth/api-keys", json={"name": "CI"}, headers=auth_headers).json()
+
+
+@pytest.fixture
+def admin_headers(client, admin_user):
+    """Authentication headers for the admin user."""
+    response = client.post("/auth/login", json={"email": "admin@example.com", "password": "adminpass123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def balance(client, key):
+    """Status of a balance read authenticated by API key."""
+    return client.get("/wallet/balance", headers={"X-API-Key": key}).status_code
+
+
+def test_valid_key_is_cached(client, api_key, lookups):
+    """Test repeated requests with a key query the database once."""
+    assert [balance(client, api_key["key"]) for _ in range(3)] == [200, 200, 200]
+    assert len(lookups) == 1
+
+
+def test_unknown_key_is_negatively_cached(client, lookups):
+    """Test a repeated unknown key reaches the database once."""
+    assert [balance(client, "nsk_unknown") for _ in range(3)] == [401, 401, 401]
+    assert len(lookups) == 1
+
+
+def test_malformed_key_skips_database(client, lookups):
+    """Test keys without the nsk_ prefix are rejected without a query."""
+    assert balance(client, "not-a-key") == 401
+    assert lookups == []
+
+
+def test_suspension_revokes_cached_key(client, api_key, admin_headers, lookups):
+    """Test suspending a user stops a cached key at once, and activation restores it."""
+    assert balance(client, api_key["key"]) == 200
+    
+    client.post("/admin/users/test_user_123/suspend", headers=admin_headers)
+    assert balance(client, api_key["key"]) == 403
+    
+    client.post("/admin/users/test_user_123/activate", headers=admin_headers)
+    assert balance(client, api_key["key"]) == 200
+    assert len(lookups) == 3
+
+
+def test_deleted_key_is_revoked(client, auth_headers, api_key):
+    """Test a deleted key stops working although it was cached."""
+    assert balance(client, api_key["key"]) == 200
+    
+    response = client.delete(f"/auth/api-keys/{api_key['id']}", headers=auth_headers)
+    
+    assert response.status_code == 200
+    assert balance(client, api_key["key"]) == 401
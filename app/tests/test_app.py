@@ -0,0 +1,17 @@
+"""Tests for application startup and shutdown."""
+from fastapi.testclient import TestClient
+from main import app
+
+
+def test_lifecycle(test_db):
+    """Test background services start with the app and stop with it."""
+    from app.services.sms_polling_service import polling_service
+    from app.services.verification_reservations import verification_reservations
+    
+    with TestClient(app) as client:
+        assert polling_service.running
+        assert verification_reservations.running
+        assert client.get("/verification").status_code == 200
+    
+    assert not polling_service.running
+    assert not verification_reservations.running
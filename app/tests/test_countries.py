@@ -0,0 +1,67 @@
+"""Tests for the country catalog and its pricing data."""
+import json
+import pytest
+from app.api import countries
+from app.services.pricing_engine import get_pricing_tier, pricing_engine
+
+
+@pytest.fixture
+def pricing_config(tmp_path):
+    """Point the pricing engine at a config file, restoring the defaults afterwards."""
+    path = tmp_path / "pricing.json"
+    original = pricing_engine.config_path
+    pricing_engine.config_path = str(path)
+    yield path
+    pricing_engine.config_path = original
+    pricing_engine.reload()
+    countries.reload_country_catalog()
+
+
+@pytest.fixture
+def admin_headers(client, admin_user):
+    """Authentication headers for the admin user."""
+    response = client.post("/auth/login", json={"email": "admin@example.com", "password": "adminpass123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def test_catalog_matches_pricing_engine():
+    """Test every country's multiplier, tier and voice support come from the price table."""
+    for country in countries.get_country_catalog().countries:
+        code = country["code"]
+        assert country["price_multiplier"] == pricing_engine.get_country_multiplier(code)
+        assert country["tier"] == get_pricing_tier(country["price_multiplier"])
+        assert country["voice_supported"] == pricing_engine.is_voice_supported(code)
+        assert countries.is_voice_supported(code) == country["voice_supported"]
+
+
+def test_unknown_country_has_no_voice():
+    """Test countries outside the catalog report no voice support."""
+    assert not countries.is_voice_supported("XX")
+    assert countries.get_country_region("XX") == "Other"
+
+
+def test_admin_pricing_reload_rebuilds_catalog(client, admin_headers, pricing_config):
+    """Test the admin reload serves new multipliers and ETags."""
+    before = client.get("/countries/US")
+    pricing_config.write_text(json.dumps({"country_multipliers": {"US": 1.3}, "voice_supported_countries": ["GB"]}))
+    
+    response = client.post("/admin/pricing/reload", headers=admin_headers)
+    
+    assert response.status_code == 200
+    after = client.get("/countries/US")
+    assert after.json()["price_multiplier"] == 1.3
+    assert after.json()["tier"] == "Premium"
+    assert after.headers["ETag"] != before.headers["ETag"]
+    assert not countries.is_voice_supported("US")
+    assert countries.is_voice_supported("GB")
+
+
+def test_pricing_file_change_rebuilds_catalog(client, pricing_config):
+    """Test a reload picked up from the config file also refreshes the catalog."""
+    pricing_config.write_text(json.dumps({"country_multipliers": {"DE": 0.5}}))
+    pricing_engine.reload()
+    
+    response = client.get("/countries/DE")
+    
+    assert response.json()["price_multiplier"] == 0.5
+    assert response.json()["tier"] == "Economy"
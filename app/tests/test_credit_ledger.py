@@ -0,0 +1,184 @@
+"""Tests for the atomic credit ledger."""
+import pytest
+from app.core.exceptions import InsufficientCreditsError, ValidationError
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.models.verification import Verification
+from app.services.credit_ledger import CreditLedger, verification_refund_key
+from app.services.sms_polling_service import SMSPollingService
+from app.tests.conftest import TestingAsyncSessionLocal
+
+
+async def apply(operation, *args, **kwargs):
+    """Run one ledger operation in its own committed transaction."""
+    async with TestingAsyncSessionLocal() as db:
+        result = await getattr(CreditLedger(db), operation)(*args, **kwargs)
+        await db.commit()
+    return result
+
+
+def balance(db_session, user_id="test_user_123"):
+    """Committed credits of a user."""
+    db_session.expire_all()
+    return db_session.get(User, user_id).credits
+
+
+async def test_debit(db_session, test_user):
+    """Test a covered debit returns the new balance and records a transaction."""
+    entry = await apply("debit", test_user.id, 4.0, "Verification")
+    
+    assert entry.amount == -4.0
+    assert entry.balance == 6.0
+    assert not entry.replayed
+    assert balance(db_session) == 6.0
+    transaction = db_session.get(Transaction, entry.transaction_id)
+    assert (transaction.amount, transaction.type) == (-4.0, "debit")
+
+
+async def test_debit_insufficient_balance(db_session, test_user):
+    """Test a debit beyond the balance is rejected without side effects."""
+    with pytest.raises(InsufficientCreditsError):
+        await apply("debit", test_user.id, 10.5, "Verification")
+    
+    assert balance(db_session) == 10.0
+    assert db_session.query(Transaction).count() == 0
+
+
+async def test_debit_exact_balance(db_session, test_user):
+    """Test the whole balance can be spent."""
+    entry = await apply("debit", test_user.id, 10.0, "Verification")
+    assert entry.balance == 0.0
+
+
+async def test_debit_unknown_user(test_db):
+    """Test a debit for a missing user is a validation error."""
+    with pytest.raises(ValidationError):
+        await apply("debit", "missing_user", 1.0, "Verification")
+
+
+async def test_duplicate_idempotency_key_replays(db_session, test_user):
+    """Test a repeated key charges once and reports the replay."""
+    first = await apply("debit", test_user.id, 3.0, "Rental", idempotency_key="rental:1")
+    second = await apply("debit", test_user.id, 3.0, "Rental", idempotency_key="rental:1")
+    
+    assert second.replayed
+    assert second.transaction_id == first.transaction_id
+    assert second.amount == -3.0
+    assert second.balance is None
+    assert balance(db_session) == 7.0
+    assert db_session.query(Transaction).count() == 1
+
+
+async def test_replay_skips_balance_check(db_session, test_user):
+    """Test a replayed debit succeeds even once the balance no longer covers it."""
+    await apply("debit", test_user.id, 8.0, "Rental", idempotency_key="rental:2")
+    
+    assert (await apply("debit", test_user.id, 8.0, "Rental", idempotency_key="rental:2")).replayed
+    assert balance(db_session) == 2.0
+
+
+async def test_free_verifications(db_session, test_user):
+    """Test free verifications are consumed once and can be restored."""
+    assert await apply("use_free_verification", test_user.id)
+    assert not await apply("use_free_verification", test_user.id)
+    
+    await apply("restore_free_verification", test_user.id)
+    db_session.expire_all()
+    assert db_session.get(User, test_user.id).free_verifications == 1.0
+
+
+@pytest.fixture
+def cancellable(db_session, test_user, monkeypatch):
+    """A paid pending verification, with the upstream cancel stubbed out."""
+    from app.api import verification as verification_api
+    
+    class Upstream:
+        async def cancel_verification(self, verification_id):
+            return {}
+    
+    monkeypatch.setattr(verification_api, "TextVerifiedService", Upstream)
+    db_session.query(User).filter(User.id == test_user.id).update({"credits": 8.0})
+    verification = Verification(user_id=test_user.id, service_name="telegram", status="pending", cost=2.0)
+    db_session.add(verification)
+    db_session.commit()
+    return verification.id
+
+
+def refunds(db_session):
+    """Refund transactions recorded so far."""
+    db_session.expire_all()
+    return db_session.query(Transaction).filter(Transaction.type == "refund").all()
+
+
+async def test_cancel_after_timeout_refunds_once(client, auth_headers, db_session, cancellable):
+    """Test cancelling a timed-out verification does not refund it again."""
+    await SMSPollingService._commit_batch([], [cancellable])
+    
+    response = client.delete(f"/verify/{cancellable}", headers=auth_headers)
+    
+    assert response.status_code == 200
+    assert response.json()["data"]["refunded"] == 0
+    assert [r.idempotency_key for r in refunds(db_session)] == [verification_refund_key(cancellable)]
+    assert balance(db_session) == 10.0
+
+
+async def test_timeout_after_cancel_refunds_once(client, auth_headers, db_session, cancellable):
+    """Test a timeout flushed after a cancel neither refunds nor changes status."""
+    response = client.delete(f"/verify/{cancellable}", headers=auth_headers)
+    assert response.json()["data"] == {"refunded": 2.0, "new_balance": 10.0}
+    
+    _, expired_ids = await SMSPollingService._commit_batch([], [cancellable])
+    
+    assert expired_ids == []
+    assert len(refunds(db_session)) == 1
+    assert db_session.get(Verification, cancellable).status == "cancelled"
+    assert balance(db_session) == 10.0
+
+
+async def test_repeated_cancel_is_rejected(client, auth_headers, db_session, cancellable):
+    """Test a second cancel is refused without a second refund."""
+    client.delete(f"/verify/{cancellable}", headers=auth_headers)
+    
+    response = client.delete(f"/verify/{cancellable}", headers=auth_headers)
+    
+    assert response.status_code == 400
+    assert len(refunds(db_session)) == 1
+
+
+@pytest.fixture
+def free_cancellable(db_session, test_user, cancellable):
+    """A pending verification that used the user's free verification."""
+    db_session.query(User).filter(User.id == test_user.id).update({"credits": 10.0, "free_verifications": 0})
+    db_session.query(Verification).filter(Verification.id == cancellable).update({"cost": 0.0})
+    db_session.commit()
+    return cancellable
+
+
+def free_verifications(db_session, user_id="test_user_123"):
+    """Committed free verifications of a user."""
+    db_session.expire_all()
+    return db_session.get(User, user_id).free_verifications
+
+
+async def test_cancel_free_verification_restores_free_use(client, auth_headers, db_session, free_cancellable):
+    """Test cancelling a free verification gives the free use back without a refund."""
+    response = client.delete(f"/verify/{free_cancellable}", headers=auth_headers)
+    
+    assert response.status_code == 200
+    assert response.json()["data"] == {"refunded": 0, "new_balance": 10.0}
+    assert free_verifications(db_session) == 1.0
+    assert refunds(db_session) == []
+    assert balance(db_session) == 10.0
+
+
+async def test_cancel_free_verification_after_timeout_restores_once(client, auth_headers, db_session, free_cancellable):
+    """Test a free verification that timed out is given back once, not again on cancel."""
+    await SMSPollingService._commit_batch([], [free_cancellable])
+    assert free_verifications(db_session) == 1.0
+    
+    response = client.delete(f"/verify/{free_cancellable}", headers=auth_headers)
+    
+    assert response.status_code == 200
+    assert response.json()["data"] == {"refunded": 0, "new_balance": None}
+    assert free_verifications(db_session) == 1.0
+    assert refunds(db_session) == []
@@ -0,0 +1,185 @@
+"""Tests for incremental maintenance of the daily stats rollup."""
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import update
+from app.api import verification as verification_api
+from app.models.stats import UserDailyStats
+from app.models.transaction import Transaction
+from app.models.verification import Verification
+from app.services.credit_ledger import CreditLedger
+from app.services.daily_stats import ACCOUNT_ROW, rebuild_daily_stats, record_status_changes, stats_day
+from app.services.sms_polling_service import SMSPollingService
+from app.services.verification_reservations import verification_reservations
+from app.tests.conftest import TestingAsyncSessionLocal
+
+COUNTERS = [
+    "verifications", "completed", "failed", "timed_out", "cancelled",
+    "verification_cost", "spent", "refunded", "funded"
+]
+
+
+def rollup(db):
+    """Non-zero counters per (user_id, day, service_name)."""
+    db.expire_all()
+    rows = {}
+    for row in db.query(UserDailyStats):
+        counters = {column: round(getattr(row, column), 6) for column in COUNTERS if getattr(row, column)}
+        if counters:
+            rows[(row.user_id, row.day, row.service_name)] = counters
+    return rows
+
+
+def rebuilt(db):
+    """The rollup as recomputed from raw rows."""
+    rebuild_daily_stats(db)
+    db.commit()
+    return rollup(db)
+
+
+def today():
+    """The UTC day new rows are bucketed under."""
+    return stats_day(None)
+
+
+@pytest.fixture
+def verification(db_session, test_user):
+    """A pending verification inserted through the ORM."""
+    verification = Verification(user_id=test_user.id, service_name="telegram", status="pending", cost=1.5)
+    db_session.add(verification)
+    db_session.commit()
+    return verification
+
+
+def test_insert_counts_verification_and_transaction(db_session, test_user):
+    """Test inserted verifications and transactions are counted on flush."""
+    db_session.add(Verification(user_id=test_user.id, service_name="telegram", status="pending", cost=1.5))
+    db_session.add(Transaction(user_id=test_user.id, amount=-1.5, type="debit", description="Verification"))
+    db_session.add(Transaction(user_id=test_user.id, amount=5.0, type="credit", description="Payment"))
+    db_session.commit()
+    
+    assert rollup(db_session) == {
+        (test_user.id, today(), "telegram"): {"verifications": 1, "verification_cost": 1.5},
+        (test_user.id, today(), ACCOUNT_ROW): {"spent": 1.5, "funded": 5.0}
+    }
+
+
+def test_delete_uncounts_verification(db_session, verification):
+    """Test deleting a verification removes it from its day."""
+    db_session.delete(verification)
+    db_session.commit()
+    
+    assert rollup(db_session) == {}
+
+
+def test_edits_on_expired_instance(db_session, verification):
+    """Test status and cost edits after commit expired the instance."""
+    verification.status = "completed"
+    verification.cost = 2.0
+    db_session.commit()
+    
+    assert rollup(db_session) == {
+        ("test_user_123", today(), "telegram"): {"verifications": 1, "completed": 1, "verification_cost": 2.0}
+    }
+
+
+def test_edit_with_expired_identity_columns(db_session, verification):
+    """Test the flush hook reloads user, service and day it cannot see."""
+    verification.status = "cancelled"
+    db_session.expire(verification, ["user_id", "service_name", "created_at"])
+    db_session.commit()
+    
+    assert rollup(db_session) == {
+        ("test_user_123", today(), "telegram"): {"verifications": 1, "cancelled": 1, "verification_cost": 1.5}
+    }
+
+
+def test_unchanged_status_is_not_counted(db_session, verification):
+    """Test assigning the current status again changes nothing."""
+    verification.status = "pending"
+    db_session.commit()
+    
+    assert rollup(db_session) == rebuilt(db_session)
+
+
+async def test_bulk_update_path(db_session, verification):
+    """Test record_status_changes applies moves made by UPDATE ... RETURNING."""
+    async with TestingAsyncSessionLocal() as db:
+        rows = (await db.execute(
+            update(Verification)
+            .where(Verification.id == verification.id, Verification.status == "pending")
+            .values(status="timeout")
+            .returning(Verification.user_id, Verification.service_name, Verification.created_at)
+        )).all()
+        await record_status_changes(db, rows, "pending", "timeout")
+        await db.commit()
+    
+    assert rollup(db_session) == {
+        ("test_user_123", today(), "telegram"): {"verifications": 1, "timed_out": 1, "verification_cost": 1.5}
+    }
+
+
+async def test_incremental_rollup_matches_rebuild(client, auth_headers, db_session, test_user, monkeypatch):
+    """Test create, complete, cancel, timeout and refund sequences against a full rebuild."""
+    class Upstream:
+        async def cancel_verification(self, verification_id):
+            return {}
+    
+    monkeypatch.setattr(verification_api, "TextVerifiedService", Upstream)
+    
+    async def purchase(number):
+        verification = await verification_reservations.reserve(test_user.id, "telegram", "sms", "US", 1.25)
+        assert await verification_reservations.confirm(verification, f"+1555010{number}", f"tv_{number}")
+        return verification.id
+    
+    async with TestingAsyncSessionLocal() as db:
+        await CreditLedger(db).credit(test_user.id, 5.0, "Payment")
+        await db.commit()
+    
+    free = await purchase(1)  # consumes the free verification
+    completed = await purchase(2)
+    timed_out = await purchase(3)
+    cancelled = await purchase(4)
+    edited = await purchase(5)
+    released = (await verification_reservations.reserve(test_user.id, "whatsapp", "sms", "US", 2.0)).id
+    
+    # A verification created yesterday, completed today
+    yesterday = Verification(
+        user_id=test_user.id, service_name="telegram", status="pending", cost=1.0,
+        created_at=datetime.now(timezone.utc) - timedelta(days=1)
+    )
+    db_session.add(yesterday)
+    db_session.commit()
+    
+    await SMSPollingService._commit_batch([free, completed, yesterday.id], [timed_out])
+    await verification_reservations.release(released)
+    assert client.delete(f"/verify/{cancelled}", headers=auth_headers).status_code == 200
+    
+    # Timeout after cancel refunds nothing and changes no counter
+    await SMSPollingService._commit_batch([], [cancelled])
+    
+    db_session.get(Verification, edited).status = "completed"
+    db_session.commit()
+    
+    incremental = rollup(db_session)
+    assert incremental[(test_user.id, today(), "telegram")] == {
+        "verifications": 5, "completed": 3, "timed_out": 1, "cancelled": 1, "verification_cost": 5.0
+    }
+    assert incremental[(test_user.id, today(), ACCOUNT_ROW)] == {"spent": 7.0, "refunded": 4.5, "funded": 5.0}
+    assert incremental == rebuilt(db_session)
+
+
+def test_rebuild_single_user(db_session, test_user, admin_user):
+    """Test rebuilding one user leaves other users' rows alone."""
+    for user in (test_user, admin_user):
+        db_session.add(Verification(user_id=user.id, service_name="telegram", status="completed", cost=1.0))
+    db_session.commit()
+    before = rollup(db_session)
+    db_session.query(UserDailyStats).filter(UserDailyStats.user_id == admin_user.id).update({"completed": 7})
+    db_session.commit()
+    
+    assert rebuild_daily_stats(db_session, user_id=test_user.id) == 1
+    db_session.commit()
+    
+    after = rollup(db_session)
+    assert after[(test_user.id, today(), "telegram")] == before[(test_user.id, today(), "telegram")]
+    assert after[(admin_user.id, today(), "telegram")]["completed"] == 7
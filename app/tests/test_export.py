@@ -0,0 +1,104 @@
+"""Tests for the streamed /analytics/export formats."""
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.models.transaction import Transaction
+from app.models.verification import Verification
+from app.services.export_service import export_service
+
+
+@pytest.fixture
+def verifications(db_session, test_user, admin_user):
+    """Three verifications for the test user, newest first, and one for another user."""
+    now = datetime.now(timezone.utc)
+    rows = [
+        Verification(
+            user_id=test_user.id, service_name=service, phone_number=phone, status="completed",
+            cost=1.0, created_at=now - timedelta(days=days)
+        )
+        for service, phone, days in [("telegram", "+15550101", 1), ("whatsapp", None, 2), ("discord", "+15550103", 3)]
+    ]
+    rows.append(Verification(user_id=admin_user.id, service_name="google", status="pending", cost=1.0))
+    db_session.add_all(rows)
+    db_session.commit()
+    return [row.id for row in rows[:3]]
+
+
+def export(client, auth_headers, **params):
+    """GET /analytics/export with the given query parameters."""
+    return client.get("/analytics/export", params=params, headers=auth_headers)
+
+
+def test_json_export(client, auth_headers, verifications):
+    """Test JSON wraps the newest-first rows with count and date range."""
+    response = export(client, auth_headers, output_format="json")
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/json")
+    body = response.json()
+    assert [row["id"] for row in body["data"]] == verifications
+    assert list(body["data"][0]) == export_service.columns("verifications", "test_user_123")
+    assert body["count"] == 3
+    assert body["format"] == "json"
+    assert set(body["date_range"]) == {"from", "to"}
+
+
+def test_json_export_across_batches(client, auth_headers, verifications, monkeypatch):
+    """Test records stay comma-separated when they span several batches."""
+    monkeypatch.setattr(export_service, "batch_size", 2)
+    
+    body = export(client, auth_headers, output_format="json").json()
+    
+    assert [row["id"] for row in body["data"]] == verifications
+
+
+def test_ndjson_export(client, auth_headers, verifications):
+    """Test NDJSON has one object per line."""
+    response = export(client, auth_headers, output_format="ndjson")
+    
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = response.text.splitlines()
+    assert [json.loads(line)["id"] for line in lines] == verifications
+    assert json.loads(lines[1])["phone_number"] is None
+
+
+def test_csv_export(client, auth_headers, verifications):
+    """Test CSV has a header row, one row per verification and blanks for nulls."""
+    response = export(client, auth_headers, output_format="csv")
+    
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.headers["content-disposition"] == "attachment; filename=verifications.csv"
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["id"] for row in rows] == verifications
+    assert rows[1]["phone_number"] == ""
+    assert rows[1]["completed_at"] == ""
+
+
+def test_gzip_export(client, auth_headers, verifications):
+    """Test compress gzips the same bytes."""
+    plain = export(client, auth_headers, output_format="ndjson").content
+    
+    response = export(client, auth_headers, output_format="ndjson", compress=True)
+    
+    assert response.headers["content-type"] == "application/gzip"
+    assert response.headers["content-disposition"] == "attachment; filename=verifications.ndjson.gz"
+    assert gzip.decompress(response.content) == plain
+
+
+def test_transactions_export(client, auth_headers, db_session, test_user):
+    """Test transactions export with their own columns."""
+    db_session.add(Transaction(user_id=test_user.id, amount=5.0, type="credit", description="Payment"))
+    db_session.commit()
+    
+    body = export(client, auth_headers, data_type="transactions").json()
+    
+    assert [(row["amount"], row["type"]) for row in body["data"]] == [(5.0, "credit")]
+
+
+def test_invalid_format(client, auth_headers):
+    """Test unknown formats are refused."""
+    response = export(client, auth_headers, output_format="xml")
+    assert response.json() == {"error": "Invalid output_format. Use 'json', 'ndjson' or 'csv'"}
@@ -0,0 +1,122 @@
+"""Tests for background export jobs and their downloads."""
+import csv
+import gzip
+import io
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.api import analytics as analytics_api
+from app.models.verification import Verification
+from app.services.export_jobs import COMPLETED, FAILED, ExportJobs, LocalExportStorage
+
+
+@pytest.fixture
+def verifications(db_session, test_user, admin_user):
+    """Two verifications for the test user and one for another user."""
+    db_session.add_all([
+        Verification(user_id=test_user.id, service_name="telegram", status="completed", cost=1.0),
+        Verification(user_id=test_user.id, service_name="whatsapp", status="failed", cost=1.0),
+        Verification(user_id=admin_user.id, service_name="google", status="completed", cost=1.0)
+    ])
+    db_session.commit()
+
+
+@pytest.fixture
+async def jobs(tmp_path, monkeypatch):
+    """A one-worker pool writing to a temporary directory, used by the routes."""
+    jobs = ExportJobs(LocalExportStorage(str(tmp_path)), workers=1, max_queued=5)
+    monkeypatch.setattr(analytics_api, "export_jobs", jobs)
+    await jobs.start()
+    yield jobs
+    await jobs.stop()
+
+
+async def run_export(jobs, user_id="test_user_123", output_format="csv"):
+    """Submit an export of the last day and wait for it to finish."""
+    now = datetime.now(timezone.utc)
+    job = await jobs.submit(user_id, "verifications", output_format, user_id, now - timedelta(days=1), now + timedelta(minutes=1))
+    await jobs._queue.join()
+    return job
+
+
+async def test_job_writes_gzipped_export(jobs, verifications):
+    """Test a finished job stores the user's rows and records progress and timing."""
+    job = await run_export(jobs)
+    
+    assert job.status == COMPLETED
+    assert job.rows == 2
+    path = jobs.file_path(job)
+    assert job.bytes_written == path.stat().st_size
+    assert not path.with_name(f"{path.name}.part").exists()
+    rows = list(csv.DictReader(io.StringIO(gzip.decompress(path.read_bytes()).decode())))
+    assert sorted(row["service_name"] for row in rows) == ["telegram", "whatsapp"]
+    assert job.queue_seconds >= 0 and job.run_seconds >= 0
+    assert job.to_dict()["filename"] == job.filename
+
+
+async def test_status_survives_in_shared_file(jobs, verifications):
+    """Test another process sharing the directory can read a job's status."""
+    job = await run_export(jobs)
+    
+    other = ExportJobs(jobs.storage)
+    
+    assert other.get(job.id).status == COMPLETED
+    assert other.get(job.id).rows == 2
+    assert other.get("../escape") is None
+
+
+async def test_queue_is_bounded(tmp_path):
+    """Test submit refuses work when the pool is stopped or the queue is full."""
+    jobs = ExportJobs(LocalExportStorage(str(tmp_path)), workers=0, max_queued=1)
+    assert await jobs.submit("u", "verifications", "csv", "u") is None
+    
+    await jobs.start()
+    queued = await jobs.submit("u", "verifications", "csv", "u")
+    assert await jobs.submit("u", "verifications", "csv", "u") is None
+    await jobs.stop()
+    
+    assert queued.status == FAILED
+    assert jobs.get(queued.id).error == "Export cancelled by shutdown"
+
+
+async def test_download_supports_range(client, auth_headers, jobs, verifications):
+    """Test the owner can download the file whole or resume part-way."""
+    job = await run_export(jobs)
+    content = jobs.file_path(job).read_bytes()
+    
+    status = client.get(f"/analytics/export/jobs/{job.id}", headers=auth_headers).json()
+    full = client.get(status["download_url"], headers=auth_headers)
+    partial = client.get(status["download_url"], headers={**auth_headers, "Range": "bytes=10-"})
+    
+    assert status["status"] == COMPLETED
+    assert full.status_code == 200
+    assert full.content == content
+    assert partial.status_code == 206
+    assert partial.content == content[10:]
+
+
+async def test_other_users_jobs_are_hidden(client, auth_headers, jobs, verifications):
+    """Test a job created by someone else is reported as not found."""
+    job = await run_export(jobs, user_id="admin_user_123")
+    
+    assert client.get(f"/analytics/export/jobs/{job.id}", headers=auth_headers).status_code == 404
+    assert client.get(f"/analytics/export/jobs/{job.id}/download", headers=auth_headers).status_code == 404
+
+
+async def test_download_of_unfinished_job_conflicts(client, auth_headers, tmp_path, monkeypatch):
+    """Test a queued job cannot be downloaded yet."""
+    jobs = ExportJobs(LocalExportStorage(str(tmp_path)), workers=0)
+    monkeypatch.setattr(analytics_api, "export_jobs", jobs)
+    await jobs.start()
+    job = await jobs.submit("test_user_123", "verifications", "csv", "test_user_123")
+    
+    response = client.get(f"/analytics/export/jobs/{job.id}/download", headers=auth_headers)
+    await jobs.stop()
+    
+    assert response.status_code == 409
+
+
+def test_create_job_when_pool_is_down(client, auth_headers):
+    """Test the create route returns 503 when no workers accept jobs."""
+    response = client.post("/analytics/export/jobs", json={"format": "csv"}, headers=auth_headers)
+    
+    assert response.status_code == 503
@@ -0,0 +1,49 @@
+"""Tests for request metric labels."""
+import pytest
+from prometheus_client import REGISTRY
+from app.api import verification as verification_api
+from app.core.metrics import UNMATCHED_ROUTE
+
+
+class Upstream:
+    """TextVerified stand-in for status reads."""
+    
+    async def get_verification_status(self, verification_id):
+        return {"state": "verificationPending"}
+
+
+@pytest.fixture(autouse=True)
+def upstream(monkeypatch):
+    """Keep verification routes off the real TextVerified API."""
+    monkeypatch.setattr(verification_api, "TextVerifiedService", Upstream)
+
+
+def requests_total(method, endpoint, status_code):
+    """Current value of http_requests_total for one label set."""
+    labels = {"method": method, "endpoint": endpoint, "status_code": str(status_code)}
+    return REGISTRY.get_sample_value("http_requests_total", labels) or 0
+
+
+def counted(client, method, path, endpoint, status_code):
+    """Whether one request was counted once under the given labels."""
+    before = requests_total(method, endpoint, status_code)
+    response = client.request(method, path)
+    assert response.status_code == status_code
+    return requests_total(method, endpoint, status_code) - before == 1
+
+
+def test_routed_request_uses_path_template(client):
+    """Test a handled request is labelled with its route template, not its path."""
+    assert counted(client, "GET", "/verify/missing-1", "/verify/{verification_id}", 404)
+    assert requests_total("GET", "/verify/missing-1", 404) == 0
+
+
+def test_rejected_request_uses_path_template(client):
+    """Test a request rejected by auth before routing still gets its route template."""
+    assert counted(client, "DELETE", "/verify/missing-2", "/verify/{verification_id}", 401)
+
+
+def test_unknown_path_is_unmatched(client):
+    """Test paths matching no route share one label."""
+    assert counted(client, "GET", "/no-such-route/123", UNMATCHED_ROUTE, 401)
+    assert counted(client, "GET", "/no-such-route/456", UNMATCHED_ROUTE, 401)
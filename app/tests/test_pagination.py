@@ -0,0 +1,91 @@
+"""Tests for keyset pagination of verification history."""
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.models.verification import Verification
+from app.utils.pagination import capped_count, decode_cursor, encode_cursor
+
+
+@pytest.fixture
+def history(db_session, test_user, admin_user):
+    """Five verifications for the test user, two sharing a timestamp, newest first."""
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    rows = [
+        Verification(id=f"v{i}", user_id=test_user.id, service_name=service, status="completed", cost=1.0,
+                     created_at=start + timedelta(minutes=minutes))
+        for i, (service, minutes) in enumerate([
+            ("telegram", 0), ("whatsapp", 1), ("telegram", 2), ("telegram", 2), ("whatsapp", 3)
+        ])
+    ]
+    rows.append(Verification(id="other", user_id=admin_user.id, service_name="telegram", status="completed", cost=1.0))
+    db_session.add_all(rows)
+    db_session.commit()
+    return ["v4", "v3", "v2", "v1", "v0"]
+
+
+def pages(client, auth_headers, **params):
+    """Follow next_cursor from the first page to the last."""
+    ids, responses, cursor = [], [], None
+    while True:
+        query = {**params, **({"cursor": cursor} if cursor else {})}
+        body = client.get("/verify/history", params=query, headers=auth_headers).json()
+        responses.append(body)
+        ids += [v["id"] for v in body["verifications"]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return ids, responses
+
+
+def test_cursor_round_trip():
+    """Test a cursor decodes to the position it encoded."""
+    created_at = datetime(2026, 1, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+    cursor = encode_cursor(created_at, "v1")
+    
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, "v1")
+
+
+@pytest.mark.parametrize("cursor", ["", "not-base64!", encode_cursor(datetime(2026, 1, 1), "v1")[:-4]])
+def test_malformed_cursor(cursor):
+    """Test malformed cursors raise ValueError."""
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_pages_cover_history_once(client, auth_headers, history):
+    """Test following cursors returns every row once, newest first, ties broken by id."""
+    ids, responses = pages(client, auth_headers, limit=2)
+    
+    assert ids == history
+    assert len(responses) == 3
+    assert all(body["total_count"] == 5 for body in responses)
+
+
+def test_exact_last_page_has_no_cursor(client, auth_headers, history):
+    """Test a page that ends exactly at the last row does not offer another."""
+    body = client.get("/verify/history", params={"limit": 5}, headers=auth_headers).json()
+    
+    assert [v["id"] for v in body["verifications"]] == history
+    assert body["next_cursor"] is None
+
+
+def test_filters_apply_on_every_page(client, auth_headers, history):
+    """Test a service filter holds across cursor pages."""
+    ids, _ = pages(client, auth_headers, limit=1, service="telegram")
+    
+    assert ids == ["v3", "v2", "v0"]
+
+
+def test_invalid_cursor_is_rejected(client, auth_headers, history):
+    """Test a tampered cursor gets 400."""
+    response = client.get("/verify/history", params={"cursor": "garbage"}, headers=auth_headers)
+    
+    assert response.status_code == 400
+    assert response.json()["message"] == "Invalid cursor"
+
+
+def test_capped_count(db_session, history):
+    """Test counts stop at the cap and report an estimate."""
+    query = db_session.query(Verification).filter(Verification.user_id == "test_user_123")
+    
+    assert capped_count(query, Verification.id, cap=10) == (5, False)
+    assert capped_count(query, Verification.id, cap=2) == (2, True)
@@ -0,0 +1,52 @@
+"""Tests for precompiled path rules."""
+from app.core.path_matcher import PathMatcher
+
+
+def test_prefix_matches_whole_segments():
+    """Test a prefix covers the path and everything below it, but not lookalikes."""
+    matcher = PathMatcher(["/admin"])
+    
+    assert "/admin" in matcher
+    assert "/admin/users/1" in matcher
+    assert "/admin/" in matcher
+    assert "/administrator" not in matcher
+
+
+def test_exact_ignores_trailing_slash_and_query():
+    """Test exact rules match only their path."""
+    matcher = PathMatcher(exact=["/pricing"])
+    
+    assert "/pricing/" in matcher
+    assert "/pricing?plan=pro" in matcher
+    assert "/pricing/enterprise" not in matcher
+
+
+def test_most_specific_rule_wins():
+    """Test longer rules override shorter ones, and exact overrides prefix."""
+    matcher = PathMatcher({"/verify": "prefix", "/verify/create": "create"}, {"/verify": "root"})
+    
+    assert matcher.match("/verify") == "root"
+    assert matcher.match("/verify/history") == "prefix"
+    assert matcher.match("/verify/create") == "create"
+    assert matcher.match("/wallet", "default") == "default"
+
+
+def test_params_match_one_segment():
+    """Test {param} matches any single segment, with literals tried first."""
+    matcher = PathMatcher(exact={
+        "/verify/{verification_id}": "status",
+        "/verify/{verification_id}/messages": "messages",
+        "/verify/history": False
+    })
+    
+    assert matcher.match("/verify/abc123") == "status"
+    assert matcher.match("/verify/abc123/messages") == "messages"
+    assert matcher.match("/verify/history") is False
+    assert matcher.match("/verify/abc123/voice/extra") is None
+
+
+def test_literal_falls_back_to_param():
+    """Test a literal branch without a match falls back to the wildcard branch."""
+    matcher = PathMatcher(exact={"/verify/history/export": "export", "/verify/{verification_id}/messages": "messages"})
+    
+    assert matcher.match("/verify/history/messages") == "messages"
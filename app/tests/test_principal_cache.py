@@ -0,0 +1,169 @@
+"""Tests for principal resolution and caching."""
+import asyncio
+import pytest
+from app.core.caching import cache
+from app.core.principal_cache import (
+    Principal, PrincipalCache, PrincipalInvalidator,
+    principal_cache, resolve_principal_async, token_cache_key
+)
+from app.models.user import User
+from app.utils.security import create_access_token, verify_token
+
+
+def issue(user_id):
+    """Create a token and its decoded payload."""
+    token = create_access_token({"user_id": user_id})
+    return token, verify_token(token)
+
+
+async def test_resolve_loads_and_caches(test_user):
+    """Test the first lookup hits the database and fills the cache."""
+    token, payload = issue(test_user.id)
+    
+    principal = await resolve_principal_async(token, payload)
+    
+    assert principal.user_id == test_user.id
+    assert principal.email == "test@example.com"
+    assert principal.is_active and not principal.is_admin
+    assert principal_cache.get(token_cache_key(token, payload)) == principal
+
+
+async def test_resolve_unknown_user(test_db):
+    """Test tokens for missing users resolve to nothing and are not cached."""
+    token, payload = issue("missing_user")
+    
+    assert await resolve_principal_async(token, payload) is None
+    assert principal_cache.get(token_cache_key(token, payload)) is None
+
+
+async def test_resolve_without_user_id(test_db):
+    """Test payloads without a user id are rejected."""
+    token, payload = issue(None)
+    assert await resolve_principal_async(token, payload) is None
+
+
+async def test_invalidate_user_reloads(db_session, test_user):
+    """Test suspension is seen once the user's entries are invalidated."""
+    token, payload = issue(test_user.id)
+    await resolve_principal_async(token, payload)
+    
+    db_session.query(User).filter(User.id == test_user.id).update({"is_active": False})
+    db_session.commit()
+    assert (await resolve_principal_async(token, payload)).is_active
+    
+    principal_cache.invalidate_user(test_user.id)
+    assert not (await resolve_principal_async(token, payload)).is_active
+
+
+class FakeRedis:
+    """In-memory pub/sub shared by simulated workers."""
+    
+    def __init__(self):
+        self.subscribers = []
+    
+    async def publish(self, channel, message):
+        for queue in self.subscribers:
+            queue.put_nowait({"type": "message", "data": message})
+    
+    def pubsub(self):
+        return FakePubSub(self)
+
+
+class FakePubSub:
+    """One subscription on a FakeRedis."""
+    
+    def __init__(self, redis):
+        self.redis = redis
+        self.queue = asyncio.Queue()
+    
+    async def subscribe(self, channel):
+        self.redis.subscribers.append(self.queue)
+    
+    async def listen(self):
+        while True:
+            yield await self.queue.get()
+    
+    async def close(self):
+        self.redis.subscribers.remove(self.queue)
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Route the shared cache client to an in-memory pub/sub."""
+    redis = FakeRedis()
+    monkeypatch.setattr(cache, "redis_client", redis)
+    monkeypatch.setattr(cache, "_connected", True)
+    return redis
+
+
+async def test_invalidation_reaches_other_workers(fake_redis):
+    """Test suspending on one worker clears the user's principals on every worker."""
+    workers = [PrincipalInvalidator(PrincipalCache()) for _ in range(2)]
+    principal = Principal(user_id="user_1", email=None, is_admin=False, is_active=True)
+    for worker in workers:
+        worker.principals.set("token_1", principal)
+        await worker.start()
+    while len(fake_redis.subscribers) < len(workers):
+        await asyncio.sleep(0)
+    
+    workers[0].invalidate_user("user_1")
+    assert workers[0].principals.get("token_1") is None
+    
+    for _ in range(100):
+        if workers[1].principals.get("token_1") is None:
+            break
+        await asyncio.sleep(0.01)
+    assert workers[1].principals.get("token_1") is None
+    
+    for worker in workers:
+        await worker.stop()
+
+
+def test_invalidation_ignores_own_messages():
+    """Test a worker does not re-apply its own broadcasts."""
+    worker = PrincipalInvalidator(PrincipalCache())
+    worker.principals.set("token_1", Principal(user_id="user_1", email=None, is_admin=False, is_active=True))
+    
+    worker.apply({"origin": worker.instance_id, "user_id": "user_1"})
+    assert worker.principals.get("token_1") is not None
+    
+    worker.apply({"origin": "other", "user_id": "user_1"})
+    assert worker.principals.get("token_1") is None
+
+
+def test_invalidation_without_loop_stays_local():
+    """Test sync callers outside the app loop still clear the local cache."""
+    worker = PrincipalInvalidator(PrincipalCache())
+    worker.principals.set("token_1", Principal(user_id="user_1", email=None, is_admin=False, is_active=True))
+    
+    worker.invalidate_user("user_1")
+    assert worker.principals.get("token_1") is None
+
+
+def test_suspension_applies_to_cached_sessions(client, auth_headers, admin_user):
+    """Test a suspended user's cached token stops working at once."""
+    admin_token = client.post("/auth/login", json={
+        "email": "admin@example.com",
+        "password": "adminpass123"
+    }).json()["access_token"]
+    assert client.get("/wallet/balance", headers=auth_headers).status_code == 200
+    
+    response = client.post("/admin/users/test_user_123/suspend", headers={"Authorization": f"Bearer {admin_token}"})
+    
+    assert response.status_code == 200
+    assert client.get("/wallet/balance", headers=auth_headers).status_code == 403
+
+
+def test_activation_restores_cached_sessions(client, auth_headers, admin_user):
+    """Test a reactivated user's token works again without logging in."""
+    admin_headers = {"Authorization": "Bearer " + client.post("/auth/login", json={
+        "email": "admin@example.com",
+        "password": "adminpass123"
+    }).json()["access_token"]}
+    client.post("/admin/users/test_user_123/suspend", headers=admin_headers)
+    assert client.get("/wallet/balance", headers=auth_headers).status_code == 403
+    
+    response = client.post("/admin/users/test_user_123/activate", headers=admin_headers)
+    
+    assert response.status_code == 200
+    assert client.get("/wallet/balance", headers=auth_headers).status_code == 200
@@ -0,0 +1,106 @@
+"""Tests for IP and user rate limiting."""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.core.rate_limiter import LocalSlidingWindow, SlidingWindowRateLimiter
+from app.middleware.rate_limiting import RateLimitMiddleware
+from app.utils.security import create_access_token
+
+
+@pytest.fixture
+def limited_client():
+    """Client for an app allowing 2 requests per IP and 4 per user."""
+    limiter = SlidingWindowRateLimiter()
+    limiter._redis_down_until = float("inf")  # in-process counters only
+    
+    bare_app = FastAPI()
+    
+    @bare_app.get("/ping")
+    def ping():
+        return {"ok": True}
+    
+    bare_app.add_middleware(RateLimitMiddleware, default_requests=2, default_window=60, limiter=limiter)
+    return TestClient(bare_app)
+
+
+def test_anonymous_requests_use_ip_limit(limited_client):
+    """Test anonymous clients are limited per IP."""
+    responses = [limited_client.get("/ping") for _ in range(3)]
+    
+    assert [r.status_code for r in responses] == [200, 200, 429]
+    assert responses[0].headers["X-RateLimit-Limit"] == "2"
+    assert responses[2].json()["message"] == "IP rate limit exceeded"
+
+
+def test_token_applies_user_limit(limited_client):
+    """Test a valid token is counted per user across IPs, before authentication."""
+    headers = {"Authorization": f"Bearer {create_access_token({'user_id': 'user_1'})}"}
+    statuses = []
+    for ip in range(5):
+        response = limited_client.get("/ping", headers={**headers, "X-Forwarded-For": f"10.0.0.{ip}"})
+        statuses.append(response.status_code)
+    
+    assert statuses == [200, 200, 200, 200, 429]
+    assert response.json()["message"] == "User rate limit exceeded"
+
+
+def test_invalid_token_is_anonymous(limited_client):
+    """Test a forged token earns no user limit."""
+    response = limited_client.get("/ping", headers={"Authorization": "Bearer not-a-token"})
+    assert response.headers["X-RateLimit-Limit"] == "2"
+
+
+def test_app_stack_limits_authenticated_users(client, auth_headers):
+    """Test the installed limiter sees the user before JWT auth runs."""
+    headers = {**auth_headers, "X-Forwarded-For": "10.1.0.1"}
+    
+    authenticated = client.get("/wallet/balance", headers=headers)
+    anonymous = client.get("/wallet/balance", headers={"X-Forwarded-For": "10.1.0.2"})
+    
+    assert authenticated.status_code == 200
+    assert int(authenticated.headers["X-RateLimit-Limit"]) == 2 * int(anonymous.headers["X-RateLimit-Limit"])
+
+
+def test_window_weights_previous_count():
+    """Test the previous window counts in proportion to its overlap."""
+    window = LocalSlidingWindow()
+    limits = [("ip:1", 2)]
+    
+    assert [window.hit(limits, 60, now=0).allowed for _ in range(3)] == [True, True, False]
+    # Just after the boundary the full previous count still applies
+    assert not window.hit(limits, 60, now=60).allowed
+    # Half way through, half of it does: one request fits
+    assert window.hit(limits, 60, now=90).allowed
+    assert not window.hit(limits, 60, now=90).allowed
+    # Two windows on, nothing carries over
+    assert window.hit(limits, 60, now=180).remaining == (1,)
+
+
+def test_rejected_request_consumes_nothing():
+    """Test a request over one limit is not counted against the others."""
+    window = LocalSlidingWindow()
+    window.hit([("ip:1", 1)], 60, now=0)
+    
+    rejected = window.hit([("ip:1", 1), ("user:1", 4)], 60, now=1)
+    
+    assert not rejected.allowed
+    assert rejected.remaining == (0, 4)
+    assert rejected.reset == 60
+    assert window.hit([("user:1", 4)], 60, now=2).remaining == (3,)
+
+
+async def test_falls_back_to_local_counters_when_redis_fails(monkeypatch):
+    """Test a Redis error switches to in-process counters until the retry interval passes."""
+    limiter = SlidingWindowRateLimiter(retry_interval=30.0)
+    calls = []
+    
+    async def unavailable(limits, window):
+        calls.append(limits)
+        raise ConnectionError("redis down")
+    
+    monkeypatch.setattr(limiter, "_hit_redis", unavailable)
+    
+    results = [await limiter.hit([("ip:1", 2)], 60) for _ in range(3)]
+    
+    assert [r.allowed for r in results] == [True, True, False]
+    assert len(calls) == 1  # Redis is skipped until the retry interval passes
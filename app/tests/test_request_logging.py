@@ -0,0 +1,45 @@
+"""Tests for deferred request log entries."""
+from app.middleware.logging import RequestLogEntry
+
+
+def request_scope():
+    """A minimal HTTP scope with a secret header and query parameter."""
+    return {
+        "type": "http",
+        "scheme": "http",
+        "server": ("testserver", 80),
+        "root_path": "",
+        "path": "/verify/create",
+        "query_string": b"token=abc&page=2",
+        "method": "POST",
+        "client": ("10.0.0.1", 5000),
+        "headers": [(b"authorization", b"Bearer secret"), (b"user-agent", b"pytest")],
+        "state": {}
+    }
+
+
+def test_entry_is_redacted():
+    """Test secrets in headers, query parameters and body are redacted."""
+    entry = RequestLogEntry(request_scope(), "user_1", None, b'{"password": "hunter2", "service": "telegram"}', 0.0)
+    
+    data = entry.to_dict()
+    
+    assert data["headers"]["authorization"] == "[REDACTED]"
+    assert data["query_params"] == {"token": "[REDACTED]", "page": "2"}
+    assert data["body"] == {"password": "[REDACTED]", "service": "telegram"}
+    assert data["client_ip"] == "10.0.0.1"
+
+
+def test_entry_ignores_later_scope_changes():
+    """Test formatting after the request moved on still shows the logged request."""
+    scope = request_scope()
+    entry = RequestLogEntry(scope, "user_1", None, None, 0.0)
+    
+    scope["headers"].append((b"x-forwarded-for", b"203.0.113.9"))
+    scope["headers"][1] = (b"user-agent", b"changed")
+    scope.update(path="/other", query_string=b"", method="GET", client=None)
+    
+    data = entry.to_dict()
+    assert (data["method"], data["path"], data["client_ip"]) == ("POST", "/verify/create", "10.0.0.1")
+    assert data["user_agent"] == "pytest"
+    assert data["query_params"]["page"] == "2"
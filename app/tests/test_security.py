@@ -0,0 +1,136 @@
+"""Tests for JWT authentication of public and protected paths."""
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from app.api import verification as verification_api
+from app.core.api_key_cache import api_key_cache
+from app.core.dependencies import get_current_user_id
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.models.verification import Verification
+
+
+class Upstream:
+    """TextVerified stand-in for status reads and cancellations."""
+    
+    async def get_verification_status(self, verification_id):
+        return {"state": "verificationPending"}
+    
+    async def cancel_verification(self, verification_id):
+        return {}
+
+
+@pytest.fixture(autouse=True)
+def upstream(monkeypatch):
+    """Keep verification routes off the real TextVerified API."""
+    monkeypatch.setattr(verification_api, "TextVerifiedService", Upstream)
+
+
+@pytest.fixture
+def verification(db_session, test_user):
+    """A pending verification for the test user."""
+    verification = Verification(user_id=test_user.id, service_name="telegram", status="pending", cost=1.0)
+    db_session.add(verification)
+    db_session.commit()
+    return verification
+
+
+@pytest.fixture
+def suspend(db_session):
+    """Mark the test user inactive."""
+    def suspend_user():
+        db_session.query(User).filter(User.id == "test_user_123").update({"is_active": False})
+        db_session.commit()
+    return suspend_user
+
+
+@pytest.fixture
+def api_key(client, auth_headers, monkeypatch):
+    """A new API key for the test user, cached in process only."""
+    monkeypatch.setattr(api_key_cache, "_redis_down_until", float("inf"))
+    response = client.post("/auth/api-keys", json={"name": "CI"}, headers=auth_headers)
+    return response.json()["key"]
+
+
+def test_status_is_public(client, verification):
+    """Test verification status needs no token."""
+    assert client.get(f"/verify/{verification.id}").status_code == 200
+
+
+def test_cancel_requires_token(client, verification):
+    """Test DELETE on a public read path is authenticated."""
+    response = client.delete(f"/verify/{verification.id}")
+    
+    assert response.status_code == 401
+    assert response.json()["error"] == "Authentication required"
+
+
+def test_suspended_user_cannot_cancel(client, auth_headers, db_session, verification, suspend):
+    """Test a suspended account cannot cancel and trigger a refund."""
+    suspend()
+    
+    response = client.delete(f"/verify/{verification.id}", headers=auth_headers)
+    
+    assert response.status_code == 403
+    db_session.expire_all()
+    assert db_session.get(Verification, verification.id).status == "pending"
+    assert db_session.query(Transaction).count() == 0
+
+
+def test_cancel_refunds_active_user(client, auth_headers, verification):
+    """Test an active owner can still cancel."""
+    response = client.delete(f"/verify/{verification.id}", headers=auth_headers)
+    
+    assert response.status_code == 200
+    assert response.json()["data"]["refunded"] == 1.0
+
+
+def test_dependency_rejects_suspended_user_without_middleware(auth_headers, suspend):
+    """Test get_current_user_id checks the account when no principal is attached."""
+    bare_app = FastAPI()
+    
+    @bare_app.get("/whoami")
+    def whoami(user_id: str = Depends(get_current_user_id)):
+        return {"user_id": user_id}
+    
+    bare_client = TestClient(bare_app)
+    assert bare_client.get("/whoami", headers=auth_headers).json() == {"user_id": "test_user_123"}
+    
+    from app.core.principal_cache import principal_cache
+    principal_cache.clear()
+    suspend()
+    assert bare_client.get("/whoami", headers=auth_headers).status_code == 403
+
+
+def test_rejection_carries_cors_headers(client, verification):
+    """Test a browser can read the 401 from a cross-origin request."""
+    response = client.delete(f"/verify/{verification.id}", headers={"Origin": "https://app.example.com"})
+    
+    assert response.status_code == 401
+    assert response.headers["Access-Control-Allow-Origin"] == "https://app.example.com"
+
+
+def test_api_key_authenticates(client, api_key, verification):
+    """Test a protected route accepts X-API-Key without a Bearer token."""
+    response = client.delete(f"/verify/{verification.id}", headers={"X-API-Key": api_key})
+    
+    assert response.status_code == 200
+    assert response.json()["data"]["refunded"] == 1.0
+
+
+def test_unknown_api_key_is_rejected(client, api_key, verification):
+    """Test an unknown API key gets 401 and leaves the verification alone."""
+    response = client.delete(f"/verify/{verification.id}", headers={"X-API-Key": api_key + "x"})
+    
+    assert response.status_code == 401
+    assert response.json()["error"] == "Invalid API key"
+
+
+def test_suspended_api_key_owner_is_rejected(client, api_key, verification, suspend):
+    """Test an API key stops working once its owner is suspended."""
+    suspend()
+    api_key_cache.invalidate_user("test_user_123")
+    
+    response = client.delete(f"/verify/{verification.id}", headers={"X-API-Key": api_key})
+    
+    assert response.status_code == 403
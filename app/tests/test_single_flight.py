@@ -0,0 +1,85 @@
+"""Tests for coalescing identical upstream calls."""
+import asyncio
+from types import SimpleNamespace
+import pytest
+from app.core import caching
+from app.core.caching import SingleFlight
+
+
+@pytest.fixture
+def upstream():
+    """A slow call that records how often it ran."""
+    calls = []
+    
+    async def call(result="ok"):
+        calls.append(result)
+        await asyncio.sleep(0.01)
+        return result
+    
+    call.calls = calls
+    return call
+
+
+async def test_concurrent_calls_share_one_request(upstream):
+    """Test identical concurrent calls run the function once."""
+    flight = SingleFlight()
+    hits = []
+    
+    results = await asyncio.gather(*(flight.do("GetSMS", upstream, on_hit=hits.append) for _ in range(5)))
+    
+    assert results == ["ok"] * 5
+    assert len(upstream.calls) == 1
+    assert hits == ["inflight"] * 4
+    assert flight.get_stats() == {"calls": 1, "inflight_hits": 4, "cache_hits": 0, "in_flight": 0}
+
+
+async def test_different_keys_are_not_shared(upstream):
+    """Test calls with different keys run separately."""
+    flight = SingleFlight()
+    
+    await asyncio.gather(flight.do("a", upstream), flight.do("b", upstream))
+    
+    assert len(upstream.calls) == 2
+
+
+async def test_ttl_serves_recent_result(upstream, monkeypatch):
+    """Test a result is reused within its ttl and refetched after it."""
+    flight = SingleFlight()
+    now = [100.0]
+    monkeypatch.setattr(caching, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    
+    await flight.do("GetBalance", upstream, ttl=5.0)
+    await flight.do("GetBalance", upstream, ttl=5.0)
+    now[0] += 6
+    await flight.do("GetBalance", upstream, ttl=5.0)
+    
+    assert len(upstream.calls) == 2
+    assert flight.get_stats()["cache_hits"] == 1
+
+
+async def test_uncacheable_results_are_not_kept():
+    """Test results rejected by cacheable, such as errors, are fetched again."""
+    flight = SingleFlight()
+    calls = []
+    
+    async def failing():
+        calls.append(1)
+        return {"error": "API request failed after retries"}
+    
+    for _ in range(2):
+        await flight.do("GetSMS", failing, ttl=1.0, cacheable=lambda result: "error" not in result)
+    
+    assert len(calls) == 2
+
+
+async def test_cancelled_caller_does_not_cancel_shared_call(upstream):
+    """Test the remaining callers still get the result when one is cancelled."""
+    flight = SingleFlight()
+    first = asyncio.ensure_future(flight.do("GetSMS", upstream))
+    second = asyncio.ensure_future(flight.do("GetSMS", upstream))
+    await asyncio.sleep(0)
+    
+    first.cancel()
+    
+    assert await second == "ok"
+    assert len(upstream.calls) == 1
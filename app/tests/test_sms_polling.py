@@ -0,0 +1,72 @@
+"""Tests for the SMS polling batch writer."""
+import pytest
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.models.verification import Verification
+from app.services.credit_ledger import verification_refund_key
+from app.services.sms_polling_service import SMSPollingService
+
+
+@pytest.fixture
+def verifications(db_session, test_user):
+    """Pending, cancelled and completed verifications for the test user."""
+    rows = {
+        status: Verification(user_id=test_user.id, service_name="telegram", status=status, cost=1.0)
+        for status in ("pending", "cancelled", "completed")
+    }
+    rows["expiring"] = Verification(user_id=test_user.id, service_name="telegram", status="pending", cost=2.0)
+    db_session.add_all(rows.values())
+    db_session.commit()
+    return {status: verification.id for status, verification in rows.items()}
+
+
+async def test_commit_batch_skips_finished_rows(db_session, verifications):
+    """Test only pending rows are completed or timed out."""
+    completed_ids, expired_ids = await SMSPollingService._commit_batch(
+        [verifications["pending"], verifications["cancelled"], verifications["completed"]],
+        [verifications["expiring"], verifications["cancelled"]]
+    )
+    
+    assert completed_ids == [verifications["pending"]]
+    assert expired_ids == [verifications["expiring"]]
+    statuses = {v.id: v.status for v in db_session.query(Verification)}
+    assert statuses[verifications["pending"]] == "completed"
+    assert statuses[verifications["cancelled"]] == "cancelled"
+    assert statuses[verifications["expiring"]] == "timeout"
+
+
+async def test_commit_batch_refunds_timeouts_once(db_session, verifications):
+    """Test a timeout refunds its cost under the shared refund key."""
+    await SMSPollingService._commit_batch([], [verifications["expiring"]])
+    await SMSPollingService._commit_batch([], [verifications["expiring"]])
+    
+    refunds = db_session.query(Transaction).filter(Transaction.type == "refund").all()
+    assert [(r.amount, r.idempotency_key) for r in refunds] == [
+        (2.0, verification_refund_key(verifications["expiring"]))
+    ]
+    assert db_session.get(User, "test_user_123").credits == pytest.approx(12.0)
+
+
+async def test_flush_notifies_only_applied_results(verifications):
+    """Test completions the UPDATE skipped are neither broadcast nor retained."""
+    service = SMSPollingService()
+    notified = []
+    
+    async def listener(verification_id, message):
+        notified.append((verification_id, message["status"]))
+    
+    service.add_listener(listener)
+    service._completed = {
+        verifications["pending"]: ["Your code is 123456"],
+        verifications["cancelled"]: ["Your code is 654321"]
+    }
+    service._timed_out = [verifications["expiring"]]
+    
+    await service._flush()
+    
+    assert sorted(notified) == sorted([
+        (verifications["pending"], "completed"),
+        (verifications["expiring"], "timeout")
+    ])
+    assert service.get_recent_result(verifications["pending"])["messages"] == ["Your code is 123456"]
+    assert service.get_recent_result(verifications["cancelled"]) is None
@@ -0,0 +1,60 @@
+"""Tests for the background system sampler."""
+import gc
+import pytest
+from prometheus_client import REGISTRY
+from app.core.system_sampler import GCPauseTracker, SystemSampler
+
+
+@pytest.fixture
+def sampler(monkeypatch):
+    """A sampler with canned host readings and database ping."""
+    sampler = SystemSampler(interval=3600)
+    monkeypatch.setattr(sampler, "_read_host", lambda: (12.5, 40.0, 70.0, 1024))
+    
+    async def ping():
+        return {"status": "healthy", "latency_ms": 0.5}
+    
+    monkeypatch.setattr(sampler, "_ping_database", ping)
+    return sampler
+
+
+def test_gc_tracker_drains_per_interval():
+    """Test GC pauses are summed per generation and reset on drain."""
+    tracker = GCPauseTracker()
+    tracker("start", {})
+    tracker("stop", {"generation": 1})
+    
+    pauses, max_pause, collections = tracker.drain()
+    
+    assert collections == [0, 1, 0]
+    assert pauses[1] == max_pause >= 0
+    assert tracker.drain() == ([0.0, 0.0, 0.0], 0.0, [0, 0, 0])
+
+
+async def test_sample_publishes_snapshot_and_gauges(sampler):
+    """Test a sample replaces the snapshot, sets the gauges and resets the lag window."""
+    sampler._max_lag = 0.25
+    
+    snapshot = await sampler.sample()
+    
+    assert sampler.snapshot is snapshot
+    assert (snapshot.cpu_percent, snapshot.memory_percent, snapshot.disk_percent) == (12.5, 40.0, 70.0)
+    assert snapshot.loop_lag_seconds == 0.25
+    assert snapshot.database["status"] == "healthy"
+    assert REGISTRY.get_sample_value("system_cpu_usage_percent") == 12.5
+    assert REGISTRY.get_sample_value("event_loop_lag_seconds") == 0.25
+    assert (await sampler.sample()).loop_lag_seconds == 0.0
+
+
+async def test_start_and_stop(sampler):
+    """Test start samples at once and stop removes the tasks and GC callback."""
+    await sampler.start()
+    try:
+        assert sampler.running
+        assert sampler.snapshot is not None
+        assert sampler.gc_tracker in gc.callbacks
+    finally:
+        await sampler.stop()
+    
+    assert not sampler.running
+    assert sampler.gc_tracker not in gc.callbacks
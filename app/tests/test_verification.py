@@ -0,0 +1,189 @@
+"""Tests for the async verification endpoints."""
+import pytest
+from app.api import verification as verification_api
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.models.verification import Verification
+
+
+class FakeTextVerified:
+    """Stand-in for the TextVerified API with canned responses."""
+    purchase = {"number_id": "tv_number_1", "phone_number": "+15550100"}
+    state = "verificationPending"
+    sms = None
+    cancelled = []
+    
+    async def create_verification(self, service_name, country="US", capability="sms"):
+        return self.purchase
+    
+    async def get_verification_status(self, verification_id):
+        return {"state": self.state}
+    
+    async def get_sms(self, number_id):
+        return {"sms": self.sms} if self.sms else {"sms": None}
+    
+    async def cancel_number(self, number_id):
+        self.cancelled.append(number_id)
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Route upstream calls to a fresh FakeTextVerified."""
+    fake = type("Upstream", (FakeTextVerified,), {"cancelled": []})
+    monkeypatch.setattr(verification_api, "TextVerifiedService", fake)
+    return fake
+
+
+@pytest.fixture
+def polled(monkeypatch):
+    """Record verifications handed to the polling scheduler."""
+    started = []
+    
+    async def start_polling(verification_id, number_id=None, capability="sms"):
+        started.append((verification_id, number_id, capability))
+    
+    monkeypatch.setattr(verification_api.polling_service, "start_polling", start_polling)
+    return started
+
+
+@pytest.fixture
+def pending_verification(db_session, test_user):
+    """A purchased verification waiting for its code."""
+    verification = Verification(
+        user_id=test_user.id,
+        service_name="telegram",
+        phone_number="+15550100",
+        status="pending",
+        cost=1.0,
+        verification_code="tv_number_1"
+    )
+    db_session.add(verification)
+    db_session.commit()
+    return verification
+
+
+def test_create_uses_free_verification_first(client, auth_headers, db_session, upstream, polled):
+    """Test the first verification is free and handed to the poller."""
+    response = client.post("/verify/create", json={"service_name": "telegram"}, headers=auth_headers)
+    
+    assert response.status_code == 201
+    data = response.json()
+    assert data["status"] == "pending"
+    assert data["phone_number"] == "+15550100"
+    assert data["cost"] == 0
+    assert polled == [(data["id"], "tv_number_1", "sms")]
+    
+    db_session.expire_all()
+    user = db_session.get(User, "test_user_123")
+    assert user.free_verifications == 0
+    assert user.credits == 10.0
+    verification = db_session.get(Verification, data["id"])
+    assert verification.status == "pending"
+    assert verification.verification_code == "tv_number_1"
+
+
+def test_create_charges_credits(client, auth_headers, db_session, upstream, polled):
+    """Test a paid verification debits the quoted price once."""
+    db_session.query(User).filter(User.id == "test_user_123").update({"free_verifications": 0})
+    db_session.commit()
+    
+    response = client.post("/verify/create", json={"service_name": "telegram"}, headers=auth_headers)
+    
+    assert response.status_code == 201
+    cost = response.json()["cost"]
+    assert cost > 0
+    db_session.expire_all()
+    assert db_session.get(User, "test_user_123").credits == pytest.approx(10.0 - cost)
+    assert db_session.query(Transaction).filter(Transaction.type == "debit").count() == 1
+
+
+def test_create_insufficient_credits(client, auth_headers, db_session, upstream, polled):
+    """Test a user who cannot pay gets 402 and no verification."""
+    db_session.query(User).filter(User.id == "test_user_123").update({"credits": 0.0, "free_verifications": 0})
+    db_session.commit()
+    
+    response = client.post("/verify/create", json={"service_name": "telegram"}, headers=auth_headers)
+    
+    assert response.status_code == 402
+    assert db_session.query(Verification).count() == 0
+    assert polled == []
+
+
+def test_create_upstream_error_releases_reservation(client, auth_headers, db_session, upstream, polled):
+    """Test a failed purchase marks the verification failed and refunds it."""
+    db_session.query(User).filter(User.id == "test_user_123").update({"free_verifications": 0})
+    db_session.commit()
+    upstream.purchase = {"error": "No numbers available"}
+    
+    response = client.post("/verify/create", json={"service_name": "telegram"}, headers=auth_headers)
+    
+    assert response.status_code == 400
+    db_session.expire_all()
+    assert db_session.query(Verification).one().status == "failed"
+    assert db_session.get(User, "test_user_123").credits == pytest.approx(10.0)
+    assert polled == []
+
+
+def test_create_without_api_key_releases_reservation(client, auth_headers, db_session, upstream, polled):
+    """Test a missing upstream API key returns 503 and gives the free verification back."""
+    def missing_key(self):
+        raise ValueError("Valid TextVerified API key required. Current key is invalid or missing.")
+    
+    upstream.__init__ = missing_key
+    
+    response = client.post("/verify/create", json={"service_name": "telegram"}, headers=auth_headers)
+    
+    assert response.status_code == 503
+    db_session.expire_all()
+    assert db_session.query(Verification).one().status == "failed"
+    user = db_session.get(User, "test_user_123")
+    assert (user.credits, user.free_verifications) == (10.0, 1.0)
+    assert polled == []
+
+
+def test_status_not_found(client):
+    """Test status of an unknown verification."""
+    response = client.get("/verify/missing")
+    assert response.status_code == 404
+
+
+def test_status_pending(client, pending_verification, upstream):
+    """Test status is returned without authentication."""
+    response = client.get(f"/verify/{pending_verification.id}")
+    
+    assert response.status_code == 200
+    assert response.json()["status"] == "pending"
+
+
+def test_status_completes_verification(client, db_session, pending_verification, upstream):
+    """Test a completed upstream state is persisted."""
+    upstream.state = "verificationCompleted"
+    
+    response = client.get(f"/verify/{pending_verification.id}")
+    
+    assert response.status_code == 200
+    assert response.json()["status"] == "completed"
+    db_session.expire_all()
+    verification = db_session.get(Verification, pending_verification.id)
+    assert verification.status == "completed"
+    assert verification.completed_at is not None
+
+
+def test_messages_without_sms(client, pending_verification, upstream):
+    """Test messages while no SMS has arrived."""
+    response = client.get(f"/verify/{pending_verification.id}/messages")
+    
+    assert response.status_code == 200
+    assert response.json() == {"messages": [], "status": "pending"}
+
+
+def test_messages_with_sms(client, db_session, pending_verification, upstream):
+    """Test a received SMS is returned and completes the verification."""
+    upstream.sms = "Your code is 123456"
+    
+    response = client.get(f"/verify/{pending_verification.id}/messages")
+    
+    assert response.status_code == 200
+    assert response.json() == {"messages": ["Your code is 123456"], "status": "completed"}
+    db_session.expire_all()
+    assert db_session.get(Verification, pending_verification.id).status == "completed"
@@ -0,0 +1,141 @@
+"""Tests for two-phase verification purchases and the orphan reaper."""
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.core.exceptions import InsufficientCreditsError
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.models.verification import Verification
+from app.services.credit_ledger import verification_refund_key
+from app.services.verification_reservations import RESERVED, VerificationReservations
+
+
+@pytest.fixture
+def reservations():
+    """A reservation manager releasing reservations older than a minute."""
+    return VerificationReservations(max_age=60.0)
+
+
+@pytest.fixture
+def paying_user(db_session, test_user):
+    """The test user with no free verifications left."""
+    db_session.query(User).filter(User.id == test_user.id).update({"free_verifications": 0})
+    db_session.commit()
+    return test_user
+
+
+def reload(db_session, model, key):
+    """Committed state of one row."""
+    db_session.expire_all()
+    return db_session.get(model, key)
+
+
+async def reserve(reservations, user, cost=2.0):
+    """Reserve a telegram SMS verification."""
+    return await reservations.reserve(user.id, "telegram", "sms", "US", cost)
+
+
+async def test_reserve_charges_and_records(db_session, reservations, paying_user):
+    """Test a reservation debits the user and stores a reserved row."""
+    verification = await reserve(reservations, paying_user)
+    
+    stored = reload(db_session, Verification, verification.id)
+    assert (stored.status, stored.cost, stored.phone_number) == (RESERVED, 2.0, None)
+    assert reload(db_session, User, paying_user.id).credits == 8.0
+    debit = db_session.query(Transaction).one()
+    assert debit.idempotency_key == f"verification:{verification.id}"
+
+
+async def test_reserve_uses_free_verification(db_session, reservations, test_user):
+    """Test a free verification is used before credits."""
+    verification = await reserve(reservations, test_user)
+    
+    assert verification.cost == 0
+    user = reload(db_session, User, test_user.id)
+    assert (user.credits, user.free_verifications) == (10.0, 0)
+
+
+async def test_reserve_insufficient_balance(db_session, reservations, paying_user):
+    """Test an unaffordable reservation leaves nothing behind."""
+    with pytest.raises(InsufficientCreditsError):
+        await reserve(reservations, paying_user, cost=12.0)
+    
+    assert db_session.query(Verification).count() == 0
+    assert reload(db_session, User, paying_user.id).credits == 10.0
+
+
+async def test_confirm(db_session, reservations, paying_user):
+    """Test confirming attaches the number and starts the verification."""
+    verification = await reserve(reservations, paying_user)
+    
+    assert await reservations.confirm(verification, "+15550100", "tv_number_1")
+    
+    assert verification.status == "pending"
+    stored = reload(db_session, Verification, verification.id)
+    assert (stored.status, stored.phone_number, stored.verification_code) == ("pending", "+15550100", "tv_number_1")
+    assert not await reservations.release(verification.id)
+
+
+async def test_release_refunds_once(db_session, reservations, paying_user):
+    """Test releasing fails the reservation and refunds it exactly once."""
+    verification = await reserve(reservations, paying_user)
+    
+    assert await reservations.release(verification.id)
+    assert not await reservations.release(verification.id)
+    
+    assert reload(db_session, Verification, verification.id).status == "failed"
+    assert reload(db_session, User, paying_user.id).credits == 10.0
+    refund = db_session.query(Transaction).filter(Transaction.type == "refund").one()
+    assert refund.idempotency_key == verification_refund_key(verification.id)
+
+
+async def test_release_restores_free_verification(db_session, reservations, test_user):
+    """Test releasing a free reservation gives the free verification back."""
+    verification = await reserve(reservations, test_user)
+    
+    assert await reservations.release(verification.id)
+    
+    user = reload(db_session, User, test_user.id)
+    assert (user.credits, user.free_verifications) == (10.0, 1.0)
+    assert db_session.query(Transaction).filter(Transaction.type == "refund").count() == 0
+
+
+async def test_confirm_after_release(db_session, reservations, paying_user):
+    """Test a released reservation cannot be confirmed."""
+    verification = await reserve(reservations, paying_user)
+    await reservations.release(verification.id)
+    
+    assert not await reservations.confirm(verification, "+15550100", "tv_number_1")
+    assert verification.status == RESERVED
+    assert reload(db_session, Verification, verification.id).status == "failed"
+
+
+async def test_reaper_releases_orphans_only(db_session, reservations, paying_user):
+    """Test the reaper releases stale reservations and leaves fresh or confirmed ones."""
+    orphan = await reserve(reservations, paying_user)
+    stale_confirmed = await reserve(reservations, paying_user)
+    await reservations.confirm(stale_confirmed, "+15550100", "tv_number_1")
+    fresh = await reserve(reservations, paying_user)
+    
+    an_hour_ago = datetime.now(timezone.utc) - timedelta(hours=1)
+    db_session.query(Verification).filter(
+        Verification.id.in_([orphan.id, stale_confirmed.id])
+    ).update({"created_at": an_hour_ago}, synchronize_session=False)
+    db_session.commit()
+    
+    assert await reservations.reap() == 1
+    assert await reservations.reap() == 0
+    
+    assert reload(db_session, Verification, orphan.id).status == "failed"
+    assert reload(db_session, Verification, stale_confirmed.id).status == "pending"
+    assert reload(db_session, Verification, fresh.id).status == RESERVED
+    assert reload(db_session, User, paying_user.id).credits == 6.0
+
+
+async def test_reaper_release_beats_late_confirm(db_session, reservations, paying_user):
+    """Test a purchase finishing after its reservation was reaped is not confirmed."""
+    verification = await reserve(reservations, paying_user)
+    reservations.max_age = 0
+    
+    assert await reservations.reap() == 1
+    assert not await reservations.confirm(verification, "+15550100", "tv_number_1")
+    assert reload(db_session, User, paying_user.id).credits == 10.0
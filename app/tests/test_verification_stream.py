@@ -0,0 +1,64 @@
+"""Tests for the Server-Sent Events verification stream."""
+import pytest
+from app.models.verification import Verification
+
+
+@pytest.fixture
+def completed_verification(db_session, test_user):
+    """A verification that reached a terminal status."""
+    verification = Verification(
+        user_id=test_user.id,
+        service_name="telegram",
+        phone_number="+15550100",
+        status="completed",
+        cost=1.0
+    )
+    db_session.add(verification)
+    db_session.commit()
+    return verification
+
+
+def test_stream_not_found(client):
+    """Test streaming an unknown verification."""
+    assert client.get("/verify/missing/stream").status_code == 404
+
+
+def test_stream_terminal_snapshot(client, completed_verification):
+    """Test a finished verification streams its snapshot and closes."""
+    response = client.get(f"/verify/{completed_verification.id}/stream")
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text.startswith("retry: ")
+    assert "event: status" in response.text
+    assert '"status": "completed"' in response.text
+    assert '"phone_number": "+15550100"' in response.text
+
+
+async def test_subscriber_overflow_signals_resync():
+    """Test a lagging stream gets a close marker instead of being dropped silently."""
+    from app.api.websocket import StreamSubscriber
+    
+    subscriber = StreamSubscriber(max_queue=2)
+    for update in ("a", "b", "c", "d"):
+        await subscriber.send_text(update)
+    
+    assert subscriber.overflowed
+    assert subscriber.queue.get_nowait() is None
+    assert subscriber.queue.empty()
+
+
+def test_resumed_terminal_stream_stops_reconnects(client, completed_verification):
+    """Test a client that already saw the final state gets 204, not an empty stream."""
+    first = client.get(f"/verify/{completed_verification.id}/stream")
+    last_event_id = next(line for line in first.text.splitlines() if line.startswith("id: "))[4:]
+    
+    resumed = client.get(f"/verify/{completed_verification.id}/stream", headers={"Last-Event-ID": last_event_id})
+    stale = client.get(
+        f"/verify/{completed_verification.id}/stream",
+        headers={"Last-Event-ID": str(int(last_event_id) - 1)}
+    )
+    
+    assert resumed.status_code == 204
+    assert stale.status_code == 200
+    assert '"status": "completed"' in stale.text
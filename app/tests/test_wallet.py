@@ -0,0 +1,24 @@
+"""Tests for the wallet endpoints."""
+
+
+def test_balance(client, auth_headers):
+    """Test balance reflects the user's credits."""
+    response = client.get("/wallet/balance", headers=auth_headers)
+    
+    assert response.status_code == 200
+    assert response.json() == {"credits": 10.0, "credits_usd": 20.0, "free_verifications": 1.0}
+
+
+def test_balance_requires_auth(client):
+    """Test balance without a token is rejected."""
+    response = client.get("/wallet/balance")
+    assert response.status_code == 401
+
+
+def test_balance_after_account_deleted(client, auth_headers, db_session, test_user):
+    """Test a token for a deleted user no longer resolves."""
+    db_session.delete(test_user)
+    db_session.commit()
+    
+    response = client.get("/wallet/balance", headers=auth_headers)
+    assert response.status_code == 401
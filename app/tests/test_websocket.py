@@ -0,0 +1,68 @@
+"""Tests for authentication of the verification WebSocket."""
+import json
+import pytest
+from starlette.websockets import WebSocketDisconnect
+from app.api.websocket import manager
+from app.models.verification import Verification
+
+
+@pytest.fixture
+def verification(db_session, test_user):
+    """A pending verification owned by the test user."""
+    verification = Verification(
+        user_id=test_user.id, service_name="telegram", phone_number="+15550100", status="pending", cost=1.0
+    )
+    db_session.add(verification)
+    db_session.commit()
+    return verification
+
+
+def token(headers):
+    """The Bearer token from authentication headers."""
+    return headers["Authorization"].split(" ")[1]
+
+
+def test_query_token_receives_state(client, auth_headers, verification):
+    """Test the owner authenticating with ?token= gets the current state."""
+    url = f"/ws/verification/{verification.id}?token={token(auth_headers)}"
+    with client.websocket_connect(url) as websocket:
+        state = websocket.receive_json()
+        assert verification.id in manager.active_connections
+    
+    assert state["type"] == "verification_state"
+    assert state["phone_number"] == "+15550100"
+
+
+def test_first_message_token_receives_state(client, auth_headers, verification):
+    """Test the owner may send the token as the first message instead."""
+    with client.websocket_connect(f"/ws/verification/{verification.id}") as websocket:
+        websocket.send_text(json.dumps({"type": "auth", "token": token(auth_headers)}))
+        assert websocket.receive_json()["status"] == "pending"
+
+
+@pytest.mark.parametrize("message", ["{}", "not json", json.dumps({"type": "auth", "token": "forged"})])
+def test_missing_or_invalid_token_is_closed(client, verification, message):
+    """Test connections without a valid token are closed before subscribing."""
+    with client.websocket_connect(f"/ws/verification/{verification.id}") as websocket:
+        websocket.send_text(message)
+        with pytest.raises(WebSocketDisconnect) as closed:
+            websocket.receive_text()
+    
+    assert closed.value.code == 1008
+    assert verification.id not in manager.active_connections
+
+
+def test_other_users_verification_is_not_found(client, admin_user, verification):
+    """Test a valid token for another user gets no state and no updates."""
+    response = client.post("/auth/login", json={"email": "admin@example.com", "password": "adminpass123"})
+    url = f"/ws/verification/{verification.id}?token={response.json()['access_token']}"
+    
+    with client.websocket_connect(url) as websocket:
+        assert websocket.receive_json() == {
+            "type": "error", "verification_id": verification.id, "message": "Verification not found"
+        }
+        with pytest.raises(WebSocketDisconnect) as closed:
+            websocket.receive_text()
+    
+    assert closed.value.code == 1008
+    assert verification.id not in manager.active_connections
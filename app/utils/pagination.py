@@ -0,0 +1,55 @@
+"""Keyset (cursor) pagination helpers for newest-first listings."""
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import Query
+
+# Totals stop counting here; larger results are reported as "at least" this many
+TOTAL_COUNT_CAP = 10000
+
+
+def encode_cursor(created_at: datetime, row_id: str) -> str:
+    """Encode the position after a row as an opaque cursor."""
+    payload = json.dumps({"t": created_at.isoformat(), "i": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Decode a cursor from encode_cursor; raises ValueError if malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["t"]), str(payload["i"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def keyset_page(query: Query, created_column, id_column, cursor: Optional[str], limit: int) -> Tuple[List, Optional[str]]:
+    """Fetch one newest-first page after cursor and the cursor for the next page.
+    
+    Seeks on (created_at, id) instead of OFFSET, so with an index on the
+    filter columns followed by (created_at, id) every page costs the same.
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(tuple_(created_column, id_column) < tuple_(created_at, row_id))
+    
+    rows = query.order_by(created_column.desc(), id_column.desc()).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, created_column.key), getattr(last, id_column.key))
+
+
+def capped_count(query: Query, id_column, cap: int = TOTAL_COUNT_CAP) -> Tuple[int, bool]:
+    """Count matching rows, stopping at cap; returns (count, is_estimate)."""
+    limited = query.with_entities(id_column).limit(cap + 1).subquery()
+    count = query.session.query(func.count()).select_from(limited).scalar()
+    if count > cap:
+        return cap, True
+    return count, False
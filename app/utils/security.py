@@ -1,4 +1,5 @@
 """Security utilities for password hashing, JWT tokens, and API keys."""
+import hashlib
 import secrets
 import string
 from datetime import datetime, timedelta, timezone
@@ -30,7 +31,8 @@ def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta]
     else:
         expire = datetime.now(timezone.utc) + timedelta(hours=settings.jwt_expiry_hours)
     
-    to_encode.update({"exp": expire})
+    # jti lets caches and revocation refer to a token without storing it
+    to_encode.update({"exp": expire, "jti": secrets.token_urlsafe(12)})
     
     return jwt.encode(
         to_encode,
@@ -58,6 +60,20 @@ def generate_api_key(length: int = 32) -> str:
     return ''.join(secrets.choice(alphabet) for _ in range(length))
 
 
+# Stored in clear and indexed so a lookup narrows to one row before hashing compares
+API_KEY_PREFIX_LENGTH = 12
+
+
+def hash_api_key(key: str) -> str:
+    """Hash an API key for storage; keys are random, so a fast digest suffices."""
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def api_key_prefix(key: str) -> str:
+    """Get the indexed, displayable prefix of an API key."""
+    return key[:API_KEY_PREFIX_LENGTH]
+
+
 def generate_verification_code(length: int = 6) -> str:
     """Generate a numeric verification code."""
     return ''.join(secrets.choice(string.digits) for _ in range(length))
@@ -5,10 +5,18 @@ from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse
 
-from app.core.database import engine
+from app.core.database import engine, async_engine
 from app.core.exceptions import setup_exception_handlers
 from app.core.caching import cache
+from app.core.config import settings
 from app.core.logging import setup_logging, get_logger
+from app.services.textverified_client import textverified_client
+from app.services.sms_polling_service import polling_service
+from app.services.verification_reservations import verification_reservations
+from app.services.export_jobs import export_jobs
+from app.core.system_sampler import system_sampler
+from app.core.loop_profiler import loop_profiler
+from app.core.principal_cache import principal_invalidator
 
 # Import all routers
 from app.api.admin import router as admin_router
@@ -19,7 +27,7 @@ from app.api.verification import router as verification_router
 from app.api.wallet import router as wallet_router
 from app.api.setup import router as setup_router
 from app.api.services import router as services_router
-from app.api.websocket import router as websocket_router
+from app.api.websocket import router as websocket_router, manager as websocket_manager
 from app.api.countries import router as countries_router
 
 # Import middleware
@@ -27,6 +35,8 @@ from app.middleware.security import JWTAuthMiddleware, CORSMiddleware, SecurityH
 from app.middleware.logging import RequestLoggingMiddleware
 from app.middleware.rate_limiting import RateLimitMiddleware
 from app.core.security_hardening import SecurityMiddleware
+from app.core.security_config import RateLimitConfig
+from app.core.metrics import MetricsMiddleware
 
 
 def create_app() -> FastAPI:
@@ -50,11 +60,19 @@ def create_app() -> FastAPI:
     # Add middleware (order matters - security first)
     fastapi_app.add_middleware(SecurityMiddleware)
     fastapi_app.add_middleware(SecurityHeadersMiddleware)
-    fastapi_app.add_middleware(CORSMiddleware)
     fastapi_app.add_middleware(JWTAuthMiddleware)
-    fastapi_app.add_middleware(RateLimitMiddleware)
+    fastapi_app.add_middleware(
+        RateLimitMiddleware,
+        default_requests=RateLimitConfig.DEFAULT_LIMITS["api"],
+        default_window=60  # DEFAULT_LIMITS are per minute
+    )
+    # Outside auth and rate limiting, so browsers can read their 401s and 429s
+    fastapi_app.add_middleware(CORSMiddleware)
     fastapi_app.add_middleware(RequestLoggingMiddleware)
     
+    # Outermost, so requests rejected by auth or rate limiting are counted too
+    fastapi_app.add_middleware(MetricsMiddleware, routes=fastapi_app.routes)
+    
     # Include all routers
     fastapi_app.include_router(root_router)  # Root routes (landing page)
     fastapi_app.include_router(auth_router)
@@ -82,6 +100,20 @@ def create_app() -> FastAPI:
     async def startup_event():
         """Initialize connections on startup."""
         await cache.connect()
+        await textverified_client.start()
+        await polling_service.start()
+        await verification_reservations.start()
+        await export_jobs.start()
+        await system_sampler.start()
+        if settings.loop_profiler_enabled:
+            await loop_profiler.start(fastapi_app.routes)
+        
+        # Push polling results to WebSocket subscribers on every worker
+        polling_service.add_listener(websocket_manager.publish)
+        await websocket_manager.start_fanout()
+        
+        # Apply account suspensions handled by other workers to this one's cache
+        await principal_invalidator.start()
     
     @fastapi_app.on_event("shutdown")
     async def shutdown_event():
@@ -90,12 +122,28 @@ def create_app() -> FastAPI:
         logger.info("Starting graceful shutdown")
         
         try:
+            # Stop polling and commit buffered results
+            await polling_service.stop()
+            await verification_reservations.stop()
+            await export_jobs.stop()
+            await system_sampler.stop()
+            await loop_profiler.stop()
+            logger.info("SMS polling stopped")
+            
+            await websocket_manager.stop_fanout()
+            await principal_invalidator.stop()
+            
             # Disconnect cache
             await cache.disconnect()
             logger.info("Cache disconnected")
             
+            # Close pooled upstream connections
+            await textverified_client.close()
+            logger.info("TextVerified connection pool closed")
+            
             # Dispose database connections
             engine.dispose()
+            await async_engine.dispose()
             logger.info("Database connections disposed")
             
             logger.info("Graceful shutdown completed")
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+User Daily Stats Backfill
+Rebuilds the user_daily_stats rollup from the verifications and transactions tables.
+"""
+import os
+import sys
+import time
+
+# Add app to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.database import SessionLocal
+from app.services.daily_stats import rebuild_daily_stats
+
+
+def main():
+    """Rebuild the rollup for every user, or one with --user-id."""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Rebuild the user_daily_stats rollup")
+    parser.add_argument("--user-id", help="Only rebuild this user's rows")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows fetched and inserted per batch")
+    
+    args = parser.parse_args()
+    
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        written = rebuild_daily_stats(db, user_id=args.user_id, batch_size=args.batch_size)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    
+    scope = f"user {args.user_id}" if args.user_id else "all users"
+    print(f"Rebuilt {written} user_daily_stats rows for {scope} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
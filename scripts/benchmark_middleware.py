@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Middleware Stack Benchmark
+Measures per-request overhead of BaseHTTPMiddleware layers against pure-ASGI
+layers, and of the stack create_app() installs, by driving ASGI apps directly.
+"""
+import asyncio
+import os
+import sys
+import time
+
+# Add app to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from starlette.applications import Starlette
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from app.core.security_config import RateLimitConfig
+from app.core.security_hardening import SecurityMiddleware
+from app.middleware.logging import RequestLoggingMiddleware
+from app.middleware.rate_limiting import RateLimitMiddleware
+from app.middleware.security import CORSMiddleware, JWTAuthMiddleware, SecurityHeadersMiddleware
+
+LAYERS = 6  # middlewares installed by create_app()
+REQUESTS = 5000
+
+
+class PassThroughHTTPMiddleware(BaseHTTPMiddleware):
+    """A BaseHTTPMiddleware that only calls the next app."""
+    
+    async def dispatch(self, request, call_next):
+        return await call_next(request)
+
+
+class PassThroughASGIMiddleware:
+    """A pure-ASGI middleware that only calls the next app."""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        await self.app(scope, receive, send)
+
+
+async def plain(request):
+    return PlainTextResponse("ok")
+
+
+async def streamed(request):
+    async def chunks():
+        for _ in range(20):
+            yield b"x" * 1024
+    return StreamingResponse(chunks())
+
+
+def endpoint_app():
+    """The innermost app: one plain and one streaming route."""
+    return Starlette(routes=[Route("/system/plain", plain), Route("/system/stream", streamed)])
+
+
+def wrap(app, *middlewares):
+    """Wrap app so the first middleware given is the outermost."""
+    for middleware in reversed(middlewares):
+        app = middleware(app)
+    return app
+
+
+def create_app_stack(app):
+    """The create_app() stack, with rate limit counters kept in-process."""
+    rate_limit = RateLimitMiddleware(
+        wrap(app, JWTAuthMiddleware, CORSMiddleware, SecurityHeadersMiddleware, SecurityMiddleware),
+        default_requests=RateLimitConfig.DEFAULT_LIMITS["api"] * 1000,
+        default_window=60
+    )
+    rate_limit.limiter._redis_down_until = float("inf")  # benchmark the middleware, not Redis
+    return RequestLoggingMiddleware(rate_limit, log_requests=False, log_responses=False)
+
+
+async def request(app, path: str) -> int:
+    """Send one GET through an ASGI app; return the body size."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "root_path": "", "query_string": b"", "server": ("bench", 80), "client": ("127.0.0.1", 1234),
+        "headers": [(b"host", b"bench"), (b"origin", b"http://localhost:3000")]
+    }
+    received = False
+    size = 0
+    
+    async def receive():
+        nonlocal received
+        if received:
+            await asyncio.sleep(3600)  # no disconnect until the response is done
+        received = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+    
+    async def send(message):
+        nonlocal size
+        if message["type"] == "http.response.body":
+            size += len(message.get("body", b""))
+    
+    await app(scope, receive, send)
+    return size
+
+
+async def time_app(app, path: str, requests: int) -> float:
+    """Mean microseconds per request after a warm-up."""
+    for _ in range(200):
+        await request(app, path)
+    
+    started = time.perf_counter()
+    for _ in range(requests):
+        await request(app, path)
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+async def main():
+    """Run the benchmark and print a comparison table."""
+    variants = [
+        ("no middleware", endpoint_app()),
+        (f"{LAYERS} x BaseHTTPMiddleware", wrap(endpoint_app(), *[PassThroughHTTPMiddleware] * LAYERS)),
+        (f"{LAYERS} x pure ASGI", wrap(endpoint_app(), *[PassThroughASGIMiddleware] * LAYERS)),
+        ("create_app() stack", create_app_stack(endpoint_app()))
+    ]
+    
+    print(f"Middleware overhead, {REQUESTS} requests per row")
+    print("=" * 66)
+    for path in ("/system/plain", "/system/stream"):
+        baseline = None
+        print(f"\n{path}")
+        print(f"{'Variant':<28} {'us/request':>12} {'overhead us':>12}")
+        print("-" * 54)
+        for name, app in variants:
+            per_request = await time_app(app, path, REQUESTS)
+            baseline = per_request if baseline is None else baseline
+            print(f"{name:<28} {per_request:>12.1f} {per_request - baseline:>12.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())